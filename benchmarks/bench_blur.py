@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Blur benchmark: QGraphicsScene + QGraphicsBlurEffect vs. ``echoview.blur``.
+
+Times the old per-slide blur (a throwaway scene with a blur effect rendered
+into a QImage, as ``blur_pixmap_once`` used to do) against
+``echoview.blur.blur_image`` for a range of screen sizes and
+``background_blur_radius`` values, and reports how far apart the results are
+as the mean absolute difference per channel (0-255) away from the borders,
+where the old path faded into transparency.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_blur.py \\
+        [--sizes 800x480,1920x1080] [--radii 5,10,20,40] [--rounds N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+from PySide6.QtCore import QRectF, Qt  # noqa: E402
+from PySide6.QtGui import QColor, QImage, QPainter, QPixmap  # noqa: E402
+from PySide6.QtWidgets import (  # noqa: E402
+    QApplication, QGraphicsBlurEffect, QGraphicsPixmapItem, QGraphicsScene,
+)
+
+from echoview.blur import blur_image  # noqa: E402
+
+
+def scene_blur(pm, radius):
+    """The QGraphicsScene blur EchoView used before echoview.blur."""
+    scene = QGraphicsScene()
+    item = QGraphicsPixmapItem(pm)
+    blur = QGraphicsBlurEffect()
+    blur.setBlurRadius(radius)
+    blur.setBlurHints(QGraphicsBlurEffect.PerformanceHint)
+    item.setGraphicsEffect(blur)
+    scene.addItem(item)
+    result = QImage(pm.width(), pm.height(), QImage.Format_ARGB32)
+    result.fill(Qt.transparent)
+    painter = QPainter(result)
+    scene.render(painter, QRectF(0, 0, pm.width(), pm.height()),
+                 QRectF(0, 0, pm.width(), pm.height()))
+    painter.end()
+    return QPixmap.fromImage(result)
+
+
+def new_blur(pm, radius):
+    """What blur_pixmap_once does now, pixmap round trip included."""
+    return QPixmap.fromImage(blur_image(pm.toImage(), radius))
+
+
+def make_image(w, h, seed=1):
+    rng = np.random.default_rng(seed)
+    img = QImage(w, h, QImage.Format_RGB32)
+    img.fill(QColor(40, 40, 40))
+    painter = QPainter(img)
+    for _ in range(120):
+        painter.fillRect(int(rng.integers(0, w)), int(rng.integers(0, h)),
+                         int(rng.integers(4, w // 6)), int(rng.integers(4, h // 6)),
+                         QColor(*(int(c) for c in rng.integers(0, 256, 3))))
+    painter.end()
+    return img
+
+
+def pixels(pm):
+    img = pm.toImage().convertToFormat(QImage.Format_ARGB32)
+    w, h = img.width(), img.height()
+    rows = np.frombuffer(img.constBits(), dtype=np.uint8).reshape(h, img.bytesPerLine())
+    return rows[:, :w * 4].reshape(h, w, 4)[:, :, :3].astype(np.float32)
+
+
+def time_ms(func, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def parse_sizes(text):
+    return [tuple(int(v) for v in part.lower().split("x")) for part in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("800x480,1280x720,1920x1080,3840x2160"))
+    parser.add_argument("--radii", default="5,10,20,40")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    radii = [int(r) for r in args.radii.split(",")]
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication([])  # noqa: F841 - QGraphicsScene needs one
+
+    print(f"{'size':>10} {'radius':>6} {'scene ms':>9} {'numpy ms':>9} {'speedup':>8} {'mean diff':>10}")
+    for w, h in args.sizes:
+        pm = QPixmap.fromImage(make_image(w, h))
+        for radius in radii:
+            old_ms = time_ms(lambda: scene_blur(pm, radius), args.rounds)
+            new_ms = time_ms(lambda: new_blur(pm, radius), args.rounds)
+            m = 2 * radius
+            diff = np.abs(pixels(scene_blur(pm, radius)) - pixels(new_blur(pm, radius)))[m:-m, m:-m]
+            print(f"{w}x{h:<5} {radius:>6} {old_ms:9.1f} {new_ms:9.1f} {old_ms / new_ms:7.1f}x "
+                  f"{diff.mean():10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory benchmark: list of absolute paths vs. ``echoview.playlist.Playlist``.
+
+Builds a synthetic library listing (IMAGE_DIR/<year>/<event>/IMG_nnnnnn.jpg)
+and measures, with tracemalloc, how much memory one window's playlist holds
+in each representation, plus the cost of the operations the slideshow uses.
+
+Usage:
+    python benchmarks/bench_playlist_memory.py [--entries N] [--folders N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from echoview.playlist import Playlist  # noqa: E402
+
+
+def make_paths(entries, folders, root="/mnt/EchoViews"):
+    per_folder = max(1, entries // folders)
+    return [
+        os.path.join(root, str(2000 + (i // per_folder) % 25),
+                     f"Event {i // per_folder:04}", f"IMG_{i:06}.jpg")
+        for i in range(entries)
+    ]
+
+
+def measure(build):
+    """Return (result, bytes still allocated by it)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def time_us(func, rounds=1000):
+    start = time.perf_counter()
+    for i in range(rounds):
+        func(i)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--folders", type=int, default=200)
+    args = parser.parse_args()
+
+    # Each representation is built from freshly made strings so the list
+    # is charged for its path objects, just like a list read from the index.
+    plain, list_bytes = measure(lambda: make_paths(args.entries, args.folders))
+    compact, playlist_bytes = measure(lambda: Playlist(make_paths(args.entries, args.folders)))
+    assert list(compact) == plain
+
+    n = len(plain)
+    print(f"{n} entries in {args.folders} folders")
+    print(f"{'':<10} {'memory':>10} {'bytes/entry':>12} {'[i] us':>8}")
+    print(f"{'list':<10} {list_bytes / 2**20:8.1f}MB {list_bytes / n:12.1f} "
+          f"{time_us(lambda i: plain[(i * 7919) % n]):8.2f}")
+    print(f"{'Playlist':<10} {playlist_bytes / 2**20:8.1f}MB {playlist_bytes / n:12.1f} "
+          f"{time_us(lambda i: compact[(i * 7919) % n]):8.2f}")
+    print(f"saving: {list_bytes / playlist_bytes:.1f}x")
+    target = plain[n // 2]
+    print(f"index() of the middle entry: list {time_us(lambda i: plain.index(target), 20):.0f} us, "
+          f"Playlist {time_us(lambda i: compact.index(target), 20):.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Render benchmark: the slideshow pipeline end to end, without a display.
+
+Generates a corpus (photos from 1 to 32 MP, a portrait, a JPEG panorama, a
+PNG screenshot and two animated GIFs) and, for every scenario (rotation,
+background blur radius, foreground/background scale percent), drives a real
+``DisplayWindow`` on Qt's offscreen platform through the corpus a few times
+over.  Each scenario runs in its own interpreter, so peak RSS (ru_maxrss) is
+the scenario's own.  Slides are paced like the slideshow: after each slide
+the decode pool is left to go idle before the next one.
+
+Reported per scenario:
+
+* ``swap_ms``: timer tick to swapped slide (``last_swap_ms``), what a viewer
+  sees as the transition delay;
+* ``ms_per_slide``: from ``next_image`` until the decode pool is idle again,
+  i.e. the UI work plus the prefetch/precompose of the following slide, and
+  ``cpu_ms_per_slide``, the process CPU time (all threads) over the same span;
+* ``peak_rss_mb``, and ``slide_peak_mb``: how far RSS rose above its level
+  before the slide while the slide was shown (the peak is reset through
+  /proc/self/clear_refs, so Linux only);
+* ``cache_hit_rate`` (the shared image cache's hits and misses for the
+  window);
+* ``stages``: count, mean, p50 and p95 of the render_stats stage histograms.
+
+Results are written as JSON; pass a previous file as --baseline to print
+the change per scenario.
+
+Usage:
+    python benchmarks/bench_render.py [--screen 1920x1080] [--passes N]
+        [--scenarios default,rotate90,...] [--out results.json]
+        [--baseline old.json] [--corpus DIR]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+DISPLAY = "Bench"
+
+# name: (width, height, format, frames)
+CORPUS = {
+    "photo_1mp.jpg": (1024, 768, "JPEG", 1),
+    "photo_12mp.jpg": (4000, 3000, "JPEG", 1),
+    "photo_24mp.jpg": (6000, 4000, "JPEG", 1),
+    "photo_32mp.jpg": (7000, 4600, "JPEG", 1),
+    "portrait_12mp.jpg": (3000, 4000, "JPEG", 1),
+    "panorama.jpg": (16000, 2000, "JPEG", 1),
+    "screenshot.png": (2560, 1440, "PNG", 1),
+    "anim_small.gif": (480, 270, "GIF", 12),
+    "anim_large.gif": (1280, 720, "GIF", 8),
+}
+
+# name: (rotate, background_blur_radius, foreground_scale_percent,
+#        background_scale_percent, precompose)
+# Without precompose every slide is drawn on the tick by
+# show_foreground_image/updateForegroundScaled, as after a resize or when
+# the next slide was not ready in time.
+SCENARIOS = {
+    "default": (0, 20, 100, 100, True),
+    "rotate90": (90, 20, 100, 100, True),
+    "no_blur": (0, 0, 100, 100, True),
+    "heavy_blur": (0, 40, 100, 50, True),
+    "degraded": (0, 20, 50, 25, True),
+    "degraded_rotate270": (270, 20, 50, 50, True),
+    "on_tick": (0, 20, 100, 100, False),
+    "on_tick_degraded_rotate90": (90, 20, 50, 50, False),
+}
+SETTINGS = ("rotate", "background_blur_radius", "foreground_scale_percent",
+            "background_scale_percent", "precompose")
+
+
+def parse_size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def build_corpus(folder):
+    """Write the CORPUS files into *folder* (skipping existing ones)."""
+    from PIL import Image, ImageDraw
+
+    for i, (name, (w, h, fmt, frames)) in enumerate(CORPUS.items()):
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            continue
+        images = []
+        for f in range(frames):
+            img = Image.new("RGB", (w, h), ((i * 53 + f * 20) % 256, 90, 160))
+            draw = ImageDraw.Draw(img)
+            for j in range(60):
+                x, y = (j * 97 + f * w // 20) % w, (j * 61) % h
+                draw.rectangle((x, y, x + w // 8, y + h // 8),
+                               fill=((j * 37) % 256, (i * 71 + j * 11) % 256, (f * 40) % 256))
+            images.append(img if fmt != "GIF" else img.convert("P", palette=Image.ADAPTIVE))
+        if fmt == "GIF":
+            images[0].save(path, "GIF", save_all=True, append_images=images[1:],
+                           duration=40, loop=0)
+        elif fmt == "JPEG":
+            images[0].save(path, "JPEG", quality=90)
+        else:
+            images[0].save(path, fmt)
+
+
+def summarise(values):
+    values = sorted(values)
+    if not values:
+        return None
+    return {
+        "mean": round(statistics.fmean(values), 2),
+        "p50": round(values[len(values) // 2], 2),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        "max": round(values[-1], 2),
+    }
+
+
+def _rss_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _reset_peak_rss():
+    """Start a new VmHWM period; False where the kernel does not allow it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def worker(slides, precompose):
+    """Run in the child interpreter: drive the window and print the results."""
+    import resource
+
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication([])
+    from echoview import viewer
+    from echoview.decode_pool import get_decode_pool
+    from echoview.render_stats import get_render_stats
+
+    def settle():
+        deadline = time.time() + 60
+        while get_decode_pool()._inflight and time.time() < deadline:
+            app.processEvents()
+            time.sleep(0.002)
+        app.processEvents()
+
+    if not precompose:
+        viewer.DisplayWindow._precompose_next = lambda self: None
+    window = viewer.DisplayWindow(DISPLAY, {"mode": "random_image"})
+    window.show()
+    app.processEvents()
+    window.setup_layout()
+    settle()
+    # Leave the first slide, shown before the window had its size, out of
+    # the numbers.
+    stats = get_render_stats(DISPLAY)
+    stats.take_interval()
+    hits0, misses0 = window.image_cache.counts(DISPLAY)
+
+    swaps, busy, cpu, peaks, per_file = [], [], [], [], {}
+    for _ in range(slides):
+        track_peak = _reset_peak_rss()
+        rss_before = _rss_kb("VmRSS")
+        started, cpu_started = time.perf_counter(), time.process_time()
+        window.next_image()
+        app.processEvents()
+        swap = window.last_swap_ms
+        settle()
+        elapsed = (time.perf_counter() - started) * 1000.0
+        cpu.append((time.process_time() - cpu_started) * 1000.0)
+        if track_peak:
+            peaks.append((_rss_kb("VmHWM") - rss_before) / 1024.0)
+        swaps.append(swap)
+        busy.append(elapsed)
+        per_file.setdefault(os.path.basename(window.last_displayed_path), []).append(swap)
+
+    hits, misses = window.image_cache.counts(DISPLAY)
+    hits, misses = hits - hits0, misses - misses0
+    _, interval = stats.take_interval()
+    result = {
+        "slides": slides,
+        "swap_ms": summarise(swaps),
+        "ms_per_slide": summarise(busy),
+        "cpu_ms_per_slide": summarise(cpu),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        "slide_peak_mb": summarise(peaks),
+        "cache_hits": hits,
+        "cache_misses": misses,
+        "cache_hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        "swap_ms_by_file": {name: summarise(v)["p50"] for name, v in sorted(per_file.items())},
+        "stages": {
+            stage: {
+                "count": h.count,
+                "mean_ms": round(h.total_ms / h.count, 2),
+                "p50_ms": h.percentile(50),
+                "p95_ms": h.percentile(95),
+            }
+            for stage, h in interval.items() if h.count
+        },
+    }
+    window.close()
+    print(json.dumps(result))
+
+
+def run_scenario(name, spec, corpus, screen, passes):
+    rotate, blur, fg, bg, precompose = spec
+    home = tempfile.mkdtemp(prefix=f"echoview-bench-{name}-")
+    with open(os.path.join(home, "viewerconfig.json"), "w") as f:
+        json.dump({
+            "displays": {DISPLAY: {"mode": "random_image", "image_category": "",
+                                   "image_interval": 3600, "shuffle_mode": False,
+                                   "rotate": rotate}},
+            "gui": {"background_blur_radius": blur, "background_scale_percent": bg,
+                    "foreground_scale_percent": fg},
+            "overlay": {},
+            "preload_count": 1,
+        }, f)
+    screen_cfg = os.path.join(home, "offscreen.json")
+    with open(screen_cfg, "w") as f:
+        json.dump({"screens": [{"name": "bench", "x": 0, "y": 0,
+                                "width": screen[0], "height": screen[1],
+                                "logicalDpi": 96, "logicalBaseDpi": 96, "dpr": 1}]}, f)
+    env = dict(
+        os.environ,
+        QT_QPA_PLATFORM=f"offscreen:configfile={screen_cfg}",
+        VIEWER_HOME=home,
+        IMAGE_DIR=corpus,
+        RENDITION_DIR=os.path.join(home, "renditions"),
+        MEDIA_INDEX_PATH=os.path.join(home, "media_index.db"),
+        PLAYLIST_STATE_PATH=os.path.join(home, "playlist_state.json"),
+        BACKGROUND_CACHE_DIR=os.path.join(home, "background_cache"),
+        RENDER_STATS_PATH=os.path.join(home, "render_stats.json"),
+        PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])),
+    )
+    slides = passes * len(CORPUS)
+    try:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(slides)]
+            + ([] if precompose else ["--no-precompose"]),
+            env=env, capture_output=True, text=True, timeout=1800,
+        )
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"scenario {name} failed:\n{proc.stdout}{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def change(old, new):
+    if old in (None, 0) or new is None:
+        return f"{new}"
+    return f"{old} -> {new} ({(new - old) / old * 100:+.0f}%)"
+
+
+def _mean(result, key):
+    """Mean of a summarised measurement; None for files written before it existed."""
+    return (result.get(key) or {}).get("mean")
+
+
+def compare(baseline, results):
+    print(f"\nchange against the baseline from {baseline.get('meta', {}).get('date', '?')}:")
+    for name, new in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        print(f"{name:<26} swap p50 {change(old['swap_ms']['p50'], new['swap_ms']['p50'])} ms, "
+              f"ms/slide {change(old['ms_per_slide']['mean'], new['ms_per_slide']['mean'])}, "
+              f"CPU ms/slide {change(_mean(old, 'cpu_ms_per_slide'), _mean(new, 'cpu_ms_per_slide'))}, "
+              f"RSS {change(old['peak_rss_mb'], new['peak_rss_mb'])} MB, "
+              f"slide peak {change(_mean(old, 'slide_peak_mb'), _mean(new, 'slide_peak_mb'))} MB, "
+              f"hit rate {change(old['cache_hit_rate'], new['cache_hit_rate'])}")
+
+
+def run_all(args, names, corpus):
+    """Run every scenario in *names* over *corpus*; returns the results document."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    results = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": commit,
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "screen": f"{args.screen[0]}x{args.screen[1]}",
+            "passes": args.passes,
+            "corpus": {name: f"{w}x{h} {fmt}" + (f" x{n}" if n > 1 else "")
+                       for name, (w, h, fmt, n) in CORPUS.items()},
+        },
+        "scenarios": {},
+    }
+    print(f"screen {results['meta']['screen']}, {len(CORPUS)} files x {args.passes} passes")
+    print(f"{'scenario':<26} {'swap p50':>9} {'swap p95':>9} {'ms/slide':>9} {'CPU ms':>9} "
+          f"{'RSS MB':>8} {'slide MB':>9} {'hit rate':>9}")
+    for name in names:
+        r = run_scenario(name, SCENARIOS[name], corpus, args.screen, args.passes)
+        results["scenarios"][name] = dict(r, settings=dict(zip(SETTINGS, SCENARIOS[name])))
+        slide_peak = r["slide_peak_mb"]["mean"] if r["slide_peak_mb"] else float("nan")
+        print(f"{name:<26} {r['swap_ms']['p50']:9.1f} {r['swap_ms']['p95']:9.1f} "
+              f"{r['ms_per_slide']['mean']:9.1f} {r['cpu_ms_per_slide']['mean']:9.1f} "
+              f"{r['peak_rss_mb']:8.1f} {slide_peak:9.1f} "
+              f"{(r['cache_hit_rate'] or 0) * 100:8.0f}%")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--no-precompose", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--screen", type=parse_size, default=(1920, 1080))
+    parser.add_argument("--passes", type=int, default=3, help="times through the corpus")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--corpus", help="folder for the generated corpus (kept between runs)")
+    parser.add_argument("--out", default="bench_render.json")
+    parser.add_argument("--baseline", help="earlier --out file to compare against")
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        worker(args.worker, not args.no_precompose)
+        return
+
+    names = [n for n in args.scenarios.split(",") if n]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+    corpus = args.corpus or tempfile.mkdtemp(prefix="echoview-bench-corpus-")
+    os.makedirs(corpus, exist_ok=True)
+    build_corpus(corpus)
+    try:
+        results = run_all(args, names, corpus)
+    finally:
+        if not args.corpus:
+            shutil.rmtree(corpus, ignore_errors=True)
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Swap latency benchmark: slides drawn on the timer tick vs. precomposed.
+
+Drives a real ``DisplayWindow`` on Qt's offscreen platform over a folder of
+generated photos and prints, per slide, the time from ``next_image`` being
+called to the new pixmaps being set (``last_swap_ms``).  Each slide waits
+for the decode pool to go idle first, as it would during a normal slideshow
+interval, so the "precomposed" run measures only the swap.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_swap_latency.py \\
+        [--slides N] [--size WxH] [--blur R]
+
+The window covers the offscreen screen (QT_QPA_OFFSCREEN settings or 800x800).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def make_images(folder, count, size):
+    from PySide6.QtGui import QColor, QImage, QPainter
+
+    w, h = size
+    for i in range(count):
+        img = QImage(w, h, QImage.Format_RGB32)
+        img.fill(QColor.fromHsv((i * 47) % 360, 180, 220))
+        painter = QPainter(img)
+        for j in range(40):
+            painter.fillRect((j * 97) % w, (j * 61) % h, w // 10, h // 10,
+                             QColor.fromHsv((i * 47 + j * 13) % 360, 255, 160))
+        painter.end()
+        img.save(os.path.join(folder, f"photo{i:03}.jpg"), "JPG", 90)
+
+
+def run(app, slides, precompose):
+    """Return the swap latency of *slides* slides and how many were precomposed."""
+    from echoview import viewer
+    from echoview.decode_pool import get_decode_pool
+
+    original = viewer.DisplayWindow._precompose_next
+    if not precompose:
+        viewer.DisplayWindow._precompose_next = lambda self: None
+    try:
+        # The constructor already shows the first slide.
+        window = viewer.DisplayWindow("Bench", {"mode": "random_image"})
+        window.show()
+        app.processEvents()
+        window.setup_layout()
+        window.swap_precomposed = 0
+        times = []
+        for _ in range(slides):
+            deadline = time.time() + 60
+            while get_decode_pool()._inflight and time.time() < deadline:
+                time.sleep(0.005)
+            window.next_image()
+            app.processEvents()
+            times.append(window.last_swap_ms)
+    finally:
+        viewer.DisplayWindow._precompose_next = original
+    window.close()
+    return times, window.swap_precomposed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, default=20)
+    parser.add_argument("--size", type=parse_size, default=(4000, 3000))
+    parser.add_argument("--blur", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    home = tempfile.mkdtemp(prefix="echoview-bench-")
+    images = os.path.join(home, "images")
+    os.makedirs(images)
+    os.environ.update(
+        VIEWER_HOME=home, IMAGE_DIR=images,
+        MEDIA_INDEX_PATH=os.path.join(home, "media_index.db"),
+        PLAYLIST_STATE_PATH=os.path.join(home, "playlist_state.json"),
+    )
+    with open(os.path.join(home, "viewerconfig.json"), "w") as f:
+        json.dump({
+            "displays": {"Bench": {"mode": "random_image", "image_category": "",
+                                   "image_interval": 3600, "shuffle_mode": False}},
+            "gui": {"background_blur_radius": args.blur, "background_scale_percent": 100},
+            "overlay": {},
+            "preload_count": 1,
+        }, f)
+
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication([])
+    screen = app.primaryScreen().size()
+    print(f"screen {screen.width()}x{screen.height()}, photos {args.size[0]}x{args.size[1]}, "
+          f"blur radius {args.blur}")
+    make_images(images, min(args.slides + 1, 30), args.size)
+
+    results = {}
+    for label, precompose in (("on tick", False), ("precomposed", True)):
+        times, hits = run(app, args.slides, precompose)
+        results[label] = times
+        print(f"{label}: {hits}/{len(times)} slides precomposed")
+    print(f"{'slide':>5} {'on tick ms':>11} {'precomposed ms':>15}")
+    for i, (a, b) in enumerate(zip(results["on tick"], results["precomposed"]), 1):
+        print(f"{i:>5} {a:11.1f} {b:15.1f}")
+    for label, times in results.items():
+        print(f"{label:<12} median {statistics.median(times):7.1f} ms, max {max(times):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of finished background frames.
+
+The blurred background of a slide only depends on the file, the screen size
+and the two background settings, yet a looping folder rebuilt it on every
+pass, in every window.  Finished backgrounds are now written to
+BACKGROUND_CACHE_DIR as JPEGs named after a hash of
+(path, mtime, screen size, blur radius, background_scale_percent), so after
+the first pass a background costs a small JPEG decode instead of a scale and
+blur.  Editing or replacing a file changes its mtime and with it the key.
+
+The directory is bounded by ``background_cache_mb``: files are evicted least
+recently used first, with the file mtime as the use time so the order
+survives restarts.  One cache object is shared by every window.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from PySide6.QtGui import QImage
+
+from echoview.config import BACKGROUND_CACHE_DIR
+from echoview.image_cache import MB
+from echoview.utils import log_message
+
+DEFAULT_BACKGROUND_CACHE_MB = 256
+# Blurred images hide JPEG artefacts well; this keeps a 1080p frame ~100 KB.
+JPEG_QUALITY = 90
+# Bump when the way backgrounds are built changes, so old files are not reused.
+FORMAT_VERSION = 1
+
+
+def background_key(path, width, height, blur_radius, scale_percent) -> Optional[str]:
+    """
+    Return the cache key for the background of *path* at (width, height), or
+    None when there is nothing worth caching: unblurred backgrounds are cheap
+    to rebuild, and files that cannot be stat'ed have no reliable key.
+    """
+    if not path or blur_radius <= 0 or width < 1 or height < 1:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    raw = repr((FORMAT_VERSION, os.path.abspath(path), mtime, width, height,
+                blur_radius, scale_percent))
+    return hashlib.sha1(raw.encode("utf-8", "surrogateescape")).hexdigest()
+
+
+class BackgroundCache:
+    """Directory of background JPEGs with an LRU size budget; thread-safe."""
+
+    def __init__(self, directory: Optional[str] = None,
+                 budget_bytes: int = DEFAULT_BACKGROUND_CACHE_MB * MB):
+        self.directory = directory or BACKGROUND_CACHE_DIR
+        self.budget_bytes = budget_bytes
+        self.total_bytes = 0
+        self._files: "OrderedDict[str, int] | None" = None
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".jpg")
+
+    def _index(self) -> "OrderedDict[str, int]":
+        """Files on disk, least recently used first (caller holds the lock)."""
+        if self._files is None:
+            entries = []
+            try:
+                with os.scandir(self.directory) as it:
+                    for entry in it:
+                        if entry.name.endswith(".jpg") and entry.is_file():
+                            st = entry.stat()
+                            entries.append((st.st_mtime, entry.name[:-4], st.st_size))
+            except OSError:
+                pass
+            entries.sort()
+            self._files = OrderedDict((key, size) for _, key, size in entries)
+            self.total_bytes = sum(self._files.values())
+        return self._files
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._index()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index())
+
+    def get(self, key: str) -> Optional[QImage]:
+        """Return the cached background for *key*, or None."""
+        with self._lock:
+            files = self._index()
+            if key not in files:
+                return None
+            files.move_to_end(key)
+        path = self._file(key)
+        image = QImage(path)
+        if image.isNull():
+            self._drop(key)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return image
+
+    def put(self, key: str, image: QImage) -> bool:
+        """Store *image* under *key*; returns False if it could not be written."""
+        path = self._file(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if not image.save(tmp, "JPG", JPEG_QUALITY):
+                raise OSError("could not encode image")
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            log_message(f"Could not cache background {key}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+        with self._lock:
+            files = self._index()
+            self.total_bytes += size - files.pop(key, 0)
+            files[key] = size
+            self._trim()
+        return True
+
+    def configure(self, budget_bytes: int) -> None:
+        """Change the budget and evict whatever no longer fits."""
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._index()
+            self._trim()
+
+    def _drop(self, key: str) -> None:
+        """Forget an unreadable file and delete it."""
+        with self._lock:
+            size = self._index().pop(key, None)
+            if size is not None:
+                self.total_bytes -= size
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def _trim(self) -> None:
+        files = self._files
+        while files and self.total_bytes > self.budget_bytes:
+            key, size = files.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._file(key))
+            except OSError:
+                pass
+
+
+_cache: Optional[BackgroundCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_background_cache() -> BackgroundCache:
+    """Return the process-wide cache shared by every window."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = BackgroundCache()
+        return _cache
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Background blur without QGraphicsScene.
+
+The blurred background used to be rendered through a throwaway
+QGraphicsScene with a QGraphicsBlurEffect for every slide, which was the
+most expensive step of a slide change on a Pi and tied the blur to the GUI
+thread.  ``blur_image`` works on the QImage buffer with NumPy instead, so it
+can run on a decode worker:
+
+* three box blurs approximate a Gaussian; each box pass is separable and
+  done with a running sum (``cumsum``), or for narrow boxes by adding a few
+  shifted copies, so its cost does not grow with the radius;
+* a blurred image has no fine detail left, so large radii are blurred on a
+  shrunk copy that is scaled back up afterwards;
+* edges are extended rather than faded into transparency.
+
+``radius`` is the ``background_blur_radius`` setting, scaled so the result
+looks like QGraphicsBlurEffect's (see benchmarks/bench_blur.py).  Without
+NumPy the shrink-and-upscale step alone is used.
+"""
+
+from __future__ import annotations
+
+import math
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is in requirements.txt
+    np = None
+
+# Gaussian sigma (in pixels) per unit of blur radius.
+SIGMA_PER_RADIUS = 0.6
+# Box passes; three are within a few percent of a true Gaussian.
+BOX_PASSES = 3
+# Shrink the image until sigma is about this many (shrunk) pixels.
+MIN_SIGMA = 1.5
+# Box widths up to this are summed from shifted copies instead of cumsum.
+SHIFT_SUM_WIDTH = 7
+
+
+def box_sizes(sigma: float, passes: int = BOX_PASSES):
+    """Odd box widths whose repeated application has standard deviation ~*sigma*."""
+    # n boxes of width w have variance n * (w*w - 1) / 12.
+    ideal = math.sqrt(12.0 * sigma * sigma / passes + 1.0)
+    lower = int(ideal)
+    if lower % 2 == 0:
+        lower -= 1
+    lower = max(1, lower)
+    upper = lower + 2
+    # Use a mix of the two nearest odd widths to hit the variance.
+    m = round((12.0 * sigma * sigma - passes * lower * lower - 4 * passes * lower - 3 * passes)
+              / (-4 * lower - 4))
+    m = min(passes, max(0, m))
+    return [lower] * m + [upper] * (passes - m)
+
+
+def _box_pass(a, width: int, axis: int):
+    """Mean over a window of *width* along *axis*, extending the edges."""
+    r = width // 2
+    if r <= 0:
+        return a
+    if width <= SHIFT_SUM_WIDTH:
+        # Narrow windows: adding shifted copies beats a running sum.
+        out = a.copy()
+        src, dst = np.moveaxis(a, axis, 0), np.moveaxis(out, axis, 0)
+        for k in range(1, r + 1):
+            dst[k:] += src[:-k]
+            dst[:k] += src[:1]
+            dst[:-k] += src[k:]
+            dst[-k:] += src[-1:]
+    else:
+        n = a.shape[axis]
+        pad = [(0, 0)] * a.ndim
+        pad[axis] = (r + 1, r)
+        sums = np.moveaxis(np.cumsum(np.pad(a, pad, mode="edge"), axis=axis, dtype=np.float32), axis, 0)
+        out = np.moveaxis(sums[width:width + n] - sums[:n], 0, axis)
+    out *= 1.0 / width
+    return out
+
+
+def box_blur(pixels, sigma: float):
+    """Blur an (h, w, channels) array; returns float32."""
+    a = pixels.astype(np.float32)
+    for width in box_sizes(sigma):
+        a = _box_pass(a, width, 1)
+        a = _box_pass(a, width, 0)
+    return a
+
+
+def _shrink(image: QImage, factor: float) -> QImage:
+    w, h = image.width(), image.height()
+    return image.scaled(max(1, round(w / factor)), max(1, round(h / factor)),
+                        Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+
+def blur_image(image: QImage, radius: float) -> QImage:
+    """
+    Return a blurred copy of *image*.  Only touches QImage, so it is safe
+    on any thread.
+    """
+    if radius <= 0 or image.isNull():
+        return image
+    w, h = image.width(), image.height()
+    sigma = radius * SIGMA_PER_RADIUS
+    factor = max(1.0, sigma / MIN_SIGMA)
+    if np is None:
+        factor = max(1.0, radius / 2.0)
+        return _shrink(image, factor).scaled(w, h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    work = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    if factor > 1.0:
+        work = _shrink(work, factor)
+    sw, sh = work.width(), work.height()
+    stride = work.bytesPerLine()
+    rows = np.frombuffer(work.constBits(), dtype=np.uint8, count=stride * sh).reshape(sh, stride)
+    blurred = box_blur(rows[:, :sw * 4].reshape(sh, sw, 4), sigma * sw / w)
+    out = np.ascontiguousarray(np.clip(blurred + 0.5, 0, 255).astype(np.uint8))
+    result = QImage(out.data, sw, sh, sw * 4, QImage.Format_ARGB32_Premultiplied).copy()
+    if (sw, sh) != (w, h):
+        result = result.scaled(w, h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    return result
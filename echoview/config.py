@@ -39,6 +39,40 @@ CONFIG_PATH = os.path.join(VIEWER_HOME, "viewerconfig.json")
 LOG_PATH    = os.path.join(VIEWER_HOME, "viewer.log")
 WEB_BG      = os.path.join(VIEWER_HOME, "web_bg.jpg")
 
+# SQLite index of the files under IMAGE_DIR, shared by the viewer and the
+# web controller so neither has to list the share on every request.
+MEDIA_INDEX_PATH = os.environ.get(
+    "MEDIA_INDEX_PATH",
+    os.path.join(VIEWER_HOME, "media_index.db"),
+)
+
+# Where each display's shuffle seed and position are kept so a restart
+# (every settings change restarts the service) resumes the slideshow.
+PLAYLIST_STATE_PATH = os.environ.get(
+    "PLAYLIST_STATE_PATH",
+    os.path.join(VIEWER_HOME, "playlist_state.json"),
+)
+
+# Finished (scaled and blurred) slide backgrounds, shared by all displays.
+BACKGROUND_CACHE_DIR = os.environ.get(
+    "BACKGROUND_CACHE_DIR",
+    os.path.join(VIEWER_HOME, "background_cache"),
+)
+
+# Display-sized copies of the images, written at upload time.  The leading
+# underscore keeps the folder out of playlists and the file manager.
+RENDITION_DIR = os.environ.get(
+    "RENDITION_DIR",
+    os.path.join(IMAGE_DIR, "_renditions"),
+)
+
+# Per-display render stage timings, published by the viewer for the web
+# controller's /api/render_stats (see render_stats).
+RENDER_STATS_PATH = os.environ.get(
+    "RENDER_STATS_PATH",
+    os.path.join(VIEWER_HOME, "render_stats.json"),
+)
+
 
 # Location for the Spotify OAuth token cache. Set SPOTIFY_CACHE_PATH in your
 # environment to override. When unset, EchoView uses a file named
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared image decode pool.
+
+Prefetching used to start a new thread per upcoming image on every slide,
+so a slow decode could be started a second time by the next timer tick and
+a high ``preload_count`` piled up threads.  All windows now queue decodes on
+one small pool, and a decode that is already queued or running for a key is
+shared: later requests get the same future instead of decoding again.
+
+Callers that stop caring about a prefetch (the playlist changed) release it
+with ``cancel``; once nobody holds it any more a decode that has not started
+is dropped from the queue.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Decoding is CPU and memory heavy; leave cores for the UI threads.
+DECODE_WORKERS = max(1, min(2, (os.cpu_count() or 1) - 1))
+
+
+class _Job:
+    __slots__ = ("future", "refs")
+
+    def __init__(self, future: Future):
+        self.future = future
+        self.refs = 1
+
+
+class DecodePool:
+    """Bounded worker pool with one in-flight future per key."""
+
+    def __init__(self, workers: int = DECODE_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Re-entrant: Future.cancel() runs done-callbacks synchronously.
+        self._lock = threading.RLock()
+        self._inflight: Dict[Hashable, _Job] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="decode"
+            )
+        return self._executor
+
+    def _finished(self, key, future: Future) -> None:
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None and job.future is future:
+                del self._inflight[key]
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._inflight
+
+    def prefetch(self, key, loader: Callable[[], Any]) -> Future:
+        """
+        Queue ``loader()`` unless *key* is already queued or running; either
+        way return the shared future.  Each call holds one reference that is
+        given back with ``cancel``.
+        """
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None:
+                job.refs += 1
+                return job.future
+            future = self._get_executor().submit(loader)
+            self._inflight[key] = _Job(future)
+        future.add_done_callback(lambda f, k=key: self._finished(k, f))
+        return future
+
+    def load(self, key, loader: Callable[[], Any]):
+        """
+        Return ``loader()``'s result on the calling thread.  A decode of *key*
+        that is already running is joined instead of repeated; one that is
+        still queued is taken over, so the caller never waits behind
+        unrelated prefetches.
+        """
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None and not job.future.cancel():
+                future, own = job.future, False
+            else:
+                future, own = Future(), True
+                future.set_running_or_notify_cancel()
+                self._inflight[key] = _Job(future)
+        if not own:
+            return future.result()
+        try:
+            result = loader()
+        except BaseException as exc:
+            future.set_exception(exc)
+            self._finished(key, future)
+            raise
+        future.set_result(result)
+        self._finished(key, future)
+        return result
+
+    def cancel(self, key) -> None:
+        """Give back one ``prefetch`` reference; unstarted work with none left is dropped."""
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is None:
+                return
+            job.refs -= 1
+            if job.refs <= 0:
+                job.future.cancel()
+
+
+_pool: Optional[DecodePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_decode_pool() -> DecodePool:
+    """Return the process-wide pool shared by every window."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DecodePool()
+        return _pool
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Off-thread composition of slideshow frames.
+
+Showing a slide used to scale and rotate the foreground and build the
+blurred background on the UI thread when the slideshow timer fired, so the
+visible swap was late by the whole composition.  These helpers do the same
+work with QImage only (QPixmap is tied to the GUI thread), which lets a
+decode worker compose the next frame ahead of time; the timer tick is then
+left with turning two images into pixmaps.  The foreground label centres its
+pixmap, so the foreground stays at its own size rather than being painted
+into a window-sized transparent frame.
+
+The geometry mirrors ``DisplayWindow.updateForegroundScaled`` and
+``make_background_cover``; ``echoview.gif_frames`` uses the same steps for
+animated GIFs.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QTransform
+
+from echoview.blur import blur_image
+
+
+def fill_size(iw: int, ih: int, fw: int, fh: int) -> Tuple[int, int]:
+    """Largest (w, h) with the image's aspect ratio that fits in (fw, fh)."""
+    if iw <= 0 or ih <= 0 or fw <= 0 or fh <= 0:
+        return (fw, fh)
+    if iw / ih > fw / fh:
+        w, h = fw, int(fw / (iw / ih))
+    else:
+        w, h = int(fh * (iw / ih)), fh
+    return (max(1, w), max(1, h))
+
+
+def scale_foreground(image: QImage, bw: int, bh: int, scale_percent: int = 100,
+                     rotate: int = 0) -> QImage:
+    """Scale *image* into (bw, bh), degrade it to *scale_percent* and rotate it."""
+    scaled = image.scaled(bw, bh, Qt.KeepAspectRatio, Qt.FastTransformation)
+    if scale_percent < 100:
+        down_w = int(bw * scale_percent / 100.0)
+        down_h = int(bh * scale_percent / 100.0)
+        if down_w >= 1 and down_h >= 1:
+            smaller = scaled.scaled(down_w, down_h, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+            scaled = smaller.scaled(bw, bh, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+    if rotate:
+        transform = QTransform()
+        transform.rotate(rotate)
+        scaled = scaled.transformed(transform, Qt.SmoothTransformation)
+    return scaled
+
+
+def compose_foreground(image: QImage, fw: int, fh: int, scale_percent: int = 100,
+                       rotate: int = 0) -> Optional[QImage]:
+    """
+    The foreground of *image* for an (fw, fh) label: fitted, degraded and
+    rotated.  None when either size is empty.
+    """
+    iw, ih = image.width(), image.height()
+    if fw < 1 or fh < 1 or iw < 1 or ih < 1:
+        return None
+    return scale_foreground(image, *fill_size(iw, ih, fw, fh), scale_percent, rotate)
+
+
+def compose_background(image: QImage, sw: int, sh: int, scale_percent: int = 100,
+                       blur_radius: int = 0) -> Optional[QImage]:
+    """Scale *image* to cover (sw, sh), crop the centre and blur it."""
+    pw, ph = image.width(), image.height()
+    if sw < 1 or sh < 1 or pw < 1 or ph < 1:
+        return None
+    img_ratio = pw / ph
+    if img_ratio > sw / sh:
+        new_w, new_h = int(sh * img_ratio), sh
+    else:
+        new_w, new_h = sw, int(sw / img_ratio)
+    scaled = image.scaled(new_w, new_h, Qt.KeepAspectRatio, Qt.FastTransformation)
+    xoff = (scaled.width() - sw) // 2
+    yoff = (scaled.height() - sh) // 2
+    cover = scaled.copy(xoff, yoff, sw, sh)
+    if scale_percent < 100:
+        down_w = int(sw * scale_percent / 100.0)
+        down_h = int(sh * scale_percent / 100.0)
+        if down_w > 0 and down_h > 0:
+            small = cover.scaled(down_w, down_h, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+            small = blur_image(small, blur_radius)
+            return small.scaled(sw, sh, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+    return blur_image(cover, blur_radius)
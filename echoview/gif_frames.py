@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pre-scaled frames for animated GIFs.
+
+With ``foreground_scale_percent`` below 100 a GIF cannot be handed to
+QLabel.setMovie: every frame has to be scaled down, up again and rotated
+before it is shown.  QMovie's frameChanged handler did that on the UI thread
+for every frame (a pixmap conversion, three scales, a smooth rotation and a
+full-screen composite), so a 30 fps GIF kept a core busy.
+``prepare_gif_frames`` does the work once per GIF on a decode worker and
+returns the finished frames with the delays the file asks for; the viewer
+then only swaps pixmaps on a timer.
+
+Frames are kept as ARGB32_Premultiplied, which QPixmap takes without a
+conversion.  A GIF whose frames do not fit in *budget_bytes* is not
+prepared and keeps the per-frame path.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from PySide6.QtGui import QImage, QImageReader
+
+from echoview.frame_compose import fill_size, scale_foreground
+from echoview.image_cache import MB
+
+# Per GIF; a 1080p frame is ~8 MB, so this holds a few seconds of animation.
+MAX_GIF_FRAMES_MB = 64
+# GIFs with a 0 ms delay are meant to play "as fast as possible"; do not
+# let them spin the UI thread.
+MIN_FRAME_DELAY_MS = 20
+
+
+def prepare_gif_frames(path: str, fw: int, fh: int, scale_percent: int = 100,
+                       rotate: int = 0,
+                       budget_bytes: int = MAX_GIF_FRAMES_MB * MB) -> Optional[dict]:
+    """
+    Decode every frame of *path*, fit it into (fw, fh) and degrade/rotate it
+    as ``compose_foreground`` would.
+
+    Returns ``{"frames": [(QImage, delay_ms), ...], "loop_count": n,
+    "bytes": total}`` (``loop_count`` as QImageReader reports it: -1 loops
+    forever), or None when the file has no frames or they exceed
+    *budget_bytes*.  Only touches QImage, so it is safe on any thread.
+    """
+    if fw < 1 or fh < 1:
+        return None
+    reader = QImageReader(path)
+    reader.setAutoDetectImageFormat(True)
+    frames = []
+    total = 0
+    bounds = None
+    while True:
+        image = reader.read()
+        if image.isNull():
+            break
+        delay = reader.nextImageDelay()
+        if bounds is None:
+            bounds = fill_size(image.width(), image.height(), fw, fh)
+        frame = scale_foreground(image, bounds[0], bounds[1], scale_percent, rotate)
+        frame = frame.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        total += frame.sizeInBytes()
+        if total > budget_bytes:
+            return None
+        frames.append((frame, max(MIN_FRAME_DELAY_MS, delay)))
+    if not frames:
+        return None
+    return {"frames": frames, "loop_count": reader.loopCount(), "bytes": total}
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Decoded-image cache bounded by memory, not just by entry count.
+
+Counting entries treats a 200 KB thumbnail and an 8K panorama the same, so
+a handful of large images could push the viewer into the OOM killer while
+small ones wasted the allowance.  ``ImageCache`` charges every entry with
+its decoded size (``QImage.sizeInBytes()``) and evicts least recently used
+entries until the total fits the byte budget.  An entry larger than the
+whole budget is never admitted.  The old ``cache_capacity`` entry limit
+still applies on top.
+
+The viewer keeps one cache for all windows (see ``EchoViewGUI``), keyed by
+(path, decode bounds) so windows of the same resolution share decodes.
+Lookups can name an *owner*; hits and misses are counted per owner.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+MB = 1024 * 1024
+# Per window; a Pi 4 with 1 GB and two displays still has headroom.
+DEFAULT_CACHE_BUDGET_MB = 128
+
+
+class ImageCache:
+    """Thread-safe LRU mapping with a byte budget and an entry cap."""
+
+    def __init__(self, budget_bytes: int = DEFAULT_CACHE_BUDGET_MB * MB,
+                 capacity: Optional[int] = None):
+        self.budget_bytes = budget_bytes
+        self.capacity = capacity
+        self.total_bytes = 0
+        self._entries: "OrderedDict[Hashable, tuple[Any, int]]" = OrderedDict()
+        self._counts: Dict[Hashable, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def get(self, key, default=None, owner=None):
+        """
+        Return the cached value and mark it most recently used.  With an
+        *owner* the lookup is counted as a hit or miss for it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if owner is not None:
+                counts = self._counts.setdefault(owner, [0, 0])
+                counts[entry is None] += 1
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def counts(self, owner) -> Tuple[int, int]:
+        """(hits, misses) of the lookups made for *owner*."""
+        with self._lock:
+            hits, misses = self._counts.get(owner, (0, 0))
+            return hits, misses
+
+    def put(self, key, value, nbytes: int) -> bool:
+        """Cache *value*; returns False when it alone exceeds the budget."""
+        with self._lock:
+            self._discard(key)
+            if nbytes > self.budget_bytes:
+                return False
+            self._entries[key] = (value, nbytes)
+            self.total_bytes += nbytes
+            self._trim()
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._discard(key)
+        return default if entry is None else entry[0]
+
+    def discard_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches *predicate*; returns how many."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._discard(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def configure(self, budget_bytes: int, capacity: Optional[int] = None) -> None:
+        """Change the limits and evict whatever no longer fits."""
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self.capacity = capacity
+            self._trim()
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+        return entry
+
+    def _trim(self) -> None:
+        while self._entries and (
+            self.total_bytes > self.budget_bytes
+            or (self.capacity is not None and len(self._entries) > self.capacity)
+        ):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.total_bytes -= nbytes
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Screen-sized decoding of images of any size.
+
+Slides are decoded no larger than needed to cover the window
+(``read_scaled_image``).  For ordinary photos the reader's scaled read is
+enough: the JPEG decoder drops resolution while decoding (DCT scaling, down
+to 1/8), so a 24 MP photo never exists at full size in memory.  Very large
+images need more care:
+
+* a cover-scaled panorama is as long as the panorama: 30000x4000 scaled to
+  cover 1920x1080 is still 8100x1080, so the target is capped at
+  ``TARGET_SCREENS`` screens' worth of pixels;
+* even with DCT scaling, one read of a huge JPEG holds 1/64 of the source
+  at best, so a JPEG whose scaled read would exceed ``DECODE_BUDGET_PIXELS``
+  is read in horizontal stripes (clip rect plus scaled size) that are
+  painted into the target one at a time;
+* formats whose reader cannot clip (PNG) are decoded whole, so they are
+  refused above ``MAX_FULL_DECODE_PIXELS`` instead of allocating hundreds
+  of MB.
+
+Image dimensions come from the file header before anything is decoded, so
+peak memory is bounded whatever the size of the source: a JPEG costs the
+target plus one budget-sized stripe, anything else at most
+MAX_FULL_DECODE_PIXELS.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Tuple
+
+from PySide6.QtCore import QRect, QSize
+from PySide6.QtGui import QImage, QImageIOHandler, QImageReader, QPainter, QTransform
+
+from echoview.utils import log_message
+
+# Most decoded pixels one read may hold (32 MB at 32 bits per pixel).
+DECODE_BUDGET_PIXELS = 8_000_000
+# Formats that can only be decoded whole are refused above this; Qt itself
+# rejects anything over its 256 MB allocation limit.
+MAX_FULL_DECODE_PIXELS = 48_000_000
+# A decoded image never holds more than this many screens' worth of pixels.
+TARGET_SCREENS = 4
+# Target cap while the window has no size yet.
+MAX_TARGET_PIXELS = 8_000_000
+# JPEG DCT scaling factors libjpeg can decode at.
+DCT_SCALES = (8, 4, 2, 1)
+# Stripe heights are kept to whole JPEG blocks (16 rows with 4:2:0 chroma).
+STRIPE_ALIGN = 16
+
+
+def decode_bounds(width: int, height: int, rotate: int = 0) -> Tuple[int, int]:
+    """Size images are decoded for in a (width, height) window."""
+    if rotate % 180:
+        # Rotated by 90/270: either side of the image may end up on
+        # either screen axis.
+        width = height = max(width, height)
+    return (width, height)
+
+
+def target_size(iw: int, ih: int, bounds: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    Size to decode an (iw, ih) image at: just enough to cover *bounds*,
+    never upscaled, and capped at TARGET_SCREENS screens of pixels.
+    """
+    bw, bh = bounds
+    if bw > 0 and bh > 0:
+        scale = min(1.0, max(bw / iw, bh / ih))
+        cap = TARGET_SCREENS * bw * bh
+    else:
+        scale = 1.0
+        cap = MAX_TARGET_PIXELS
+    if iw * ih * scale * scale > cap:
+        scale = math.sqrt(cap / (iw * ih))
+        return (max(1, int(iw * scale)), max(1, int(ih * scale)))
+    return (max(1, round(iw * scale)), max(1, round(ih * scale)))
+
+
+def dct_scale(iw: int, ih: int, tw: int, th: int) -> int:
+    """Largest JPEG DCT reduction that still leaves at least (tw, th)."""
+    for d in DCT_SCALES:
+        if iw // d >= tw and ih // d >= th:
+            return d
+    return 1
+
+
+def read_scaled_image(path, bounds):
+    """
+    Decode *path* no larger than needed to cover *bounds* (w, h).
+
+    The blurred background fills the whole window, so the image is scaled to
+    cover rather than fit.  setScaledSize lets the JPEG decoder use DCT
+    scaling, so a 24 MP photo is never decoded at full size for a 1080p
+    screen; other formats are scaled by the reader right after decoding.
+    Images already smaller than *bounds* are decoded as they are.  Returns
+    a null QImage for images that cannot be decoded within the budget.
+    """
+    reader = QImageReader(path)
+    reader.setAutoDetectImageFormat(True)
+    size = reader.size()
+    if not size.isValid() or size.width() <= 0 or size.height() <= 0:
+        # No size in the header; nothing to plan with.
+        return reader.read()
+    iw, ih = size.width(), size.height()
+    if reader.autoTransform():
+        # size() is before EXIF rotation; cover both orientations.
+        bounds = (max(bounds),) * 2
+    tw, th = target_size(iw, ih, bounds)
+    if reader.supportsOption(QImageIOHandler.ClipRect):
+        d = dct_scale(iw, ih, tw, th)
+        if (iw // d) * (ih // d) > DECODE_BUDGET_PIXELS:
+            return read_in_stripes(path, reader, (iw, ih), (tw, th), d)
+    elif iw * ih > MAX_FULL_DECODE_PIXELS:
+        log_message(f"Not decoding {path}: {iw}x{ih} is over "
+                    f"{MAX_FULL_DECODE_PIXELS // 1_000_000} MP and cannot be read in stripes")
+        return QImage()
+    if (tw, th) != (iw, ih):
+        reader.setScaledSize(QSize(tw, th))
+    return reader.read()
+
+
+def read_in_stripes(path, reader, source, target, d):
+    """
+    Decode *path* into a *target*-sized image one horizontal stripe at a
+    time, each stripe holding at most DECODE_BUDGET_PIXELS after the
+    1/*d* DCT reduction.
+    """
+    (iw, ih), (tw, th) = source, target
+    step = STRIPE_ALIGN * d
+    rows = max(step, DECODE_BUDGET_PIXELS * d * d // iw // step * step)
+    out = QImage(tw, th, QImage.Format_RGB32)
+    painter = QPainter(out)
+    y = 0
+    try:
+        while y < ih:
+            h = min(rows, ih - y)
+            top, bottom = round(y * th / ih), round((y + h) * th / ih)
+            if bottom > top:
+                stripe_reader = QImageReader(path)
+                stripe_reader.setAutoTransform(False)
+                stripe_reader.setClipRect(QRect(0, y, iw, h))
+                stripe_reader.setScaledSize(QSize(tw, bottom - top))
+                stripe = stripe_reader.read()
+                if stripe.isNull():
+                    log_message(f"Could not decode rows {y}-{y + h} of {path}: "
+                                f"{stripe_reader.errorString()}")
+                    return QImage()
+                painter.drawImage(0, top, stripe)
+            y += h
+    finally:
+        painter.end()
+    if reader.autoTransform():
+        out = _oriented(out, reader.transformation())
+    return out
+
+
+def _oriented(image, transformation):
+    """Apply an EXIF orientation the way QImageReader's autoTransform does."""
+    if transformation == QImageIOHandler.TransformationNone:
+        return image
+    transform = QTransform()
+    if transformation == QImageIOHandler.TransformationRotate270:
+        transform.rotate(270)
+    else:
+        # Mirror/flip first, then rotate (the last call applies first).
+        if transformation & QImageIOHandler.TransformationRotate90:
+            transform.rotate(90)
+        transform.scale(-1 if transformation & QImageIOHandler.TransformationMirror else 1,
+                        -1 if transformation & QImageIOHandler.TransformationFlip else 1)
+    return image.transformed(transform)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Header-only image dimension sniffing.
+
+Opening an image with Pillow just to read ``img.size`` pulls in the codec
+machinery and reads far more of the file than needed, which is noticeable on
+CIFS mounts.  The parsers here only look at the first few KB of the file
+(JPEG segments are skipped with seek(), not read) and understand JPEG,
+PNG, GIF, WebP and BMP.  Anything they cannot parse returns ``()`` so callers
+can fall back to Pillow.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import BinaryIO
+
+# Bytes read up-front; enough for every fixed-position header we parse.
+HEAD_SIZE = 64
+# Read-ahead used for the underlying file.  JPEG segments are skipped with
+# seek(), so most probes touch only one or two of these blocks.
+READ_BUFFER = 4096
+
+# JPEG Start-Of-Frame markers carry the frame dimensions.  C4 (DHT), C8 (JPG
+# extension) and CC (DAC) share the range but are not frames.
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+# Markers that stand alone without a length field.
+_JPEG_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7}
+# Give up on pathological files instead of walking them to the end.
+_JPEG_MAX_SEGMENTS = 256
+
+
+def _png_size(head: bytes) -> tuple[int, int] | tuple[()]:
+    # Signature (8) + IHDR length (4) + "IHDR" (4) + width (4) + height (4)
+    if len(head) >= 24 and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    return ()
+
+
+def _gif_size(head: bytes) -> tuple[int, int] | tuple[()]:
+    # Logical screen descriptor follows the 6-byte signature.
+    if len(head) >= 10:
+        return struct.unpack("<HH", head[6:10])
+    return ()
+
+
+def _webp_size(head: bytes) -> tuple[int, int] | tuple[()]:
+    if len(head) < 30:
+        return ()
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        # Lossy: 3-byte frame tag, 3-byte start code, then 14-bit dimensions.
+        if head[23:26] != b"\x9d\x01\x2a":
+            return ()
+        w, h = struct.unpack("<HH", head[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L":
+        # Lossless: signature byte 0x2f, then 14-bit width-1 and height-1.
+        if head[20] != 0x2F:
+            return ()
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        # Extended: 24-bit canvas width-1 and height-1 after the flags.
+        w = int.from_bytes(head[24:27], "little") + 1
+        h = int.from_bytes(head[27:30], "little") + 1
+        return w, h
+    return ()
+
+
+def _bmp_size(head: bytes) -> tuple[int, int] | tuple[()]:
+    if len(head) < 26:
+        return ()
+    header_size = struct.unpack("<I", head[14:18])[0]
+    if header_size == 12:
+        # OS/2 BITMAPCOREHEADER uses 16-bit dimensions.
+        return struct.unpack("<HH", head[18:22])
+    if header_size >= 40:
+        # BITMAPINFOHEADER and later; negative height means top-down rows.
+        w, h = struct.unpack("<ii", head[18:26])
+        return abs(w), abs(h)
+    return ()
+
+
+def _jpeg_size(f: BinaryIO) -> tuple[int, int] | tuple[()]:
+    """Walk JPEG segments from just after SOI until a SOF marker."""
+    f.seek(2)
+    for _ in range(_JPEG_MAX_SEGMENTS):
+        byte = f.read(1)
+        if not byte:
+            return ()
+        if byte != b"\xff":
+            # Not at a marker boundary; the file is damaged.
+            return ()
+        marker = f.read(1)
+        # Any number of 0xFF fill bytes may precede a marker.
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            return ()
+        code = marker[0]
+        if code in _JPEG_STANDALONE:
+            continue
+        if code in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header.
+            return ()
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return ()
+        length = struct.unpack(">H", length_bytes)[0]
+        if length < 2:
+            return ()
+        if code in _JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return ()
+            h, w = struct.unpack(">HH", frame[1:5])
+            return w, h
+        f.seek(length - 2, 1)
+    return ()
+
+
+def read_image_size(path) -> tuple[int, int] | tuple[()]:
+    """
+    Return (width, height) parsed from the file header, or () when the
+    format is unsupported or the header is damaged.
+    """
+    try:
+        with open(path, "rb", buffering=READ_BUFFER) as f:
+            head = f.read(HEAD_SIZE)
+            if head.startswith(b"\xff\xd8"):
+                size = _jpeg_size(f)
+            elif head.startswith(b"\x89PNG\r\n\x1a\n"):
+                size = _png_size(head)
+            elif head[:6] in (b"GIF87a", b"GIF89a"):
+                size = _gif_size(head)
+            elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                size = _webp_size(head)
+            elif head[:2] == b"BM":
+                size = _bmp_size(head)
+            else:
+                size = ()
+    except (OSError, struct.error):
+        return ()
+    if size and size[0] > 0 and size[1] > 0:
+        return size
+    return ()
@@ -0,0 +1,927 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent index of the media files below IMAGE_DIR.
+
+The viewer and the web controller used to call ``os.listdir`` on the image
+share for every playlist rebuild and page load.  On large CIFS mounts that
+costs seconds per call, so folder listings and per-file metadata are kept in
+a small SQLite database inside VIEWER_HOME that both processes share.  A
+folder is only rescanned when its directory mtime changes or when the cached
+listing is older than ``MAX_LISTING_AGE``; every other lookup is a single
+indexed query.  A rescan diffs the names in the directory against the index
+and only stat()s new files.  Files rewritten in place keep their name and
+the folder mtime, so ``restat_folder`` checks known files separately; the
+media watcher runs it in the background, never a lookup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import sqlite3
+import stat
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from echoview.config import IMAGE_DIR, MEDIA_INDEX_PATH
+from echoview.utils import (
+    aspect_label_for_size,
+    is_ignored_folder,
+    log_message,
+    media_dimensions,
+)
+from echoview.video_probe import VideoInfo, probe_videos
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+GIF_EXTENSIONS = (".gif",)
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+IMAGE_KINDS = ("image", "gif")
+VIDEO_KINDS = ("video",)
+
+# Maximum number of bound parameters per IN (...) lookup.
+_QUERY_CHUNK = 500
+
+# Re-list a folder at least this often even when its mtime did not change.
+# Some network filesystems only refresh directory mtimes lazily.
+MAX_LISTING_AGE = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path     TEXT PRIMARY KEY,
+    folder   TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    kind     TEXT NOT NULL,
+    size     INTEGER NOT NULL DEFAULT 0,
+    mtime    REAL NOT NULL DEFAULT 0,
+    width    INTEGER,
+    height   INTEGER,
+    aspect   TEXT,
+    duration REAL,
+    codec    TEXT
+);
+CREATE INDEX IF NOT EXISTS media_folder_name ON media(folder, name);
+CREATE INDEX IF NOT EXISTS media_folder_mtime ON media(folder, mtime, name);
+CREATE TABLE IF NOT EXISTS folders (
+    path       TEXT PRIMARY KEY,
+    mtime      REAL NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subdirs (
+    parent TEXT NOT NULL,
+    name   TEXT NOT NULL,
+    PRIMARY KEY (parent, name)
+);
+CREATE TABLE IF NOT EXISTS folder_stats (
+    folder       TEXT NOT NULL,
+    kind         TEXT NOT NULL,
+    files        INTEGER NOT NULL DEFAULT 0,
+    bytes        INTEGER NOT NULL DEFAULT 0,
+    newest_mtime REAL,
+    square       INTEGER NOT NULL DEFAULT 0,
+    landscape    INTEGER NOT NULL DEFAULT 0,
+    portrait     INTEGER NOT NULL DEFAULT 0,
+    unknown      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (folder, kind)
+);
+"""
+
+# folder_stats holds per-folder, per-kind aggregates.  The triggers keep it
+# in step with every insert/update/delete on media, so scans, uploads,
+# deletes and renames all maintain it without a recount.
+_STATS_ADD = """
+    -- Not INSERT OR IGNORE: the outer statement's conflict policy would
+    -- override it when the row change comes from an upsert.
+    INSERT INTO folder_stats (folder, kind)
+    SELECT {r}.folder, {r}.kind WHERE NOT EXISTS (
+        SELECT 1 FROM folder_stats WHERE folder = {r}.folder AND kind = {r}.kind
+    );
+    UPDATE folder_stats SET
+        files = files + 1,
+        bytes = bytes + {r}.size,
+        newest_mtime = MAX(COALESCE(newest_mtime, {r}.mtime), {r}.mtime),
+        square = square + ({r}.aspect IS 'square'),
+        landscape = landscape + ({r}.aspect IS 'landscape'),
+        portrait = portrait + ({r}.aspect IS 'portrait'),
+        unknown = unknown + ({r}.aspect IS 'unknown')
+    WHERE folder = {r}.folder AND kind = {r}.kind;
+"""
+_STATS_SUB = """
+    UPDATE folder_stats SET
+        files = files - 1,
+        bytes = bytes - {r}.size,
+        square = square - ({r}.aspect IS 'square'),
+        landscape = landscape - ({r}.aspect IS 'landscape'),
+        portrait = portrait - ({r}.aspect IS 'portrait'),
+        unknown = unknown - ({r}.aspect IS 'unknown')
+    WHERE folder = {r}.folder AND kind = {r}.kind;
+"""
+_NEWEST = """
+    UPDATE folder_stats SET newest_mtime = (
+        SELECT MAX(mtime) FROM media
+        WHERE media.folder = folder_stats.folder AND media.kind = folder_stats.kind
+    ) WHERE folder = {r}.folder AND kind = {r}.kind;
+    DELETE FROM folder_stats WHERE folder = {r}.folder AND kind = {r}.kind AND files <= 0;
+"""
+_STATS_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS media_stats_insert AFTER INSERT ON media BEGIN
+{_STATS_ADD.format(r="NEW")}
+END;
+CREATE TRIGGER IF NOT EXISTS media_stats_delete AFTER DELETE ON media BEGIN
+{_STATS_SUB.format(r="OLD")}
+{_NEWEST.format(r="OLD")}
+END;
+CREATE TRIGGER IF NOT EXISTS media_stats_update
+AFTER UPDATE OF folder, kind, size, mtime, aspect ON media BEGIN
+{_STATS_SUB.format(r="OLD")}
+{_STATS_ADD.format(r="NEW")}
+{_NEWEST.format(r="OLD")}
+{_NEWEST.format(r="NEW")}
+END;
+"""
+
+_STATS_REBUILD = """
+DELETE FROM folder_stats;
+INSERT INTO folder_stats
+SELECT folder, kind, COUNT(*), SUM(size), MAX(mtime),
+       SUM(aspect IS 'square'), SUM(aspect IS 'landscape'),
+       SUM(aspect IS 'portrait'), SUM(aspect IS 'unknown')
+FROM media GROUP BY folder, kind;
+"""
+
+ASPECT_BUCKETS = ("square", "landscape", "portrait", "unknown")
+
+# Columns added after the first release; created on open for older databases.
+_MIGRATIONS = (("codec", "TEXT"),)
+
+# Probed metadata (dimensions, aspect, duration, codec) survives a rescan as long as
+# the file's size and mtime are unchanged.
+_UPSERT = """
+INSERT INTO media (path, folder, name, kind, size, mtime)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(path) DO UPDATE SET
+    kind = excluded.kind,
+    width = CASE WHEN media.size = excluded.size AND media.mtime = excluded.mtime
+                 THEN media.width ELSE NULL END,
+    height = CASE WHEN media.size = excluded.size AND media.mtime = excluded.mtime
+                  THEN media.height ELSE NULL END,
+    aspect = CASE WHEN media.size = excluded.size AND media.mtime = excluded.mtime
+                  THEN media.aspect ELSE NULL END,
+    duration = CASE WHEN media.size = excluded.size AND media.mtime = excluded.mtime
+                    THEN media.duration ELSE NULL END,
+    codec = CASE WHEN media.size = excluded.size AND media.mtime = excluded.mtime
+                 THEN media.codec ELSE NULL END,
+    size = excluded.size,
+    mtime = excluded.mtime
+"""
+
+
+def media_kind(name: str) -> Optional[str]:
+    """Return "image", "gif", "video" or None for a file name."""
+    lower = name.lower()
+    if lower.endswith(IMAGE_EXTENSIONS):
+        return "image"
+    if lower.endswith(GIF_EXTENSIONS):
+        return "gif"
+    if lower.endswith(VIDEO_EXTENSIONS):
+        return "video"
+    return None
+
+
+def encode_cursor(entry: dict, order: str) -> str:
+    """Opaque page cursor pointing just after *entry*."""
+    key = [entry["mtime"], entry["name"]] if order == "mtime" else [entry["name"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str) -> list:
+    """Inverse of encode_cursor(); raises ValueError for malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"invalid cursor: {cursor!r}") from exc
+    if (not isinstance(key, list) or len(key) != (2 if order == "mtime" else 1)
+            or not isinstance(key[-1], str)
+            or (order == "mtime" and not isinstance(key[0], (int, float)))):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return key
+
+
+def _norm(path) -> str:
+    return os.path.normpath(os.fspath(path))
+
+
+def _subtree_clause(column: str) -> str:
+    # substr() instead of LIKE so folder names containing % or _ match literally.
+    return f"({column} = ? OR substr({column}, 1, length(?) + 1) = ? || '/')"
+
+
+class MediaIndex:
+    """SQLite-backed cache of folder listings and per-file metadata."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._disabled = False
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Return this thread's connection, or None if the index is unusable."""
+        if self._disabled:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        try:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(media)")}
+            for column, decl in _MIGRATIONS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE media ADD COLUMN {column} {decl}")
+            self._init_folder_stats(conn)
+        except (sqlite3.Error, OSError) as exc:
+            log_message(f"Media index unavailable at {self.db_path}: {exc}")
+            self._disabled = True
+            return None
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _init_folder_stats(conn: sqlite3.Connection) -> None:
+        """Create the aggregate triggers; backfill databases that predate them."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'media_stats_insert'"
+        ).fetchone()
+        if not exists:
+            # Rebuild and trigger creation share one write transaction, so a
+            # concurrent writer cannot slip a change in between.
+            conn.executescript("BEGIN IMMEDIATE;" + _STATS_REBUILD + _STATS_TRIGGERS + "COMMIT;")
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+    def _ensure_folder(self, conn: sqlite3.Connection, folder: str) -> bool:
+        """
+        Make sure the cached listing of *folder* is current, rescanning it
+        when needed.  Returns False when the folder does not exist.
+        """
+        try:
+            st = os.stat(folder)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            self._forget_subtree(conn, folder)
+            return False
+        row = conn.execute(
+            "SELECT mtime, scanned_at FROM folders WHERE path = ?", (folder,)
+        ).fetchone()
+        expired = row is None or time.time() - row["scanned_at"] >= MAX_LISTING_AGE
+        if row is not None and not expired and row["mtime"] == st.st_mtime:
+            return True
+        self._scan_folder(conn, folder, st.st_mtime)
+        return True
+
+    def _scan_folder(self, conn: sqlite3.Connection, folder: str, dir_mtime: float) -> None:
+        """
+        Diff the directory listing against the index.  Only names the index
+        does not know yet are stat()ed, so a new upload into a large folder
+        costs one listing plus one stat, and an expired listing of an
+        unchanged folder costs one listing.
+        """
+        files: Dict[str, Any] = {}
+        subdirs: List[str] = []
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            subdirs.append(entry.name)
+                            continue
+                    except OSError:
+                        continue
+                    kind = media_kind(entry.name)
+                    if kind:
+                        files[entry.name] = (entry, kind)
+        except OSError as exc:
+            log_message(f"Media index scan failed for {folder}: {exc}")
+            return
+
+        known = {
+            r["name"]
+            for r in conn.execute("SELECT name FROM media WHERE folder = ?", (folder,))
+        }
+        known_dirs = {
+            r["name"]
+            for r in conn.execute("SELECT name FROM subdirs WHERE parent = ?", (folder,))
+        }
+        rows = []
+        for name, (entry, kind) in files.items():
+            if name in known:
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            rows.append((os.path.join(folder, name), folder, name, kind,
+                         st.st_size, st.st_mtime))
+
+        with conn:
+            conn.executemany(
+                "DELETE FROM media WHERE path = ?",
+                [(os.path.join(folder, name),) for name in known - files.keys()],
+            )
+            conn.executemany(_UPSERT, rows)
+            for name in known_dirs - set(subdirs):
+                self._forget_subtree(conn, os.path.join(folder, name), commit=False)
+            conn.execute("DELETE FROM subdirs WHERE parent = ?", (folder,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO subdirs (parent, name) VALUES (?, ?)",
+                [(folder, name) for name in subdirs],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO folders (path, mtime, scanned_at) VALUES (?, ?, ?)",
+                (folder, dir_mtime, time.time()),
+            )
+
+    def _forget_subtree(self, conn: sqlite3.Connection, folder: str, commit: bool = True) -> None:
+        def run():
+            args = (folder, folder, folder)
+            conn.execute(f"DELETE FROM media WHERE {_subtree_clause('folder')}", args)
+            conn.execute(f"DELETE FROM folders WHERE {_subtree_clause('path')}", args)
+            conn.execute(f"DELETE FROM subdirs WHERE {_subtree_clause('parent')}", args)
+            parent, name = os.path.split(folder)
+            conn.execute("DELETE FROM subdirs WHERE parent = ? AND name = ?", (parent, name))
+
+        if commit:
+            with conn:
+                run()
+        else:
+            run()
+
+    @staticmethod
+    def _live_listing(folder: str) -> tuple[list[dict], list[str]]:
+        """Plain directory scan used when the database cannot be opened."""
+        entries: list[dict] = []
+        subdirs: list[str] = []
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            subdirs.append(entry.name)
+                            continue
+                    except OSError:
+                        continue
+                    kind = media_kind(entry.name)
+                    if not kind:
+                        continue
+                    try:
+                        st = entry.stat()
+                        size, mtime = st.st_size, st.st_mtime
+                    except OSError:
+                        size, mtime = 0, 0.0
+                    entries.append({
+                        "path": os.path.join(folder, entry.name),
+                        "name": entry.name,
+                        "kind": kind,
+                        "size": size,
+                        "mtime": mtime,
+                    })
+        except OSError:
+            pass
+        return entries, subdirs
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def list_entries(self, folder, kinds: Optional[Sequence[str]] = None,
+                     order: str = "name", descending: bool = False) -> List[dict]:
+        """
+        Return the media files directly inside *folder* as dicts with
+        path, name, kind, size and mtime.  *order* is "name" or "mtime".
+        """
+        folder = _norm(folder)
+        conn = self._connect()
+        if conn is not None:
+            try:
+                if not self._ensure_folder(conn, folder):
+                    return []
+                sql = "SELECT path, name, kind, size, mtime FROM media WHERE folder = ?"
+                args: list = [folder]
+                if kinds:
+                    sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+                    args.extend(kinds)
+                direction = "DESC" if descending else "ASC"
+                if order == "mtime":
+                    sql += f" ORDER BY mtime {direction}, name {direction}"
+                else:
+                    sql += f" ORDER BY name {direction}"
+                return [dict(r) for r in conn.execute(sql, args)]
+            except sqlite3.Error as exc:
+                log_message(f"Media index query failed for {folder}: {exc}")
+        entries, _ = self._live_listing(folder)
+        if kinds:
+            entries = [e for e in entries if e["kind"] in kinds]
+        key = (lambda e: (e["mtime"], e["name"])) if order == "mtime" else (lambda e: e["name"])
+        entries.sort(key=key, reverse=descending)
+        return entries
+
+    def list_page(self, folder, kinds: Optional[Sequence[str]] = None,
+                  order: str = "name", descending: bool = False,
+                  cursor: Optional[str] = None, limit: int = 100
+                  ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Return one page of list_entries() and the cursor for the next page
+        (None on the last page).  Pages are keyed on (mtime, name) or name
+        rather than an offset, so they stay stable while files are added or
+        removed between requests.  Raises ValueError for a bad cursor.
+        """
+        folder = _norm(folder)
+        key = decode_cursor(cursor, order) if cursor else None
+        conn = self._connect()
+        rows = None
+        if conn is not None:
+            try:
+                if not self._ensure_folder(conn, folder):
+                    return [], None
+                sql = "SELECT path, name, kind, size, mtime FROM media WHERE folder = ?"
+                args: list = [folder]
+                if kinds:
+                    sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+                    args.extend(kinds)
+                op = "<" if descending else ">"
+                direction = "DESC" if descending else "ASC"
+                if order == "mtime":
+                    if key:
+                        sql += f" AND (mtime {op} ? OR (mtime = ? AND name {op} ?))"
+                        args.extend([key[0], key[0], key[1]])
+                    sql += f" ORDER BY mtime {direction}, name {direction}"
+                else:
+                    if key:
+                        sql += f" AND name {op} ?"
+                        args.append(key[0])
+                    sql += f" ORDER BY name {direction}"
+                sql += " LIMIT ?"
+                args.append(limit + 1)
+                rows = [dict(r) for r in conn.execute(sql, args)]
+            except sqlite3.Error as exc:
+                log_message(f"Media index query failed for {folder}: {exc}")
+        if rows is None:
+            rows = self.list_entries(folder, kinds, order, descending)
+            if key:
+                sort_key = ((lambda e: [e["mtime"], e["name"]]) if order == "mtime"
+                            else (lambda e: [e["name"]]))
+                rows = [e for e in rows
+                        if (sort_key(e) < key if descending else sort_key(e) > key)]
+            rows = rows[:limit + 1]
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, encode_cursor(rows[-1], order)
+        return rows, None
+
+    def list_files(self, folder, kinds: Optional[Sequence[str]] = None) -> List[str]:
+        """Return absolute paths of the media directly inside *folder*, sorted by name."""
+        return [e["path"] for e in self.list_entries(folder, kinds)]
+
+    def list_subfolders(self, folder) -> List[str]:
+        """Return the names of the directories directly inside *folder*."""
+        folder = _norm(folder)
+        conn = self._connect()
+        if conn is not None:
+            try:
+                if not self._ensure_folder(conn, folder):
+                    return []
+                return [
+                    r["name"] for r in conn.execute(
+                        "SELECT name FROM subdirs WHERE parent = ? ORDER BY name", (folder,)
+                    )
+                ]
+            except sqlite3.Error as exc:
+                log_message(f"Media index query failed for {folder}: {exc}")
+        _, subdirs = self._live_listing(folder)
+        return sorted(subdirs)
+
+    def walk_folders(self, folder) -> Iterator[str]:
+        """
+        Yield *folder* and every folder below it, depth first in name order.
+        Ignored folders (and everything below them) are skipped at each
+        level.  Each folder is listed only when the walk reaches it, so a
+        caller can stop early or start using the first results right away.
+        """
+        stack = [_norm(folder)]
+        seen = set()
+        while stack:
+            current = stack.pop()
+            try:
+                st = os.stat(current)
+            except OSError:
+                continue
+            # Symlinked folders can form loops.
+            if (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            yield current
+            subs = [s for s in self.list_subfolders(current) if not is_ignored_folder(s)]
+            stack.extend(os.path.join(current, s) for s in reversed(subs))
+
+    def walk_files(self, folder, kinds: Optional[Sequence[str]] = None) -> Iterator[List[str]]:
+        """Yield the media paths below *folder* one folder (batch) at a time."""
+        for current in self.walk_folders(folder):
+            files = self.list_files(current, kinds)
+            if files:
+                yield files
+
+    def count_files(self, folder, kinds: Optional[Sequence[str]] = None) -> int:
+        """Return the number of media files directly inside *folder*."""
+        return self.folder_stats(folder, kinds)["files"]
+
+    def folder_stats(self, folder, kinds: Optional[Sequence[str]] = None,
+                     recursive: bool = False) -> dict:
+        """
+        Return aggregates for the media directly inside *folder* (or, with
+        *recursive*, anywhere below it outside ignored folders): files,
+        bytes, newest_mtime, per-kind counts under "kinds" and the aspect
+        histogram under "aspects" ("unprobed" counts files whose aspect is
+        not cached yet).  Read from folder_stats, so the cost does not
+        depend on the number of files.
+        """
+        folder = _norm(folder)
+        stats = {
+            "files": 0,
+            "bytes": 0,
+            "newest_mtime": None,
+            "kinds": {},
+            "aspects": dict.fromkeys(ASPECT_BUCKETS + ("unprobed",), 0),
+        }
+        conn = self._connect()
+        rows = None
+        if conn is not None:
+            try:
+                if not self._ensure_folder(conn, folder):
+                    return stats
+                if recursive:
+                    # Nested folders are whatever the index last saw; the
+                    # watcher and the web hooks keep them current.
+                    rows = [dict(r) for r in conn.execute(
+                        f"SELECT * FROM folder_stats WHERE {_subtree_clause('folder')} "
+                        "AND instr(substr(folder, length(?) + 1), '/_') = 0",
+                        (folder, folder, folder, folder),
+                    )]
+                else:
+                    rows = [dict(r) for r in conn.execute(
+                        "SELECT * FROM folder_stats WHERE folder = ?", (folder,)
+                    )]
+            except sqlite3.Error as exc:
+                log_message(f"Media index query failed for {folder}: {exc}")
+        if rows is None:
+            rows = []
+            for e in self._live_listing(folder)[0]:
+                rows.append(dict(kind=e["kind"], files=1, bytes=e["size"],
+                                 newest_mtime=e["mtime"], **dict.fromkeys(ASPECT_BUCKETS, 0)))
+        for row in rows:
+            if kinds and row["kind"] not in kinds:
+                continue
+            stats["files"] += row["files"]
+            stats["bytes"] += row["bytes"]
+            stats["kinds"][row["kind"]] = stats["kinds"].get(row["kind"], 0) + row["files"]
+            if row["newest_mtime"] is not None:
+                stats["newest_mtime"] = max(stats["newest_mtime"] or row["newest_mtime"],
+                                            row["newest_mtime"])
+            for bucket in ASPECT_BUCKETS:
+                stats["aspects"][bucket] += row[bucket]
+        stats["aspects"]["unprobed"] = stats["files"] - sum(
+            stats["aspects"][b] for b in ASPECT_BUCKETS
+        )
+        return stats
+
+    # ------------------------------------------------------------------
+    # Updates from callers that changed the share themselves
+    # ------------------------------------------------------------------
+    def refresh_file(self, path) -> None:
+        """Record (or drop) a single file after it was written or replaced."""
+        path = _norm(path)
+        conn = self._connect()
+        if conn is None:
+            return
+        kind = media_kind(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        try:
+            with conn:
+                if st is None or kind is None or not stat.S_ISREG(st.st_mode):
+                    conn.execute("DELETE FROM media WHERE path = ?", (path,))
+                else:
+                    folder, name = os.path.split(path)
+                    conn.execute(_UPSERT, (path, folder, name, kind, st.st_size, st.st_mtime))
+        except sqlite3.Error as exc:
+            log_message(f"Media index update failed for {path}: {exc}")
+
+    def restat_folder(self, folder) -> List[str]:
+        """
+        stat() every indexed file in *folder* and record changed sizes and
+        mtimes, dropping files that are gone.  Returns the affected paths.
+        This costs a stat per file, so it belongs on a background thread.
+        """
+        folder = _norm(folder)
+        conn = self._connect()
+        if conn is None:
+            return []
+        changed, gone = [], []
+        for r in conn.execute(
+            "SELECT path, name, kind, size, mtime FROM media WHERE folder = ?", (folder,)
+        ).fetchall():
+            try:
+                st = os.stat(r["path"])
+            except OSError:
+                gone.append((r["path"],))
+                continue
+            if st.st_size != r["size"] or st.st_mtime != r["mtime"]:
+                changed.append((r["path"], folder, r["name"], r["kind"],
+                                st.st_size, st.st_mtime))
+        if not changed and not gone:
+            return []
+        try:
+            with conn:
+                conn.executemany("DELETE FROM media WHERE path = ?", gone)
+                conn.executemany(_UPSERT, changed)
+        except sqlite3.Error as exc:
+            log_message(f"Media index update failed for {folder}: {exc}")
+            return []
+        return [row[0] for row in changed] + [row[0] for row in gone]
+
+    def remove_path(self, path) -> None:
+        """Forget a deleted file or folder (including everything below it)."""
+        path = _norm(path)
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute("DELETE FROM media WHERE path = ?", (path,))
+            self._forget_subtree(conn, path)
+        except sqlite3.Error as exc:
+            log_message(f"Media index update failed for {path}: {exc}")
+
+    def move_path(self, src, dst) -> None:
+        """Update the index after a file or folder was renamed or moved."""
+        self.remove_path(src)
+        dst = _norm(dst)
+        if os.path.isdir(dst):
+            self.invalidate_folder(os.path.dirname(dst))
+        else:
+            self.refresh_file(dst)
+
+    # ------------------------------------------------------------------
+    # Aspect-ratio cache
+    # ------------------------------------------------------------------
+    def aspect_labels(self, paths: Iterable, probe: bool = True) -> Dict[str, str]:
+        """
+        Return {path: aspect bucket} for *paths*.  With ``probe=False`` only
+        cached labels are returned and uncached paths are left out.
+
+        Labels are cached in the index next to the size and mtime recorded
+        for each file, so a file is probed again only after it changed (a
+        folder scan or refresh_file() that sees a new size/mtime clears the
+        stored dimensions).  Files that cannot be probed are cached as
+        "unknown" so broken media does not trigger a probe on every call.
+        """
+        paths = [os.fspath(p) for p in paths]
+        labels: Dict[str, str] = {}
+        conn = self._connect()
+        if conn is not None:
+            try:
+                for start in range(0, len(paths), _QUERY_CHUNK):
+                    chunk = [_norm(p) for p in paths[start:start + _QUERY_CHUNK]]
+                    rows = conn.execute(
+                        f"SELECT path, aspect FROM media WHERE aspect IS NOT NULL "
+                        f"AND path IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                    for row in rows:
+                        labels[row["path"]] = row["aspect"]
+            except sqlite3.Error as exc:
+                log_message(f"Media index aspect lookup failed: {exc}")
+
+        if not probe:
+            return {p: labels[_norm(p)] for p in paths if _norm(p) in labels}
+        missing = [p for p in paths if _norm(p) not in labels]
+        probed = self._probe_missing(missing) if missing else {}
+        return {p: labels.get(_norm(p)) or probed[p] for p in paths}
+
+    def aspect_label(self, path) -> str:
+        """Return the cached aspect bucket for a single file."""
+        return self.aspect_labels([path])[os.fspath(path)]
+
+    def probe_aspect(self, path) -> str:
+        """Probe *path* now and store its dimensions and aspect bucket."""
+        dims = media_dimensions(os.fspath(path))
+        width, height = dims if dims else (None, None)
+        label = aspect_label_for_size(*dims) if dims else "unknown"
+        self._store_dimensions(path, width, height, label)
+        return label
+
+    def _probe_missing(self, paths: Sequence[str]) -> Dict[str, str]:
+        """
+        Probe and store *paths*, returning {path: aspect bucket}.  Videos go
+        through the shared ffprobe pool in one batch; images are read inline
+        since their headers are cheap to parse.
+        """
+        videos = [p for p in paths if media_kind(p) in VIDEO_KINDS]
+        labels = self._store_video_info(probe_videos(videos)) if videos else {}
+        for path in paths:
+            if path not in labels:
+                labels[path] = self.probe_aspect(path)
+        return labels
+
+    def _store_video_info(self, infos: Dict[str, Optional[VideoInfo]]) -> Dict[str, str]:
+        labels = {}
+        for path, info in infos.items():
+            if info is None:
+                labels[path] = "unknown"
+                self._store_dimensions(path, None, None, "unknown")
+            else:
+                labels[path] = aspect_label_for_size(info.width, info.height)
+                self._store_dimensions(path, info.width, info.height, labels[path],
+                                       info.duration, info.codec)
+        return labels
+
+    def video_info(self, paths: Iterable) -> Dict[str, VideoInfo]:
+        """
+        Return {path: VideoInfo} for the videos in *paths*, probing the ones
+        not cached yet on the ffprobe pool.  Videos that cannot be probed are
+        left out.  Blocks while probing, so keep it off the UI thread.
+        """
+        paths = [os.fspath(p) for p in paths if media_kind(os.fspath(p)) in VIDEO_KINDS]
+        found: Dict[str, VideoInfo] = {}
+        conn = self._connect()
+        if conn is not None:
+            try:
+                for start in range(0, len(paths), _QUERY_CHUNK):
+                    chunk = [_norm(p) for p in paths[start:start + _QUERY_CHUNK]]
+                    rows = conn.execute(
+                        f"SELECT path, width, height, duration, codec FROM media "
+                        f"WHERE aspect IS NOT NULL AND path IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                    for row in rows:
+                        found[row["path"]] = row
+            except sqlite3.Error as exc:
+                log_message(f"Media index video lookup failed: {exc}")
+        missing = [p for p in paths if _norm(p) not in found]
+        probed = probe_videos(missing) if missing else {}
+        self._store_video_info(probed)
+
+        result: Dict[str, VideoInfo] = {}
+        for path in paths:
+            row = found.get(_norm(path))
+            if row is not None:
+                if row["width"] and row["height"]:
+                    result[path] = VideoInfo(row["width"], row["height"],
+                                             row["duration"], row["codec"])
+            elif probed.get(path) is not None:
+                result[path] = probed[path]
+        return result
+
+    def _store_dimensions(self, path, width: Optional[int], height: Optional[int],
+                          label: str, duration: Optional[float] = None,
+                          codec: Optional[str] = None) -> None:
+        path = _norm(path)
+        kind = media_kind(path)
+        conn = self._connect()
+        if conn is None or kind is None:
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        folder, name = os.path.split(path)
+        try:
+            with conn:
+                conn.execute(_UPSERT, (path, folder, name, kind, st.st_size, st.st_mtime))
+                conn.execute(
+                    "UPDATE media SET width = ?, height = ?, aspect = ?, "
+                    "duration = COALESCE(?, duration), codec = COALESCE(?, codec) "
+                    "WHERE path = ?",
+                    (width, height, label, duration, codec, path),
+                )
+        except sqlite3.Error as exc:
+            log_message(f"Media index update failed for {path}: {exc}")
+
+    def invalidate_metadata(self, path) -> None:
+        """Drop cached dimensions for a file, or for every file below a folder."""
+        path = _norm(path)
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE media SET width = NULL, height = NULL, aspect = NULL, "
+                    f"duration = NULL, codec = NULL WHERE path = ? OR {_subtree_clause('folder')}",
+                    (path, path, path, path),
+                )
+        except sqlite3.Error as exc:
+            log_message(f"Media index update failed for {path}: {exc}")
+
+    def warm(self, folders: Iterable, progress=None) -> int:
+        """
+        Probe every media file in *folders* that has no cached aspect yet.
+        Returns the number of files probed.
+        """
+        probed = 0
+        for folder in folders:
+            if is_ignored_folder(folder):
+                continue
+            entries = self.list_entries(folder)
+            cached = self._cached_paths(folder)
+            pending = [e["path"] for e in entries if e["path"] not in cached]
+            for path in self._probe_missing(pending):
+                probed += 1
+                if progress:
+                    progress(path)
+        return probed
+
+    def _cached_paths(self, folder) -> set:
+        conn = self._connect()
+        if conn is None:
+            return set()
+        return {
+            r["path"] for r in conn.execute(
+                "SELECT path FROM media WHERE folder = ? AND aspect IS NOT NULL",
+                (_norm(folder),),
+            )
+        }
+
+    def invalidate_folder(self, folder) -> None:
+        """Force the next lookup of *folder* to rescan it."""
+        folder = _norm(folder)
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute("DELETE FROM folders WHERE path = ?", (folder,))
+        except sqlite3.Error as exc:
+            log_message(f"Media index update failed for {folder}: {exc}")
+
+
+_indexes: Dict[str, MediaIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_media_index() -> MediaIndex:
+    """Return the process-wide index for MEDIA_INDEX_PATH."""
+    path = MEDIA_INDEX_PATH
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = MediaIndex(path)
+        return index
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point: ``python -m echoview.media_index``."""
+    parser = argparse.ArgumentParser(description="Maintain the EchoView media index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm_p = sub.add_parser("warm", help="probe aspect ratios for all media ahead of time")
+    warm_p.add_argument("folders", nargs="*",
+                        help="folders relative to IMAGE_DIR, with their subfolders "
+                             "(default: all)")
+    inval_p = sub.add_parser("invalidate", help="forget cached aspect ratios")
+    inval_p.add_argument("folders", nargs="*",
+                         help="folders relative to IMAGE_DIR, with their subfolders "
+                              "(default: all)")
+    args = parser.parse_args(argv)
+
+    index = get_media_index()
+    tops = [os.path.join(IMAGE_DIR, f) for f in args.folders] or [IMAGE_DIR]
+    folders = [folder for top in tops for folder in index.walk_folders(top)]
+
+    if args.command == "invalidate":
+        for folder in folders:
+            index.invalidate_metadata(folder)
+        print(f"Invalidated cached aspect ratios for {len(folders)} folder(s).")
+        return 0
+
+    start = time.time()
+    count = index.warm(folders, progress=lambda p: print(f"probed {p}"))
+    print(f"Probed {count} file(s) in {time.time() - start:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
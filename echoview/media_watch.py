@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch IMAGE_DIR for added, removed and renamed media.
+
+The viewer used to pick up new files only when its playlists were rebuilt,
+which in practice meant a restart.  ``MediaWatcher`` turns filesystem events
+into small ``MediaDelta`` records that are applied to the media index and to
+the running playlists, without rescanning any folder.
+
+Linux inotify is used when available.  inotify only reports changes made
+through this machine, so folders on network filesystems (CIFS, NFS) are also
+polled: a poll costs one stat() per folder and only lists a folder whose
+mtime changed, diffing it against the media index.  A file rewritten in
+place changes neither, so every ``RESTAT_INTERVAL`` seconds polled folders
+are also re-stat()ed file by file here, off the lookup path.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from echoview.media_index import MAX_LISTING_AGE, get_media_index, media_kind
+from echoview.utils import is_ignored_folder, log_message
+
+# Seconds between polls of network folders (and of every folder when inotify
+# is unavailable).
+POLL_INTERVAL = 10
+# Seconds between full re-stats of polled folders.
+RESTAT_INTERVAL = MAX_LISTING_AGE
+# After the first event, keep collecting for this long so a burst (an upload
+# of many files, a rename pair) is delivered as one batch.
+EVENT_SETTLE = 0.3
+
+NETWORK_FILESYSTEMS = {"cifs", "smb3", "smbfs", "nfs", "nfs4", "fuse.sshfs", "9p"}
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+               | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass(frozen=True)
+class MediaDelta:
+    """One change below the watched root.
+
+    ``action`` is "added" (new or rewritten file), "removed" (file or
+    folder), "moved" (``path`` renamed to ``dest``) or "rescan" (events were
+    lost; rebuild anything below ``path``).
+    """
+
+    action: str
+    path: str
+    dest: Optional[str] = None
+
+
+def is_network_path(path) -> bool:
+    """Return True when *path* lives on a filesystem inotify cannot see into."""
+    path = os.path.realpath(path)
+    best, fstype = "", ""
+    try:
+        with open("/proc/mounts") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mnt = parts[1].replace("\\040", " ")
+                if (path == mnt or path.startswith(mnt.rstrip("/") + "/")) and len(mnt) > len(best):
+                    best, fstype = mnt, parts[2]
+    except OSError:
+        return False
+    return fstype in NETWORK_FILESYSTEMS
+
+
+class _Inotify:
+    """Minimal ctypes wrapper around the inotify syscalls."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.paths: Dict[int, str] = {}
+
+    def add_watch(self, path: str) -> None:
+        wd = self._add(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self.paths[wd] = path
+
+    def forget_subtree(self, path: str, remove: bool = True) -> None:
+        prefix = path + os.sep
+        for wd, p in list(self.paths.items()):
+            if p == path or p.startswith(prefix):
+                if remove:
+                    self._rm(self.fd, wd)
+                del self.paths[wd]
+
+    def rename_subtree(self, src: str, dst: str) -> None:
+        prefix = src + os.sep
+        for wd, p in self.paths.items():
+            if p == src:
+                self.paths[wd] = dst
+            elif p.startswith(prefix):
+                self.paths[wd] = dst + p[len(src):]
+
+    def read(self, timeout: float) -> List[Tuple[str, int, int, str]]:
+        """Return (folder, mask, cookie, name) tuples, waiting up to *timeout*."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((self.paths.get(wd, ""), mask, cookie, name))
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+        return events
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class MediaWatcher:
+    """
+    Background thread that reports changes below *root* to *callback*.
+
+    *callback* receives a list of MediaDelta on the watcher thread; the media
+    index is already updated by then.  GUI code must hand the deltas over to
+    its own thread.
+    """
+
+    def __init__(self, root, callback: Callable[[List[MediaDelta]], None],
+                 poll_interval: float = POLL_INTERVAL, use_inotify: bool = True):
+        self.root = os.path.normpath(os.fspath(root))
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.index = get_media_index()
+        self._inotify: Optional[_Inotify] = None
+        self._poll = False
+        # folder -> {path: (size, mtime)} and folder -> dir mtime, for polling.
+        self._snapshots: Dict[str, Dict[str, Tuple[int, float]]] = {}
+        self._dir_mtimes: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="media-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def setup(self) -> None:
+        """Install watches and take the initial polling snapshot."""
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as exc:
+                log_message(f"inotify unavailable, polling {self.root}: {exc}")
+                self._inotify = None
+        self._poll = self._inotify is None or is_network_path(self.root)
+        for folder in self._walk(self.root):
+            self._watch_folder(folder)
+
+    def _walk(self, top: str):
+        """Yield *top* and its non-ignored subfolders, using the media index."""
+        return self.index.walk_folders(top)
+
+    def _watch_folder(self, folder: str) -> None:
+        if self._inotify is not None:
+            try:
+                self._inotify.add_watch(folder)
+            except OSError as exc:
+                if exc.errno == errno.ENOSPC:
+                    log_message("inotify watch limit reached; raise "
+                                "fs.inotify.max_user_watches. Falling back to polling.")
+                    self._poll = True
+                elif exc.errno != errno.ENOENT:
+                    log_message(f"Cannot watch {folder}: {exc}")
+        if self._poll:
+            self._snapshot(folder)
+
+    def _snapshot(self, folder: str) -> None:
+        try:
+            self._dir_mtimes[folder] = os.stat(folder).st_mtime
+        except OSError:
+            return
+        self._snapshots[folder] = {
+            e["path"]: (e["size"], e["mtime"]) for e in self.index.list_entries(folder)
+        }
+
+    def _run(self) -> None:
+        # Walking the tree goes through the media index, which may have to
+        # scan the share on first use, so do it here rather than in start().
+        self.setup()
+        next_poll = time.monotonic() + self.poll_interval
+        next_restat = time.monotonic() + RESTAT_INTERVAL
+        while not self._stop.is_set():
+            wait = max(0.0, next_poll - time.monotonic()) if self._poll else 1.0
+            deltas: List[MediaDelta] = []
+            if self._inotify is not None:
+                try:
+                    deltas = self.read_events(wait)
+                except OSError as exc:
+                    log_message(f"inotify read failed, polling instead: {exc}")
+                    self._inotify.close()
+                    self._inotify = None
+                    self._poll = True
+            elif self._stop.wait(wait):
+                break
+            if self._poll and time.monotonic() >= next_poll:
+                deltas += self.poll()
+                next_poll = time.monotonic() + self.poll_interval
+            if self._poll and time.monotonic() >= next_restat:
+                deltas += self.restat()
+                next_restat = time.monotonic() + RESTAT_INTERVAL
+            if deltas:
+                try:
+                    self.callback(deltas)
+                except Exception as exc:
+                    log_message(f"Media watch callback failed: {exc}")
+
+    # ------------------------------------------------------------------
+    # inotify
+    # ------------------------------------------------------------------
+    def read_events(self, timeout: float) -> List[MediaDelta]:
+        """Wait up to *timeout* for events and return them as deltas."""
+        events = self._inotify.read(timeout)
+        if not events:
+            return []
+        deadline = time.monotonic() + EVENT_SETTLE
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            events += self._inotify.read(remaining)
+        deltas = self._translate(events)
+        self._apply_to_index(deltas)
+        return deltas
+
+    def _translate(self, events: Sequence[Tuple[str, int, int, str]]) -> List[MediaDelta]:
+        deltas: List[MediaDelta] = []
+        moved_from: Dict[int, Tuple[str, bool]] = {}
+        for folder, mask, cookie, name in events:
+            if mask & IN_Q_OVERFLOW:
+                deltas.append(MediaDelta("rescan", self.root))
+                continue
+            if not folder or not name:
+                continue
+            path = os.path.join(folder, name)
+            is_dir = bool(mask & IN_ISDIR)
+            is_ignored = is_dir and is_ignored_folder(name)
+            if mask & IN_MOVED_FROM:
+                moved_from[cookie] = (path, is_dir)
+                continue
+            if mask & IN_MOVED_TO:
+                src = moved_from.pop(cookie, None)
+                if src is not None:
+                    deltas.extend(self._moved(src[0], path, is_dir, is_ignored))
+                elif is_dir and not is_ignored:
+                    deltas.extend(self._folder_added(path))
+                elif not is_dir and media_kind(name):
+                    deltas.append(MediaDelta("added", path))
+                continue
+            if mask & IN_CREATE:
+                if is_dir and not is_ignored:
+                    deltas.extend(self._folder_added(path))
+                # Files are reported on IN_CLOSE_WRITE once fully written.
+                continue
+            if mask & IN_CLOSE_WRITE and media_kind(name):
+                deltas.append(MediaDelta("added", path))
+            elif mask & IN_DELETE and (is_dir or media_kind(name)):
+                deltas.append(MediaDelta("removed", path))
+        # A move without a matching IN_MOVED_TO left the watched tree.
+        for path, is_dir in moved_from.values():
+            if is_dir:
+                self._inotify.forget_subtree(path)
+            if is_dir or media_kind(path):
+                deltas.append(MediaDelta("removed", path))
+        return deltas
+
+    def _moved(self, src: str, dst: str, is_dir: bool, into_ignored: bool) -> List[MediaDelta]:
+        if is_dir:
+            if into_ignored:
+                self._inotify.forget_subtree(src)
+                return [MediaDelta("removed", src)]
+            if is_ignored_folder(os.path.basename(src)):
+                # Un-hiding a folder: everything in it is new to the playlists.
+                return self._folder_added(dst)
+            self._inotify.rename_subtree(src, dst)
+            return [MediaDelta("moved", src, dst)]
+        if media_kind(src) and media_kind(dst):
+            return [MediaDelta("moved", src, dst)]
+        if media_kind(src):
+            return [MediaDelta("removed", src)]
+        if media_kind(dst):
+            return [MediaDelta("added", dst)]
+        return []
+
+    def _folder_added(self, folder: str) -> List[MediaDelta]:
+        """Watch a new folder and report the media already inside it."""
+        deltas = []
+        for sub in self._walk(folder):
+            self._watch_folder(sub)
+            deltas.extend(MediaDelta("added", p) for p in self.index.list_files(sub))
+        return deltas
+
+    def _apply_to_index(self, deltas: Sequence[MediaDelta]) -> None:
+        for delta in deltas:
+            if delta.action == "added":
+                self.index.refresh_file(delta.path)
+            elif delta.action == "removed":
+                self.index.remove_path(delta.path)
+            elif delta.action == "moved":
+                self.index.move_path(delta.path, delta.dest)
+            elif delta.action == "rescan":
+                self.index.invalidate_folder(delta.path)
+            if self._poll:
+                self._update_snapshot(delta)
+
+    def _update_snapshot(self, delta: MediaDelta) -> None:
+        """Keep the polling snapshot in line so a poll does not repeat a delta."""
+        if delta.action in ("removed", "moved"):
+            self._forget_folder(delta.path)
+            self._snapshots.get(os.path.dirname(delta.path), {}).pop(delta.path, None)
+        target = delta.dest if delta.action == "moved" else delta.path
+        if delta.action not in ("added", "moved"):
+            return
+        if os.path.isdir(target):
+            for folder in self._walk(target):
+                self._snapshot(folder)
+            return
+        snap = self._snapshots.get(os.path.dirname(target))
+        if snap is not None:
+            try:
+                st = os.stat(target)
+            except OSError:
+                return
+            snap[target] = (st.st_size, st.st_mtime)
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+    def poll(self) -> List[MediaDelta]:
+        """
+        Stat every known folder and diff the ones whose mtime changed.
+        The media index does the listing, so it is updated as a side effect.
+        """
+        deltas: List[MediaDelta] = []
+        for folder in list(self._snapshots):
+            try:
+                mtime = os.stat(folder).st_mtime
+            except OSError:
+                self._forget_folder(folder)
+                deltas.append(MediaDelta("removed", folder))
+                continue
+            if mtime == self._dir_mtimes.get(folder):
+                continue
+            self._dir_mtimes[folder] = mtime
+            deltas.extend(self._diff_snapshot(folder))
+            for name in self.index.list_subfolders(folder):
+                sub = os.path.join(folder, name)
+                if sub not in self._snapshots and not is_ignored_folder(name):
+                    deltas.extend(self._folder_added(sub))
+        return deltas
+
+    def restat(self) -> List[MediaDelta]:
+        """Re-stat the files of every polled folder to catch in-place rewrites."""
+        deltas: List[MediaDelta] = []
+        for folder in list(self._snapshots):
+            if self._stop.is_set():
+                break
+            if self.index.restat_folder(folder):
+                deltas.extend(self._diff_snapshot(folder))
+        return deltas
+
+    def _diff_snapshot(self, folder: str) -> List[MediaDelta]:
+        old = self._snapshots.get(folder, {})
+        new = {
+            e["path"]: (e["size"], e["mtime"]) for e in self.index.list_entries(folder)
+        }
+        self._snapshots[folder] = new
+        deltas = [MediaDelta("removed", p) for p in old if p not in new]
+        deltas.extend(MediaDelta("added", p) for p in new if old.get(p) != new[p])
+        return deltas
+
+    def _forget_folder(self, folder: str) -> None:
+        prefix = folder + os.sep
+        for path in list(self._snapshots):
+            if path == folder or path.startswith(prefix):
+                del self._snapshots[path]
+                self._dir_mtimes.pop(path, None)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact playlist storage.
+
+A playlist of absolute path strings repeats IMAGE_DIR and the folder name for
+every entry and pays a full str object (~50 bytes of overhead) per file, once
+per window.  ``Playlist`` keeps each folder path once and stores entries as
+integers in ``array`` buffers: a folder id plus the offset and length of the
+file name in one shared UTF-8 buffer.  Paths are rebuilt on access, which is
+cheap next to anything the slideshow does with them.
+
+It behaves like the list it replaces (indexing, ``len``, iteration,
+``index``, ``insert``/``del``, comparison with lists), so ``self.index`` and
+the wrap-around arithmetic in the viewer are unchanged.
+"""
+
+from __future__ import annotations
+
+import os
+from array import array
+from collections.abc import MutableSequence
+from typing import Dict, Iterable, Iterator, List
+
+# Reclaim name bytes left behind by removals once they are this share of
+# the buffer.
+_COMPACT_RATIO = 0.5
+
+
+class Playlist(MutableSequence):
+    """List of media paths stored as (folder id, name slice) integers."""
+
+    __slots__ = ("_folders", "_folder_ids", "_fid", "_start", "_len", "_names", "_garbage")
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self._folders: List[str] = []
+        self._folder_ids: Dict[str, int] = {}
+        self._fid = array("I")
+        self._start = array("I")
+        self._len = array("H")
+        self._names = bytearray()
+        self._garbage = 0
+        self.extend(paths)
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+    def _folder_id(self, folder: str) -> int:
+        fid = self._folder_ids.get(folder)
+        if fid is None:
+            fid = self._folder_ids[folder] = len(self._folders)
+            self._folders.append(folder)
+        return fid
+
+    def _encode(self, path: str):
+        folder, name = os.path.split(os.fspath(path))
+        data = os.fsencode(name)
+        start = len(self._names)
+        self._names += data
+        return self._folder_id(folder), start, len(data)
+
+    def _name(self, i: int) -> bytes:
+        start = self._start[i]
+        return bytes(self._names[start:start + self._len[i]])
+
+    def _path(self, i: int) -> str:
+        return os.path.join(self._folders[self._fid[i]], os.fsdecode(self._name(i)))
+
+    def _position(self, i: int) -> int:
+        n = len(self._fid)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("playlist index out of range")
+        return i
+
+    def _drop_name(self, i: int) -> None:
+        self._garbage += self._len[i]
+        if self._garbage > len(self._names) * _COMPACT_RATIO:
+            self._compact(skip=i)
+
+    def _compact(self, skip: int = -1) -> None:
+        """Rewrite the name buffer without the bytes of removed entries."""
+        names = bytearray()
+        start = array("I")
+        for i in range(len(self._fid)):
+            s = self._start[i]
+            start.append(len(names))
+            if i != skip:
+                names += self._names[s:s + self._len[i]]
+        self._names, self._start, self._garbage = names, start, 0
+
+    # ------------------------------------------------------------------
+    # Sequence protocol
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._fid)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._path(j) for j in range(*i.indices(len(self)))]
+        return self._path(self._position(i))
+
+    def __setitem__(self, i, path) -> None:
+        i = self._position(i)
+        self._drop_name(i)
+        self._fid[i], self._start[i], self._len[i] = self._encode(path)
+
+    def __delitem__(self, i) -> None:
+        i = self._position(i)
+        self._drop_name(i)
+        del self._fid[i]
+        del self._start[i]
+        del self._len[i]
+
+    def insert(self, i: int, path) -> None:
+        n = len(self._fid)
+        if i < 0:
+            i = max(0, i + n)
+        i = min(i, n)
+        fid, start, length = self._encode(path)
+        self._fid.insert(i, fid)
+        self._start.insert(i, start)
+        self._len.insert(i, length)
+
+    def extend(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            fid, start, length = self._encode(path)
+            self._fid.append(fid)
+            self._start.append(start)
+            self._len.append(length)
+
+    def append(self, path) -> None:
+        self.extend((path,))
+
+    def delete_many(self, positions: Iterable[int]) -> None:
+        """Remove the entries at *positions* in a single pass."""
+        drop = {self._position(i) for i in positions}
+        if not drop:
+            return
+        keep = [i for i in range(len(self._fid)) if i not in drop]
+        self._garbage += sum(self._len[i] for i in drop)
+        self._fid = array("I", (self._fid[i] for i in keep))
+        self._start = array("I", (self._start[i] for i in keep))
+        self._len = array("H", (self._len[i] for i in keep))
+        if self._garbage > len(self._names) * _COMPACT_RATIO:
+            self._compact()
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self._fid)):
+            yield self._path(i)
+
+    def index(self, path, start: int = 0, stop: int = None) -> int:
+        fid = None
+        if isinstance(path, (str, os.PathLike)):
+            folder, name = os.path.split(os.fspath(path))
+            fid = self._folder_ids.get(folder)
+        if fid is not None:
+            data = os.fsencode(name)
+            n = len(data)
+            names, starts, lengths = self._names, self._start, self._len
+            stop = len(self._fid) if stop is None else min(stop, len(self._fid))
+            for i in range(max(start, 0), stop):
+                if self._fid[i] == fid and lengths[i] == n and names[starts[i]:starts[i] + n] == data:
+                    return i
+        raise ValueError(f"{path!r} is not in playlist")
+
+    def sorted_position(self, path) -> int:
+        """
+        Return the index that keeps *path* in name order among the entries
+        of its folder, or len(self) when the folder has none.
+
+        Listings and folder walks keep each folder's entries together and
+        sorted, so the folder's run is found by its id and bisected instead
+        of decoding every path before it.
+        """
+        folder, name = os.path.split(os.fspath(path))
+        fid = self._folder_ids.get(folder)
+        n = len(self._fid)
+        try:
+            lo = n if fid is None else self._fid.index(fid)
+        except ValueError:
+            lo = n
+        data = os.fsencode(name)
+        hi = n
+        # From the start of the run on, "in the folder and not after *name*"
+        # holds for a prefix of the list only.
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._fid[mid] == fid and self._name(mid) <= data:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __contains__(self, path) -> bool:
+        try:
+            self.index(path)
+        except ValueError:
+            return False
+        return True
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Playlist, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Playlist({list(self)!r})"
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-display playlist position, kept across restarts.
+
+The web UI restarts echoview.service on every settings change.  Instead of
+reshuffling from scratch and starting over at the top, each display stores
+the seed its shuffle was made with plus the item it was showing.  Shuffling
+the same listing with the same seed gives the same order again, so a few
+integers and one path are enough to carry on where the display stopped.
+
+State is a small dict per display::
+
+    {"key": <playlist source>, "seed": int, "index": int, "path": str}
+
+``key`` describes what the playlist was built from (mode, folders, filters);
+a saved state is only used while it still matches.
+
+Rewriting the file on every slide would wear the SD card for nothing, so the
+viewer keeps the latest position in memory and saves it at most every
+``SAVE_INTERVAL_S`` seconds, plus whenever its settings reload or it exits.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Optional
+
+from echoview.config import PLAYLIST_STATE_PATH
+from echoview.utils import log_message
+
+# All windows live in one process and share the file.
+_lock = threading.Lock()
+
+# Minimum seconds between two saves of the same display's position.
+SAVE_INTERVAL_S = 30
+
+
+def _read() -> dict:
+    try:
+        with open(PLAYLIST_STATE_PATH, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as exc:
+        log_message(f"Ignoring unreadable playlist state: {exc}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_playlist_state(display: str, key: str) -> Optional[dict]:
+    """Return the saved state for *display* if it was saved for *key*."""
+    with _lock:
+        state = _read().get(display)
+    if not isinstance(state, dict) or state.get("key") != key:
+        return None
+    if not isinstance(state.get("seed"), int):
+        return None
+    return state
+
+
+def save_playlist_state(display: str, state: dict) -> None:
+    """Store *state* for *display*; the file is replaced atomically."""
+    with _lock:
+        data = _read()
+        data[display] = state
+        tmp = PLAYLIST_STATE_PATH + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(PLAYLIST_STATE_PATH), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, PLAYLIST_STATE_PATH)
+        except OSError as exc:
+            log_message(f"Could not save playlist state: {exc}")
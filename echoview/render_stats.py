@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-display timings of the slide rendering stages.
+
+A slow transition on one Pi could be a cache miss, a slow decode, the blur
+or the composite, and nothing told them apart.  Every window now times its
+stages into fixed-size histograms: ``STAGE_BOUNDS_MS`` are the bucket upper
+bounds (doubling from 0.25 ms), so a histogram is a short list of counts
+however many slides it has seen and recording is a bisect and an increment.
+The stages are:
+
+* ``lookup_hit`` / ``lookup_miss``: ``get_cached_image``, split by outcome;
+  a miss includes decoding on the spot or waiting for a running prefetch;
+* ``decode``: ``load_and_cache_image``, on whichever thread runs it;
+* ``degrade``, ``rotate``, ``compose``: the foreground drawn on the UI
+  thread (``degrade_foreground``, ``apply_rotation_if_any`` and handing it
+  to the label);
+* ``background`` and ``blur``: ``make_background_cover`` (which includes the
+  blur) and ``blur_pixmap_once``;
+* ``precompose``: the whole next slide composed by a decode worker;
+* ``swap``: timer tick to swapped slide.
+
+Each stage keeps a histogram since start and one since the last log
+summary.  The viewer writes ``snapshot_all()`` to RENDER_STATS_PATH every
+``WRITE_INTERVAL_S`` seconds, where the web controller serves it as
+``/api/render_stats``, and logs ``summary_lines()`` every
+``LOG_INTERVAL_S`` seconds.  Each display's entry also carries the
+``decode_bounds`` its window decodes images for, which the web process uses
+to size renditions.  Only the standard library is used, so the web process
+can read the file without Qt.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from echoview.config import RENDER_STATS_PATH
+from echoview.utils import log_message
+
+STAGES = (
+    "lookup_hit", "lookup_miss", "decode", "degrade", "rotate", "compose",
+    "background", "blur", "precompose", "swap",
+)
+# Bucket upper bounds in ms; one more bucket counts everything slower.
+STAGE_BOUNDS_MS = tuple(0.25 * 2 ** i for i in range(16))  # 0.25 ms .. 8192 ms
+# How often the viewer publishes the histograms and logs a summary.
+WRITE_INTERVAL_S = 60
+LOG_INTERVAL_S = 15 * 60
+
+
+class Histogram:
+    """Counts of durations per STAGE_BOUNDS_MS bucket, plus total and max."""
+
+    __slots__ = ("counts", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(STAGE_BOUNDS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(STAGE_BOUNDS_MS, ms)] += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the *p*-th percentile (None if empty)."""
+        n = self.count
+        if not n:
+            return None
+        rank = max(1, round(n * p / 100.0))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                # The overflow bucket has no upper bound; max is the best guess.
+                return STAGE_BOUNDS_MS[i] if i < len(STAGE_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        n = self.count
+        return {
+            "count": n,
+            "mean_ms": round(self.total_ms / n, 3) if n else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": list(self.counts),
+        }
+
+
+class RenderStats:
+    """The stage histograms of one display; safe to record from any thread."""
+
+    def __init__(self, display: str):
+        self.display = display
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._total = {stage: Histogram() for stage in STAGES}
+        self._interval = {stage: Histogram() for stage in STAGES}
+        self._interval_started = self.started
+        # (width, height) the window decodes for; set by the viewer.
+        self.decode_bounds = None
+
+    def record(self, stage: str, ms: float) -> None:
+        with self._lock:
+            self._total[stage].add(ms)
+            self._interval[stage].add(ms)
+
+    def timed(self, stage: str) -> "_Timer":
+        """``with stats.timed("blur"): ...`` records the block's duration."""
+        return _Timer(self, stage)
+
+    def snapshot(self) -> dict:
+        """Histograms since start as plain data."""
+        with self._lock:
+            stages = {stage: h.to_dict() for stage, h in self._total.items()}
+        bounds = self.decode_bounds
+        return {"since": self.started, "stages": stages,
+                "decode_bounds": list(bounds) if bounds else None}
+
+    def take_interval(self):
+        """Return (seconds covered, histograms) since the last call and start anew."""
+        with self._lock:
+            interval, self._interval = self._interval, {stage: Histogram() for stage in STAGES}
+            now = time.time()
+            seconds, self._interval_started = now - self._interval_started, now
+        return seconds, interval
+
+
+class _Timer:
+    __slots__ = ("stats", "stage", "started")
+
+    def __init__(self, stats: RenderStats, stage: str):
+        self.stats = stats
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(self.stage, (time.perf_counter() - self.started) * 1000.0)
+        return False
+
+
+_stats: Dict[str, RenderStats] = {}
+_stats_lock = threading.Lock()
+
+
+def get_render_stats(display: str) -> RenderStats:
+    """Return the process-wide stats of *display*, created on first use."""
+    with _stats_lock:
+        stats = _stats.get(display)
+        if stats is None:
+            stats = _stats[display] = RenderStats(display)
+        return stats
+
+
+def snapshot_all() -> dict:
+    with _stats_lock:
+        displays = list(_stats.values())
+    return {
+        "updated": time.time(),
+        "bounds_ms": list(STAGE_BOUNDS_MS),
+        "displays": {s.display: s.snapshot() for s in displays},
+    }
+
+
+def summary_lines() -> List[str]:
+    """One log line per display covering the time since its last summary."""
+    with _stats_lock:
+        displays = list(_stats.values())
+    lines = []
+    for stats in displays:
+        seconds, interval = stats.take_interval()
+        parts = []
+        for stage, h in interval.items():
+            n = h.count
+            if n:
+                parts.append(f"{stage} n={n} p50<={h.percentile(50):g} "
+                             f"p95<={h.percentile(95):g} max={h.max_ms:.1f}")
+        if parts:
+            lines.append(f"Render stages on {stats.display} over the last "
+                         f"{seconds / 60:.0f} min (ms): " + "; ".join(parts))
+    return lines
+
+
+def log_summary() -> None:
+    for line in summary_lines():
+        log_message(line)
+
+
+def write_render_stats(path: Optional[str] = None) -> None:
+    """Publish ``snapshot_all()`` for the web controller; replaced atomically."""
+    path = path or RENDER_STATS_PATH
+    tmp = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(snapshot_all(), f)
+        os.replace(tmp, path)
+    except OSError as exc:
+        log_message(f"Could not write render stats: {exc}")
+
+
+def load_render_stats(path: Optional[str] = None) -> dict:
+    """What the viewer last published, or an empty report."""
+    path = path or RENDER_STATS_PATH
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = None
+    except (OSError, ValueError) as exc:
+        log_message(f"Ignoring unreadable render stats: {exc}")
+        data = None
+    if not isinstance(data, dict):
+        return {"updated": None, "bounds_ms": list(STAGE_BOUNDS_MS), "displays": {}}
+    return data
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Display-sized renditions of the images below IMAGE_DIR.
+
+Every showing of a slide used to decode the multi-megapixel original again
+just to scale it down to the screen.  Renditions move that work to ingest
+time: for every configured display the image is decoded once at the size
+the viewer decodes it for and written below RENDITION_DIR as
+``<width>x<height>/<path relative to IMAGE_DIR>``.  Those sizes are the
+``decode_bounds`` each window published with its render stats, i.e. its
+real size run through the same function the viewer uses; a display the
+viewer has not reported yet falls back to its configured resolution.
+
+RENDITION_DIR defaults to ``IMAGE_DIR/_renditions``; the leading underscore
+keeps it out of playlists, the media index and the file manager.  A
+rendition carries the mtime of its original, so replacing or editing the
+original makes it stale and the viewer falls back to the original until it
+is rebuilt.  Images that are already no larger than a display get no
+rendition, and GIFs and videos are left alone.
+
+Renditions are written when files are uploaded through the web interface
+and deleted, renamed or moved along with their originals there;
+``python -m echoview.renditions backfill`` builds the missing ones for the
+whole library and removes those whose original is gone or whose size no
+display uses any more.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from PySide6.QtGui import QImageReader
+
+from echoview.config import IMAGE_DIR, RENDITION_DIR
+from echoview.image_decode import decode_bounds, read_scaled_image
+from echoview.media_index import media_kind
+from echoview.render_stats import load_render_stats
+from echoview.utils import is_ignored_folder, load_config, log_message
+
+JPEG_QUALITY = 90
+
+_MODE_RE = re.compile(r"(\d+)\s*x\s*(\d+)")
+
+
+def _published_bounds(stats) -> Optional[Tuple[int, int]]:
+    try:
+        w, h = (int(v) for v in stats.get("decode_bounds") or ())
+    except (TypeError, ValueError):
+        return None
+    return (w, h) if w > 0 and h > 0 else None
+
+
+def display_bounds(cfg, published=None) -> List[Tuple[int, int]]:
+    """
+    Distinct decode bounds of the displays in *cfg*: what the viewer
+    published for each window (*published* defaults to the render stats
+    file), else the display's configured resolution.
+    """
+    if published is None:
+        published = load_render_stats().get("displays", {})
+    bounds = []
+    for name, dcfg in cfg.get("displays", {}).items():
+        b = _published_bounds(published.get(name) or {})
+        if b is None:
+            # chosen_mode is only set once a mode was picked on the web page;
+            # screen_name ("HDMI-1: 1920x1080") always carries the detected one.
+            mode = dcfg.get("chosen_mode") or dcfg.get("screen_name", "").split(":")[-1]
+            match = _MODE_RE.search(mode or "")
+            if not match:
+                continue
+            try:
+                rotate = int(dcfg.get("rotate", 0))
+            except (TypeError, ValueError):
+                rotate = 0
+            b = decode_bounds(int(match.group(1)), int(match.group(2)), rotate)
+        if b not in bounds:
+            bounds.append(b)
+    return bounds
+
+
+def rendition_path(path: str, bounds: Tuple[int, int]) -> Optional[str]:
+    """Where the rendition of *path* for *bounds* lives, or None outside IMAGE_DIR."""
+    root = os.path.abspath(IMAGE_DIR)
+    full = os.path.abspath(path)
+    if not full.startswith(root + os.sep):
+        return None
+    return os.path.join(RENDITION_DIR, f"{bounds[0]}x{bounds[1]}", os.path.relpath(full, root))
+
+
+def _relative(path: str) -> Optional[str]:
+    """*path* relative to IMAGE_DIR, or None outside it."""
+    root = os.path.abspath(IMAGE_DIR)
+    full = os.path.abspath(path)
+    if not full.startswith(root + os.sep):
+        return None
+    return os.path.relpath(full, root)
+
+
+def _rendition_sizes() -> List[str]:
+    """The size folders ("1920x1080", ...) below RENDITION_DIR."""
+    try:
+        return [d for d in os.listdir(RENDITION_DIR)
+                if os.path.isdir(os.path.join(RENDITION_DIR, d))]
+    except OSError:
+        return []
+
+
+def _remove(target: str) -> None:
+    try:
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        elif os.path.exists(target):
+            os.remove(target)
+    except OSError as e:
+        log_message(f"Could not remove rendition {target}: {e}")
+
+
+def remove_renditions(path: str) -> None:
+    """Delete the renditions of *path*, a file or folder that was deleted."""
+    rel = _relative(path)
+    if rel is None:
+        return
+    for size in _rendition_sizes():
+        _remove(os.path.join(RENDITION_DIR, size, rel))
+
+
+def move_renditions(src: str, dst: str) -> None:
+    """
+    Rename the renditions of *src* after it was renamed or moved to *dst*.
+    Moving keeps their mtimes, so they stay fresh for the moved original.
+    """
+    rel_src, rel_dst = _relative(src), _relative(dst)
+    if rel_src is None:
+        return
+    for size in _rendition_sizes():
+        source = os.path.join(RENDITION_DIR, size, rel_src)
+        if not os.path.exists(source):
+            continue
+        try:
+            if rel_dst is None:
+                raise OSError("destination is outside IMAGE_DIR")
+            target = os.path.join(RENDITION_DIR, size, rel_dst)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(source, target)
+        except OSError as e:
+            log_message(f"Could not move rendition {source}: {e}")
+            _remove(source)
+
+
+def fresh_rendition(path: str, bounds: Tuple[int, int]) -> Optional[str]:
+    """The rendition of *path* for *bounds* if it matches the current original."""
+    target = rendition_path(path, bounds)
+    if target is None:
+        return None
+    try:
+        if os.stat(target).st_mtime_ns != os.stat(path).st_mtime_ns:
+            return None
+    except OSError:
+        return None
+    return target
+
+
+def make_rendition(path: str, bounds: Tuple[int, int]) -> Optional[str]:
+    """
+    Write the rendition of *path* for *bounds* unless a fresh one exists.
+
+    Returns the rendition's path, or None when the image does not need one
+    (not a still image, already small enough) or it could not be written.
+    """
+    if media_kind(path) != "image":
+        return None
+    existing = fresh_rendition(path, bounds)
+    if existing:
+        return existing
+    target = rendition_path(path, bounds)
+    if target is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    image = read_scaled_image(path, bounds)
+    if image.isNull():
+        log_message(f"Could not decode {path} for a rendition")
+        return None
+    size = QImageReader(path).size()
+    if sorted((image.width(), image.height())) == sorted((size.width(), size.height())):
+        # Nothing was scaled away; the original is as cheap to decode.
+        return None
+    tmp = f"{target}.{threading.get_ident()}.tmp"
+    fmt = "PNG" if path.lower().endswith(".png") else "JPG"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not image.save(tmp, fmt, JPEG_QUALITY if fmt == "JPG" else -1):
+            raise OSError("could not encode image")
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, target)
+    except OSError as e:
+        log_message(f"Could not write rendition of {path}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return None
+    return target
+
+
+def ingest(paths: Iterable[str], cfg=None,
+           progress: Optional[Callable[[str], None]] = None) -> int:
+    """Make the renditions of *paths* for every display; returns how many were written."""
+    bounds = display_bounds(cfg if cfg is not None else load_config())
+    made = 0
+    for path in paths:
+        for b in bounds:
+            if not fresh_rendition(path, b) and make_rendition(path, b):
+                made += 1
+                if progress:
+                    progress(path)
+    return made
+
+
+def ingest_in_background(paths: Sequence[str], cfg=None) -> threading.Thread:
+    """Run ``ingest`` on a daemon thread so uploads return straight away."""
+    paths = list(paths)
+
+    def work():
+        try:
+            ingest(paths, cfg)
+        except Exception as e:
+            log_message(f"Rendition ingest failed: {e}")
+
+    thread = threading.Thread(target=work, name="renditions", daemon=True)
+    thread.start()
+    return thread
+
+
+def _walk_images(folders: Iterable[str]):
+    for folder in folders:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = [d for d in dirnames if not is_ignored_folder(d)]
+            for name in filenames:
+                if media_kind(name) == "image":
+                    yield os.path.join(dirpath, name)
+
+
+def prune(bounds: Sequence[Tuple[int, int]]) -> int:
+    """
+    Delete renditions whose original no longer exists, and every rendition
+    for a size no display in *bounds* uses; returns how many files went.
+    """
+    removed = 0
+    root = os.path.abspath(IMAGE_DIR)
+    wanted = {f"{w}x{h}" for w, h in bounds}
+    for dirpath, dirnames, filenames in os.walk(RENDITION_DIR):
+        rel_dir = os.path.relpath(dirpath, RENDITION_DIR)
+        if rel_dir == ".":
+            continue
+        size_dir, _, rel = rel_dir.partition(os.sep)
+        for name in filenames:
+            target = os.path.join(dirpath, name)
+            original = os.path.join(root, rel, name)
+            if (size_dir not in wanted or name.endswith(".tmp")
+                    or not os.path.exists(original)):
+                try:
+                    os.remove(target)
+                    removed += 1
+                except OSError:
+                    pass
+    return removed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point: ``python -m echoview.renditions``."""
+    parser = argparse.ArgumentParser(description="Maintain EchoView's display renditions.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill_p = sub.add_parser("backfill", help="write missing renditions, drop orphaned ones")
+    backfill_p.add_argument("folders", nargs="*",
+                            help="folders relative to IMAGE_DIR (default: all)")
+    args = parser.parse_args(argv)
+
+    cfg = load_config()
+    bounds = display_bounds(cfg)
+    if not bounds:
+        print("No display has a known resolution; nothing to do.")
+        return 1
+    folders = [os.path.join(IMAGE_DIR, f) for f in args.folders] or [IMAGE_DIR]
+    start = time.time()
+    count = ingest(_walk_images(folders), cfg, progress=lambda p: print(f"rendered {p}"))
+    removed = prune(bounds) if not args.folders else 0
+    print(f"Wrote {count} rendition(s) for {', '.join(f'{w}x{h}' for w, h in bounds)} "
+          f"and removed {removed} orphaned one(s) in {time.time() - start:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stateless shuffle order for playlists.
+
+Shuffling a playlist used to mean copying and ``random.shuffle``-ing every
+path.  ``ShuffleOrder`` instead maps a position in [0, n) to a list index
+through a keyed permutation, so the shuffled order costs a few integers no
+matter how large the folder is, and every item still comes up exactly once
+per cycle.
+
+The permutation is a small balanced Feistel network over the smallest
+even-bit power of two that covers n; results that fall outside [0, n) are
+fed through again ("cycle walking"), which on average takes fewer than
+four passes because the domain is at most 4n.
+"""
+
+from __future__ import annotations
+
+import random
+
+# Four Feistel rounds mix well enough for a slideshow; this is not crypto.
+ROUNDS = 4
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(value: int, key: int) -> int:
+    """splitmix64-style finaliser used as the Feistel round function."""
+    z = (value + key + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class ShuffleOrder:
+    """
+    Read-only sequence holding a pseudo-random permutation of range(n).
+
+    ``order[i]`` is the list index played at position i and
+    ``order.index(j)`` is the position list index j is played at; both are
+    O(1) in memory.  The same (n, seed) always gives the same order.
+    """
+
+    __slots__ = ("n", "seed", "_half", "_mask", "_keys")
+
+    def __init__(self, n: int, seed: int):
+        if n < 0:
+            raise ValueError("n must not be negative")
+        self.n = n
+        self.seed = seed
+        bits = max(2, (n - 1).bit_length())
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+        rng = random.Random(seed)
+        self._keys = tuple(rng.getrandbits(64) for _ in range(ROUNDS))
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __repr__(self) -> str:
+        return f"ShuffleOrder(n={self.n}, seed={self.seed})"
+
+    def _encrypt(self, x: int) -> int:
+        half, mask = self._half, self._mask
+        left, right = x >> half, x & mask
+        for key in self._keys:
+            left, right = right, left ^ (_mix(right, key) & mask)
+        return (left << half) | right
+
+    def _decrypt(self, x: int) -> int:
+        half, mask = self._half, self._mask
+        left, right = x >> half, x & mask
+        for key in reversed(self._keys):
+            left, right = right ^ (_mix(left, key) & mask), left
+        return (left << half) | right
+
+    def __getitem__(self, pos: int) -> int:
+        if pos < 0:
+            pos += self.n
+        if not 0 <= pos < self.n:
+            raise IndexError("shuffle position out of range")
+        x = self._encrypt(pos)
+        while x >= self.n:
+            x = self._encrypt(x)
+        return x
+
+    def index(self, value: int) -> int:
+        """Return the position at which list index *value* is played."""
+        if not 0 <= value < self.n:
+            raise ValueError(f"{value} is not in the shuffle order")
+        x = self._decrypt(value)
+        while x >= self.n:
+            x = self._decrypt(x)
+        return x
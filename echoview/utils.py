@@ -8,8 +8,11 @@ import requests
 import random
 import psutil
 import shutil
+import time
 from datetime import datetime
 
+from echoview.image_header import read_image_size
+from echoview.video_probe import ffprobe_available, probe_video
 from echoview.config import (
     APP_VERSION,
     VIEWER_HOME,
@@ -33,6 +36,13 @@ def is_ignored_folder(name: str) -> bool:
     return base.startswith("_")
 
 
+def is_ignored_path(path) -> bool:
+    """Return True when any folder along the relative *path* is ignored."""
+    if not path:
+        return False
+    return any(is_ignored_folder(part) for part in os.path.normpath(str(path)).split(os.sep))
+
+
 def _classify_ratio(ratio: float) -> str:
     """
     Return the closest aspect bucket among square, landscape, portrait.
@@ -52,58 +62,54 @@ def _classify_ratio(ratio: float) -> str:
 
 def _video_dimensions_ffprobe(path: str) -> tuple[int, int] | tuple[()]:
     """Use ffprobe (if available) to fetch video width/height."""
-    if not shutil.which("ffprobe"):
-        return ()
-    try:
-        out = subprocess.check_output(
-            [
-                "ffprobe",
-                "-v",
-                "error",
-                "-select_streams",
-                "v:0",
-                "-show_entries",
-                "stream=width,height",
-                "-of",
-                "csv=s=x:p=0",
-                path,
-            ]
-        ).decode().strip()
-        if "x" in out:
-            w_str, h_str = out.split("x", 1)
-            return int(w_str), int(h_str)
-    except Exception:
+    if not ffprobe_available():
         return ()
-    return ()
+    info = probe_video(path)
+    return (info.width, info.height) if info else ()
 
 
-def media_aspect_label(path: str) -> str:
+def media_dimensions(path: str) -> tuple[int, int] | tuple[()]:
     """
-    Return "square", "landscape", "portrait", or "unknown" for a media file.
-    Images/GIFs are inspected with Pillow; videos use ffprobe when available.
+    Return (width, height) for an image or video, or () when unknown.
+    Image headers are parsed directly and Pillow is only used when that
+    fails; videos use ffprobe when available.
     """
     ext = os.path.splitext(path)[1].lower()
     if ext in (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"):
+        dims = read_image_size(path)
+        if dims:
+            return dims
         try:
             from PIL import Image  # Lazy import to avoid overhead during module load
 
             with Image.open(path) as img:
-                w, h = img.size
+                return img.size
         except Exception:
-            return "unknown"
-    elif ext in (".mp4", ".mov", ".avi", ".mkv", ".webm"):
-        dims = _video_dimensions_ffprobe(path)
-        if not dims:
-            return "unknown"
-        w, h = dims
-    else:
-        return "unknown"
+            return ()
+    if ext in (".mp4", ".mov", ".avi", ".mkv", ".webm"):
+        return _video_dimensions_ffprobe(path)
+    return ()
+
 
+def aspect_label_for_size(w: int, h: int) -> str:
+    """Return the aspect bucket for the given pixel dimensions."""
     if w <= 0 or h <= 0:
         return "unknown"
     ratio = float(w) / float(h)
     return _classify_ratio(ratio)
 
+
+def media_aspect_label(path: str) -> str:
+    """
+    Return "square", "landscape", "portrait", or "unknown" for a media file.
+    This always probes the file; use MediaIndex.aspect_labels() for the
+    persistent, mtime-keyed cache.
+    """
+    dims = media_dimensions(path)
+    if not dims:
+        return "unknown"
+    return aspect_label_for_size(*dims)
+
 def init_config():
     if not os.path.exists(CONFIG_PATH):
         default_cfg = {
@@ -139,6 +145,7 @@ def init_config():
                     "video_play_to_end": True,
                     "video_max_seconds": 120,
                     "aspect_filter": "any",
+                    "include_subfolders": False,
                 }
             },
             "overlay": {
@@ -165,6 +172,8 @@ def init_config():
                 "foreground_scale_percent": 100
             },
             "cache_capacity": 15,
+            "cache_budget_mb": 128,
+            "background_cache_mb": 256,
             "preload_count": 1,
             # Persist a list of websites visited in web page mode.  When a
             # new URL is entered for a display it will be appended here.  The
@@ -232,13 +241,24 @@ def get_system_stats():
         pass
     return (cpu, mem_used_mb, mem_total_mb, load1, temp)
 
+# statvfs() on a CIFS mount is a network round trip and the dashboard polls
+# /stats every few seconds, so results are reused for a short while.
+STORAGE_STATS_TTL = 30
+_storage_cache = {}
+
 def get_storage_stats(path=IMAGE_DIR):
     """Return used and total bytes for the given path."""
+    now = time.monotonic()
+    cached = _storage_cache.get(path)
+    if cached and now - cached[0] < STORAGE_STATS_TTL:
+        return cached[1]
     try:
         usage = shutil.disk_usage(path)
-        return usage.used, usage.total
+        result = (usage.used, usage.total)
     except Exception:
         return 0, 0
+    _storage_cache[path] = (now, result)
+    return result
 
 def format_bytes(num_bytes):
     """Return human readable string like 1.2GB given bytes."""
@@ -274,30 +294,36 @@ def get_pi_model():
             return f.read().strip()
     return "Unknown Model"
 
-def get_subfolders():
-    """Return a sorted list of subfolders inside IMAGE_DIR."""
+def get_subfolders(recursive=False):
+    """
+    Return a sorted list of subfolders inside IMAGE_DIR.  With *recursive*,
+    nested folders are included as relative paths such as "2023/Paris".
+    """
+    from echoview.media_index import get_media_index  # Lazy import avoids a cycle
+
     try:
-        folders = [
-            d for d in os.listdir(IMAGE_DIR)
-            if os.path.isdir(os.path.join(IMAGE_DIR, d)) and not is_ignored_folder(d)
-        ]
+        index = get_media_index()
+        if recursive:
+            folders = [
+                os.path.relpath(f, IMAGE_DIR)
+                for f in index.walk_folders(IMAGE_DIR)
+            ][1:]
+        else:
+            folders = [
+                d for d in index.list_subfolders(IMAGE_DIR)
+                if not is_ignored_folder(d)
+            ]
         folders.sort(key=lambda x: x.lower())
         return folders
     except Exception:
         return []
 
 def count_files_in_folder(folder_path):
-    if not os.path.isdir(folder_path) or is_ignored_folder(folder_path):
+    from echoview.media_index import get_media_index
+
+    if is_ignored_folder(folder_path):
         return 0
-    cnt = 0
-    valid_ext = (
-        ".png", ".jpg", ".jpeg", ".gif",
-        ".mp4", ".mov", ".avi", ".mkv", ".webm"
-    )
-    for f in os.listdir(folder_path):
-        if f.lower().endswith(valid_ext):
-            cnt += 1
-    return cnt
+    return get_media_index().count_files(folder_path)
 
 
 def upgrade_config(cfg):
@@ -306,6 +332,12 @@ def upgrade_config(cfg):
     earlier EchoView releases.
     """
     changed = False
+    if "cache_budget_mb" not in cfg:
+        cfg["cache_budget_mb"] = 128
+        changed = True
+    if "background_cache_mb" not in cfg:
+        cfg["background_cache_mb"] = 256
+        changed = True
     displays = cfg.get("displays", {})
     for dcfg in displays.values():
         if "embed_metadata" not in dcfg:
@@ -329,4 +361,7 @@ def upgrade_config(cfg):
         if "aspect_filter" not in dcfg:
             dcfg["aspect_filter"] = "any"
             changed = True
+        if "include_subfolders" not in dcfg:
+            dcfg["include_subfolders"] = False
+            changed = True
     return changed
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Video metadata probing with ffprobe.
+
+Each video is probed with a single ffprobe call that returns width, height,
+duration and codec together.  ``probe_videos`` runs those calls on a small
+shared thread pool so a folder of videos is probed concurrently instead of
+one blocking subprocess at a time.  The pool is bounded, so a large folder
+queues work instead of spawning hundreds of ffprobe processes on a Pi.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+# ffprobe is mostly waiting on I/O (often a network share), so a few more
+# workers than cores still helps, but keep it small for the Pi.
+PROBE_WORKERS = min(4, (os.cpu_count() or 1) + 1)
+# Give up on a single file after this many seconds.
+PROBE_TIMEOUT = 30
+
+
+@dataclass(frozen=True)
+class VideoInfo:
+    width: int
+    height: int
+    duration: Optional[float] = None
+    codec: Optional[str] = None
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PROBE_WORKERS, thread_name_prefix="ffprobe"
+            )
+        return _executor
+
+
+def ffprobe_available() -> bool:
+    return shutil.which("ffprobe") is not None
+
+
+def _parse_duration(*values) -> Optional[float]:
+    for value in values:
+        try:
+            duration = float(value)
+        except (TypeError, ValueError):
+            continue
+        if duration > 0:
+            return duration
+    return None
+
+
+def probe_video(path) -> Optional[VideoInfo]:
+    """Return width/height/duration/codec for *path*, or None when unknown."""
+    try:
+        out = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "stream=width,height,codec_name,duration:format=duration",
+                "-of",
+                "json",
+                os.fspath(path),
+            ],
+            capture_output=True,
+            timeout=PROBE_TIMEOUT,
+            check=True,
+        ).stdout
+        data = json.loads(out or b"{}")
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    streams = data.get("streams") or []
+    if not streams:
+        return None
+    stream = streams[0]
+    try:
+        width, height = int(stream["width"]), int(stream["height"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    duration = _parse_duration(
+        stream.get("duration"), (data.get("format") or {}).get("duration")
+    )
+    return VideoInfo(width, height, duration, stream.get("codec_name"))
+
+
+def probe_videos(paths: Iterable) -> Dict[str, Optional[VideoInfo]]:
+    """
+    Probe *paths* concurrently on the shared pool.
+    Returns {path: VideoInfo or None}; blocks until every probe finished,
+    so call it from a worker thread, never the Qt UI thread.
+    """
+    paths = [os.fspath(p) for p in paths]
+    if not paths:
+        return {}
+    if not ffprobe_available():
+        return {p: None for p in paths}
+    executor = _get_executor()
+    return dict(zip(paths, executor.map(probe_video, paths)))
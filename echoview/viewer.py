@@ -8,6 +8,8 @@ and can display an overlay with clock and Spotify track info.
 
 import sys
 import os
+import json
+import queue
 import random
 import time
 import html
@@ -21,7 +23,6 @@ import signal
 import re
 from typing import Optional, List
 from datetime import datetime
-from collections import OrderedDict
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from echoview.config import APP_VERSION, IMAGE_DIR, LOG_PATH, VIEWER_HOME, SPOTIFY_CACHE_PATH
@@ -38,11 +39,10 @@ STANDALONE_CHROMIUM_USER_AGENT = (
 os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
 os.environ.setdefault("QTWEBENGINE_CHROMIUM_FLAGS", DEFAULT_CHROMIUM_FLAGS)
 
-from PySide6.QtCore import Qt, QTimer, Slot, QSize, QRect, QRectF, QUrl
-from PySide6.QtGui import QPixmap, QMovie, QPainter, QImage, QImageReader, QTransform, QFont
+from PySide6.QtCore import Qt, QTimer, Slot, QSize, QUrl
+from PySide6.QtGui import QPixmap, QMovie, QPainter, QImageReader, QTransform, QFont
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QLabel, QProgressBar,
-    QGraphicsScene, QGraphicsPixmapItem, QGraphicsBlurEffect
+    QApplication, QMainWindow, QWidget, QLabel, QProgressBar
 )
 from PySide6.QtMultimedia import QAudioOutput, QMediaPlayer
 from PySide6.QtMultimediaWidgets import QVideoWidget
@@ -56,9 +56,32 @@ from echoview.utils import (
     log_message,
     get_ip_address,
     is_ignored_folder,
-    media_aspect_label,
 )
 from echoview.embed_utils import deserialize_embed_metadata, EmbedMetadata
+from echoview.media_index import get_media_index, media_kind, IMAGE_KINDS, VIDEO_KINDS
+from echoview.media_watch import MediaWatcher
+from echoview.background_cache import (
+    DEFAULT_BACKGROUND_CACHE_MB, background_key, get_background_cache,
+)
+from echoview.blur import blur_image
+from echoview.decode_pool import get_decode_pool
+from echoview.frame_compose import compose_background, compose_foreground
+from echoview.gif_frames import prepare_gif_frames
+from echoview.image_decode import decode_bounds, read_scaled_image
+from echoview.image_cache import DEFAULT_CACHE_BUDGET_MB, MB, ImageCache
+from echoview.playlist import Playlist
+from echoview.playlist_state import SAVE_INTERVAL_S, load_playlist_state, save_playlist_state
+from echoview.render_stats import (
+    LOG_INTERVAL_S, WRITE_INTERVAL_S, get_render_stats, log_summary, write_render_stats,
+)
+from echoview.renditions import fresh_rendition
+from echoview.shuffle import ShuffleOrder
+
+# Slides per swap-latency summary in the log.
+SWAP_LOG_EVERY = 50
+# A shuffled playlist that is still being walked gets a new play_order at
+# most this often; items walked in between play after it in list order.
+STREAM_REORDER_INTERVAL_S = 2.0
 
 def _get_webengine_settings():
     """Return a settings object across Qt versions."""
@@ -123,25 +146,55 @@ def detect_monitors():
 
 
 class DisplayWindow(QMainWindow):
-    def __init__(self, disp_name, disp_cfg, assigned_screen=None):
+    def __init__(self, disp_name, disp_cfg, assigned_screen=None, image_cache=None):
         super().__init__()
         self.disp_name = disp_name
         self.disp_cfg = disp_cfg
         self.assigned_screen = assigned_screen
         self.running = True
 
-        # Caching for foreground images
-        self.image_cache = OrderedDict()
+        # Caching for foreground images, keyed by (path, decode_bounds).
+        # EchoViewGUI passes one cache shared by all windows and sizes it;
+        # a window created on its own keeps a private one.
         self.cache_capacity = 15
-        self.cache_lock = threading.Lock()
+        self.cache_budget_mb = DEFAULT_CACHE_BUDGET_MB
+        self.owns_image_cache = image_cache is None
+        if image_cache is None:
+            image_cache = ImageCache(self.cache_budget_mb * MB, self.cache_capacity)
+        self.image_cache = image_cache
+        # Called by reload_settings() for a shared cache, so its owner can
+        # resize it for the new per-display budget.
+        self.on_cache_settings = None
         self.preload_count = 1
-        self.aspect_cache = {}
+        # Images are decoded just large enough to cover this (w, h); set
+        # from the window geometry on the UI thread, read by prefetchers.
+        self.decode_bounds = (0, 0)
+        # Prefetches queued on the shared decode pool, by (path, bounds).
+        self.prefetch_futures = {}
+        # The next slide composed by a decode worker before the timer fires:
+        # (frame key, future) or None.  See frame_compose.
+        self.next_frame = None
+        # Timer-tick-to-swap times (ms) not yet summarised in the log.
+        self.swap_times = []
+        self.swap_precomposed = 0
+        self.last_swap_ms = None
+        # Per-stage timings for this display (see render_stats).
+        self.render_stats = get_render_stats(disp_name)
 
         self.last_displayed_path = None
         self.current_pixmap = None
+        # Source of a precomposed slide; turned into current_pixmap only
+        # when the foreground has to be redrawn (resize).
+        self.current_source_image = None
         self.current_movie = None
         self.handling_gif_frames = False
-        self.last_scaled_foreground_image = None
+        # Degraded/rotated GIFs play from frames prepared on a decode worker
+        # (see gif_frames); until they are ready QMovie frames are scaled
+        # one by one.
+        self.gif_frames = None
+        self.gif_frame_index = 0
+        self.gif_loops_left = 0
+        self.gif_frames_pending = None
         self.current_video_proc = None
         self.external_browser_proc = None
         self.external_browser_url = None
@@ -156,9 +209,30 @@ class DisplayWindow(QMainWindow):
         self.fallback_image_list = []
         self.fallback_index = -1
 
-        # Variables for auto-negative sampling (no longer used for difference mode)
-        self.current_drawn_image = None
-        self.foreground_drawn_rect = None
+        # Aspect labels for videos come from ffprobe, which is far too slow
+        # to run on the UI thread.  Uncached videos are probed by a worker
+        # and the filtered list is handed back through ui_tasks.
+        self.aspect_probe_id = 0
+        self.aspect_probe_paths = None
+        self.ui_tasks = queue.SimpleQueue()
+        # Recursive categories are walked on a worker and streamed into the
+        # playlist folder by folder; the id invalidates an outdated walk.
+        self.playlist_stream_id = 0
+        self.playlist_streaming = False
+        self.playlist_reordered_at = 0.0
+        # Shuffle seed and position are saved per display so a restart
+        # carries on with the same order (see playlist_state).
+        self.playlist_key = None
+        self.playlist_seed = random.getrandbits(32)
+        # A streamed playlist starts empty, so the saved state waits here
+        # until its item has been walked (see _apply_pending_resume).
+        self.pending_resume = None
+        # The latest position not yet written (see flush_playlist_state).
+        self.playlist_unsaved = None
+        self.playlist_saved_at = 0.0
+        # In shuffle mode image_list stays in folder order and play_order
+        # maps positions (self.index) to list indexes; None plays in order.
+        self.play_order = None
 
         # Set window geometry
         if self.assigned_screen:
@@ -238,6 +312,17 @@ class DisplayWindow(QMainWindow):
         self.mpv_poll_timer.setInterval(1000)  # check once per second
         self.mpv_poll_timer.timeout.connect(self._check_mpv_process)
 
+        self.gif_timer = QTimer(self)
+        self.gif_timer.setSingleShot(True)
+        self.gif_timer.timeout.connect(self._show_gif_frame)
+
+        # Worker threads cannot touch widgets; they queue callables that this
+        # timer runs on the UI thread.
+        self.ui_task_timer = QTimer(self)
+        self.ui_task_timer.setInterval(100)
+        self.ui_task_timer.timeout.connect(self._run_ui_tasks)
+        self.ui_task_timer.start()
+
         # Load config and start
         self.cfg = load_config()
         self.reload_settings()
@@ -255,6 +340,7 @@ class DisplayWindow(QMainWindow):
                 self.setGeometry(screen.geometry())
         rect = self.main_widget.rect()
         margin = 10
+        self._update_decode_bounds(rect.width(), rect.height())
 
         self.bg_label.setGeometry(rect)
         self.foreground_label.setGeometry(rect)
@@ -265,6 +351,9 @@ class DisplayWindow(QMainWindow):
             self.hls_video_widget.setGeometry(rect)
             self.hls_video_widget.lower()
         self.bg_label.lower()
+        if self.next_frame is not None:
+            # Recompose the pending frame for the new geometry.
+            self._precompose_next()
 
         # Position Spotify info label – its text box spans nearly the full screen width.
         pos = self.disp_cfg.get("spotify_info_position", "bottom-center")
@@ -348,16 +437,22 @@ class DisplayWindow(QMainWindow):
         # (NEW) Rebuild the list of videos on demand.  This ensures that if the
         # list was emptied or a new category is selected, we always have the
         # latest set of video filenames before attempting to play the next one.
-        if not self.image_list:
+        if not self.image_list and not self.playlist_streaming:
             self.build_local_image_list()
 
         # (NEW) If there are still no videos after rebuilding, show a message
         # and return instead of advancing to a non-existent video.
         if not self.image_list:
-            self.clear_foreground_label("No videos found")
+            if self.playlist_streaming:
+                self.clear_foreground_label("Scanning folders...")
+            elif self.aspect_probe_paths:
+                self.clear_foreground_label("Scanning videos...")
+            else:
+                self.clear_foreground_label("No videos found")
             return
-        path = self.image_list[self.index]
+        path = self._playlist_item(self.index)
         self.last_displayed_path = path
+        self._save_playlist_position(self.index)
         if not shutil.which("mpv"):
             self.clear_foreground_label("Video unsupported")
             QTimer.singleShot(2000, self.next_image)
@@ -879,6 +974,7 @@ class DisplayWindow(QMainWindow):
 
     def closeEvent(self, event):
         self.running = False
+        self.flush_playlist_state()
         self._stop_external_browser()
         self._stop_hls_playback()
         self.stop_current_video()
@@ -886,7 +982,10 @@ class DisplayWindow(QMainWindow):
 
     @Slot()
     def reload_settings(self):
+        # The position belongs to the playlist that is about to be replaced.
+        self.flush_playlist_state()
         self.stop_current_video()
+        self._drop_next_frame()
         self.cfg = load_config()
         displays = self.cfg.get("displays", {})
         if self.disp_name in displays:
@@ -934,9 +1033,19 @@ class DisplayWindow(QMainWindow):
             self.preload_count = 1
         if self.preload_count < 0:
             self.preload_count = 0
-        with self.cache_lock:
-            while len(self.image_cache) > self.cache_capacity:
-                self.image_cache.popitem(last=False)
+        try:
+            self.cache_budget_mb = max(1, int(self.cfg.get("cache_budget_mb", DEFAULT_CACHE_BUDGET_MB)))
+        except:
+            self.cache_budget_mb = DEFAULT_CACHE_BUDGET_MB
+        if self.owns_image_cache:
+            self.image_cache.configure(self.cache_budget_mb * MB, self.cache_capacity)
+        elif self.on_cache_settings is not None:
+            self.on_cache_settings()
+        try:
+            background_cache_mb = max(1, int(self.cfg.get("background_cache_mb", DEFAULT_BACKGROUND_CACHE_MB)))
+        except:
+            background_cache_mb = DEFAULT_BACKGROUND_CACHE_MB
+        get_background_cache().configure(background_cache_mb * MB)
 
         self.current_mode = self.disp_cfg.get("mode", "random_image")
         if self.current_mode != "web_page":
@@ -947,14 +1056,33 @@ class DisplayWindow(QMainWindow):
 
         # Reset cached lists and indexes before rebuilding state.
         self.image_list = []
+        self.play_order = None
+        self._cancel_prefetches()
         self.fallback_image_list = []
         self.fallback_index = -1
+        # Results of an aspect probe started for the old settings are stale.
+        self.aspect_probe_id += 1
+        self.aspect_probe_paths = None
+        self.playlist_stream_id += 1
+        self.playlist_streaming = False
+        self.pending_resume = None
         # Use -1 so the first next_image call shows the first item instead of skipping it.
         self.index = -1 if self.current_mode != "videos" else 0
         self.last_displayed_path = None
 
+        resume = None
+        self.playlist_key = None
+        if self._playlist_scope() is not None:
+            self.playlist_key = self._playlist_key()
+            resume = load_playlist_state(self.disp_name, self.playlist_key)
+        self.playlist_seed = resume["seed"] if resume else random.getrandbits(32)
+
         if self.current_mode in ("random_image", "mixed", "specific_image", "videos"):
             self.build_local_image_list()
+        if resume and self.playlist_streaming:
+            self.pending_resume = resume
+        elif resume:
+            self._resume_playlist(resume)
 
         # Stop any existing playback/embeds before reconfiguring.
         self._stop_hls_playback()
@@ -1035,16 +1163,23 @@ class DisplayWindow(QMainWindow):
         # Ensure overlay elements are repositioned based on updated settings
         self.setup_layout()
 
-    def build_local_image_list(self):
+    def build_local_image_list(self, stream=True):
+        """
+        Rebuild image_list for the current mode.  With include_subfolders
+        and *stream*, the folder tree is walked in the background and the
+        playlist fills up while the walk runs.
+        """
         mode = self.current_mode
+        recursive = self.disp_cfg.get("include_subfolders", False)
+        if recursive and stream and mode in ("random_image", "mixed", "videos"):
+            self._stream_local_image_list()
+            return
         if mode == "random_image":
             cat = self.disp_cfg.get("image_category", "")
             if is_ignored_folder(cat):
                 self.image_list = []
                 return
-            images = self.gather_images(cat)
-            if self.disp_cfg.get("shuffle_mode", False):
-                random.shuffle(images)
+            images = self.gather_images(cat, recursive)
             self.image_list = self._filter_by_aspect(images)
         elif mode == "mixed":
             folder_list = [
@@ -1053,9 +1188,7 @@ class DisplayWindow(QMainWindow):
             ]
             allimg = []
             for folder in folder_list:
-                allimg += self.gather_images(folder)
-            if self.disp_cfg.get("shuffle_mode", False):
-                random.shuffle(allimg)
+                allimg += self.gather_images(folder, recursive)
             self.image_list = self._filter_by_aspect(allimg)
         elif mode == "specific_image":
             cat = self.disp_cfg.get("image_category", "")
@@ -1075,96 +1208,642 @@ class DisplayWindow(QMainWindow):
             if is_ignored_folder(cat):
                 self.image_list = []
                 return
-            vids = self.gather_videos(cat)
-            if self.disp_cfg.get("shuffle_videos", False):
-                random.shuffle(vids)
+            vids = self.gather_videos(cat, recursive)
             self.image_list = self._filter_by_aspect(vids)
+        self.image_list = Playlist(self.image_list)
+        self._reorder_playlist()
 
-    def gather_images(self, category):
-        base = os.path.join(IMAGE_DIR, category) if category else IMAGE_DIR
-        if is_ignored_folder(base) or is_ignored_folder(category):
-            return []
-        if not os.path.isdir(base):
-            return []
-        results = []
-        for fname in os.listdir(base):
-            lf = fname.lower()
-            if lf.endswith((".jpg", ".jpeg", ".png", ".gif")):
-                results.append(os.path.join(base, fname))
-        results.sort()
-        return results
-
-    def gather_videos(self, category):
+    def _shuffled(self):
+        return self.disp_cfg.get(
+            "shuffle_videos" if self.current_mode == "videos" else "shuffle_mode", False
+        )
+
+    def _reorder_playlist(self, anchor=None):
+        """
+        Rebuild play_order after image_list was replaced or resized.  The
+        order only depends on the list length and the display's seed, so the
+        same listing always plays in the same order.  When *anchor* is still
+        in the list, self.index moves to it.
+        """
+        # Whatever was prefetched as "next" may not be next any more.
+        self._cancel_prefetches()
+        if self._shuffled() and len(self.image_list) > 1:
+            self.play_order = ShuffleOrder(len(self.image_list), self.playlist_seed)
+        else:
+            self.play_order = None
+        if anchor is not None:
+            pos = self._playlist_position(anchor)
+            if pos >= 0:
+                self.index = pos
+
+    def _playlist_item(self, pos):
+        """Path played at position *pos* (self.index space)."""
+        # Items streamed in after play_order was built play after it, in order.
+        if self.play_order is not None and pos < len(self.play_order):
+            pos = self.play_order[pos]
+        return self.image_list[pos]
+
+    def _playlist_position(self, path):
+        """Position at which *path* is played, or -1."""
+        try:
+            pos = self.image_list.index(path)
+        except ValueError:
+            return -1
+        if self.play_order is not None and pos < len(self.play_order):
+            return self.play_order.index(pos)
+        return pos
+
+    def _playlist_anchor(self):
+        """Item at self.index, used to keep the slideshow in place across edits."""
+        if 0 <= self.index < len(self.image_list):
+            return self._playlist_item(self.index)
+        return None
+
+    def _playlist_key(self):
+        """Describe what the playlist is built from; saved positions must match it."""
+        folders, kinds, recursive = self._playlist_scope()
+        return json.dumps([
+            self.current_mode, folders, recursive, self._shuffled(),
+            self.disp_cfg.get("aspect_filter", "any"),
+        ])
+
+    def _resume_playlist(self, state):
+        """Continue after the item that was on screen when the state was saved."""
+        if not self.image_list:
+            return
+        pos = self._playlist_position(state.get("path"))
+        if pos < 0:
+            # The file is gone; the order around it is still the same.
+            try:
+                pos = int(state.get("index", -1))
+            except (TypeError, ValueError):
+                return
+            pos = min(pos, len(self.image_list) - 1)
+            if pos < 0:
+                return
+        # Images: index is the item on screen and next_image() moves past it.
+        # Videos: index is the next item to play.
+        if self.current_mode == "videos":
+            self.index = (pos + 1) % len(self.image_list)
+        else:
+            self.index = pos
+
+    def _apply_pending_resume(self, finished=False):
+        """
+        Resume a streamed playlist once the saved item is in it, or with the
+        saved index when the walk *finished* without it.  Returns True when
+        the position was restored.
+        """
+        state = self.pending_resume
+        if state is None:
+            return False
+        if not finished and self._playlist_position(state.get("path")) < 0:
+            return False
+        self.pending_resume = None
+        self._resume_playlist(state)
+        return bool(self.image_list)
+
+    def _save_playlist_position(self, pos):
+        """Record that the item at *pos* is being shown."""
+        if self.playlist_key is None or not 0 <= pos < len(self.image_list):
+            return
+        if self.pending_resume is not None:
+            return  # Keep the saved position until the walk reaches it.
+        self.playlist_unsaved = {
+            "key": self.playlist_key,
+            "seed": self.playlist_seed,
+            "index": pos,
+            "path": self._playlist_item(pos),
+        }
+        if time.monotonic() - self.playlist_saved_at >= SAVE_INTERVAL_S:
+            self.flush_playlist_state()
+
+    def flush_playlist_state(self):
+        """Write the latest playlist position if it has not been saved yet."""
+        state, self.playlist_unsaved = self.playlist_unsaved, None
+        if state is not None:
+            save_playlist_state(self.disp_name, state)
+            self.playlist_saved_at = time.monotonic()
+
+    def gather_images(self, category, recursive=False):
+        return self._gather(category, IMAGE_KINDS, recursive)
+
+    def gather_videos(self, category, recursive=False):
+        return self._gather(category, VIDEO_KINDS, recursive)
+
+    def _gather(self, category, kinds, recursive):
         base = os.path.join(IMAGE_DIR, category) if category else IMAGE_DIR
         if is_ignored_folder(base) or is_ignored_folder(category):
             return []
-        if not os.path.isdir(base):
-            return []
-        results = []
-        for fname in os.listdir(base):
-            lf = fname.lower()
-            if lf.endswith((".mp4", ".mov", ".avi", ".mkv", ".webm")):
-                results.append(os.path.join(base, fname))
-        results.sort()
-        return results
+        index = get_media_index()
+        if not recursive:
+            return index.list_files(base, kinds)
+        return [p for batch in index.walk_files(base, kinds) for p in batch]
+
+    def _stream_local_image_list(self):
+        """Walk the playlist folders on a worker and append results as they come."""
+        folders, kinds, _ = self._playlist_scope()
+        self.image_list = Playlist()
+        self.playlist_stream_id += 1
+        stream_id = self.playlist_stream_id
+        self.playlist_streaming = True
+        self.playlist_reordered_at = 0.0
+        target = self.disp_cfg.get("aspect_filter", "any")
+
+        def worker():
+            index = get_media_index()
+            seen = set()
+            try:
+                for folder in folders:
+                    for batch in index.walk_files(folder, kinds):
+                        if stream_id != self.playlist_stream_id:
+                            return  # Settings changed; a newer walk is running.
+                        # Mixed folders may overlap once subfolders count.
+                        batch = [p for p in batch if p not in seen]
+                        seen.update(batch)
+                        if target not in ("", "any", None):
+                            labels = index.aspect_labels(batch)
+                            batch = [p for p in batch if labels.get(p) == target]
+                        if batch:
+                            self.ui_tasks.put(lambda b=batch: self._append_streamed(stream_id, b))
+            except Exception as e:
+                log_message(f"Folder walk failed: {e}")
+            finally:
+                self.ui_tasks.put(lambda: self._finish_stream(stream_id))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _append_streamed(self, stream_id, paths):
+        """Add one folder's worth of walk results to the playlist."""
+        if stream_id != self.playlist_stream_id:
+            return
+        was_empty = not self.image_list
+        # The walk runs in name order and never repeats a path, so appending
+        # keeps the list sorted.
+        self.image_list.extend(paths)
+        state = self.pending_resume
+        resuming = state is not None and state.get("path") in paths
+        now = time.monotonic()
+        due = now - self.playlist_reordered_at >= STREAM_REORDER_INTERVAL_S
+        if self._shuffled() and (resuming or due):
+            # Finding the anchor scans the list, so shuffle the new items in
+            # now and then rather than for every folder.
+            self._reorder_playlist(self._playlist_anchor())
+            self.playlist_reordered_at = now
+        resumed = resuming and self._apply_pending_resume()
+        self._start_playlist_if_idle(was_empty, resumed)
+
+    def _finish_stream(self, stream_id):
+        if stream_id != self.playlist_stream_id:
+            return
+        self.playlist_streaming = False
+        if self._shuffled():
+            # Shuffle in whatever was walked since the last reorder.
+            self._reorder_playlist(self._playlist_anchor())
+        self._apply_pending_resume(finished=True)
+        if not self.image_list:
+            self.clear_foreground_label(
+                "No videos found" if self.current_mode == "videos" else "No images found"
+            )
 
     def _filter_by_aspect(self, paths):
-        """Filter media by the configured aspect bucket (any/square/landscape/portrait)."""
+        """
+        Filter media by the configured aspect bucket (any/square/landscape/portrait).
+        Videos without a cached label are left out for now and probed in the
+        background; the playlist is updated once their labels are known.
+        """
         target = self.disp_cfg.get("aspect_filter", "any")
         if not paths or target in ("", "any", None):
             return paths
-        filtered = []
-        for p in paths:
-            label = self.aspect_cache.get(p)
-            if label is None:
-                label = media_aspect_label(p)
-                self.aspect_cache[p] = label
-            if label == target:
-                filtered.append(p)
-        return filtered
-
-    def load_and_cache_image(self, fullpath):
-        ext = os.path.splitext(fullpath)[1].lower()
-        if ext == ".gif":
-            tmp_reader = QImageReader(fullpath)
-            tmp_reader.setAutoDetectImageFormat(True)
-            first_frame = tmp_reader.read()
-            return {"type": "gif", "path": fullpath, "first_frame": first_frame}
+        # Labels come from the persistent media index, so a restart or a
+        # second window does not probe the same files again.
+        index = get_media_index()
+        videos = [p for p in paths if media_kind(p) in VIDEO_KINDS]
+        if not videos:
+            labels = index.aspect_labels(paths)
         else:
-            pixmap = QPixmap(fullpath)
-            return {"type": "static", "pixmap": pixmap}
+            others = [p for p in paths if media_kind(p) not in VIDEO_KINDS]
+            labels = index.aspect_labels(others)
+            labels.update(index.aspect_labels(videos, probe=False))
+            if len(labels) < len(paths):
+                self._probe_aspects_in_background(paths)
+        return [p for p in paths if labels.get(p) == target]
+
+    def _probe_aspects_in_background(self, paths):
+        """Probe *paths* on a worker thread, then refilter the playlist."""
+        if self.aspect_probe_paths == paths:
+            return  # Same list is already being probed.
+        self.aspect_probe_id += 1
+        probe_id = self.aspect_probe_id
+        self.aspect_probe_paths = list(paths)
+        log_message(f"Probing {len(paths)} file(s) for the aspect filter in the background")
+
+        def worker():
+            try:
+                labels = get_media_index().aspect_labels(paths)
+            except Exception as e:
+                log_message(f"Background aspect probe failed: {e}")
+                labels = {}
+            self.ui_tasks.put(lambda: self._apply_probed_aspects(probe_id, paths, labels))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _apply_probed_aspects(self, probe_id, paths, labels):
+        """Swap in the fully filtered playlist once a background probe is done."""
+        if probe_id != self.aspect_probe_id:
+            return  # Settings changed while probing.
+        self.aspect_probe_paths = None
+        target = self.disp_cfg.get("aspect_filter", "any")
+        current = self._playlist_anchor()
+        was_empty = not self.image_list
+        self.image_list = Playlist(p for p in paths if labels.get(p) == target)
+        self._reorder_playlist()
+        pos = self._playlist_position(current)
+        if pos >= 0:
+            self.index = pos
+        elif self.index >= len(self.image_list):
+            self.index = 0
+        if was_empty and self.image_list and self.current_mode == "videos" and not self.current_video_proc:
+            self.next_image(force=True)
+
+    def _playlist_scope(self):
+        """Return (folders, kinds, recursive) the current playlist is built from, or None."""
+        mode = self.current_mode
+        if mode == "random_image":
+            cats, kinds = [self.disp_cfg.get("image_category", "")], IMAGE_KINDS
+        elif mode == "mixed":
+            cats, kinds = self.disp_cfg.get("mixed_folders", []), IMAGE_KINDS
+        elif mode == "videos":
+            cats, kinds = [self.disp_cfg.get("video_category", "")], VIDEO_KINDS
+        else:
+            return None
+        folders = []
+        for c in cats:
+            folder = os.path.normpath(os.path.join(IMAGE_DIR, c) if c else IMAGE_DIR)
+            if not is_ignored_folder(c) and folder not in folders:
+                folders.append(folder)
+        return folders, kinds, self.disp_cfg.get("include_subfolders", False)
+
+    def apply_media_deltas(self, deltas):
+        """
+        Apply MediaWatcher deltas to the running playlist without rebuilding
+        it.  New files are only added when they match the current mode,
+        folders and aspect filter.
+        """
+        # Decodes of a rewritten file are stale in every mode.
+        for delta in deltas:
+            if delta.action == "added":
+                self._forget_decoded(delta.path)
+            elif delta.action == "moved":
+                self._forget_decoded(delta.dest)
+        # The spotify fallback list is rebuilt lazily from the index.
+        self.fallback_image_list = []
+        scope = self._playlist_scope()
+        if scope is None:
+            return
+        folders, kinds, recursive = scope
+
+        def in_scope(path):
+            if media_kind(path) not in kinds:
+                return False
+            folder = os.path.dirname(path)
+            if folder in folders:
+                return True
+            if not recursive:
+                return False
+            for base in folders:
+                if folder.startswith(base + os.sep):
+                    rel = os.path.relpath(folder, base)
+                    return not any(is_ignored_folder(part) for part in rel.split(os.sep))
+            return False
+
+        added = []
+        for delta in deltas:
+            if delta.action == "rescan":
+                self.build_local_image_list()
+                self.index = min(self.index, len(self.image_list) - 1)
+                return
+            if delta.action == "added":
+                if in_scope(delta.path):
+                    added.append(delta.path)
+            elif delta.action == "removed":
+                self._remove_from_playlist(delta.path)
+            elif delta.action == "moved":
+                if self._move_in_playlist(delta.path, delta.dest, in_scope):
+                    added.append(delta.dest)
+        if added:
+            # One insert pass for the whole batch.
+            self._add_to_playlist(added)
+
+    def _forget_decoded(self, path):
+        """Drop cached decodes of *path* and the next frame composed from it."""
+        self.image_cache.discard_if(lambda key: key[0] == path)
+        if self.next_frame is not None and self.next_frame[0][0] == path:
+            self._drop_next_frame()
+
+    def _remove_from_playlist(self, path):
+        prefix = path + os.sep
+        shuffled = self.play_order is not None
+        anchor = self._playlist_anchor()
+        removed = []
+        for pos, p in enumerate(self.image_list):
+            if p == path or p.startswith(prefix):
+                # Images: index is the item on screen, so step back and let
+                # next_image() land on whatever moved into its place.
+                # Videos: index is the next item to play.
+                if not shuffled and (pos < self.index or (pos == self.index and self.current_mode != "videos")):
+                    self.index -= 1
+                if p == anchor:
+                    anchor = None
+                    if shuffled and self.current_mode != "videos":
+                        self.index -= 1
+                self.image_cache.discard_if(lambda key, p=p: key[0] == p)
+                removed.append(pos)
+        self.image_list.delete_many(removed)
+        if shuffled:
+            self._reorder_playlist(anchor)
+        if self.current_mode == "videos" and self.index >= len(self.image_list):
+            self.index = 0
+
+    def _move_in_playlist(self, src, dst, in_scope):
+        """Rename *src* in place; returns True when *dst* still has to be added."""
+        prefix = src + os.sep
+        renamed = False
+        for pos, p in enumerate(self.image_list):
+            if p == src or p.startswith(prefix):
+                new = dst + p[len(src):]
+                if in_scope(new):
+                    self.image_list[pos] = new
+                    renamed = True
+        self._remove_from_playlist(src)
+        return not renamed and in_scope(dst)
+
+    def _add_to_playlist(self, paths):
+        """Aspect-filter *paths* and insert them; uncached videos are probed first."""
+        target = self.disp_cfg.get("aspect_filter", "any")
+        if target in ("", "any", None):
+            self._insert_into_playlist(paths)
+            return
+        index = get_media_index()
+        videos = [p for p in paths if media_kind(p) in VIDEO_KINDS]
+        labels = index.aspect_labels([p for p in paths if p not in videos])
+        labels.update(index.aspect_labels(videos, probe=False))
+        self._insert_into_playlist([p for p in paths if labels.get(p) == target])
+        pending = [p for p in videos if p not in labels]
+        if pending:
+            def worker():
+                found = get_media_index().aspect_labels(pending)
+                matching = [p for p in pending if found.get(p) == target]
+                if matching:
+                    self.ui_tasks.put(lambda: self._insert_into_playlist(matching))
+
+            threading.Thread(target=worker, daemon=True).start()
+
+    def _insert_into_playlist(self, paths):
+        was_empty = not self.image_list
+        shuffled = self.play_order is not None
+        anchor = self._playlist_anchor()
+        for path in paths:
+            pos = self.image_list.sorted_position(path)
+            if pos and self.image_list[pos - 1] == path:
+                continue  # Already listed (e.g. twice in one batch).
+            self.image_list.insert(pos, path)
+            if not shuffled and (pos < self.index or (pos == self.index and self.current_mode != "videos")):
+                self.index += 1
+        if shuffled or self._shuffled():
+            # New uploads join the shuffle wherever the new order puts them.
+            self._reorder_playlist(anchor)
+        self._start_playlist_if_idle(was_empty)
+
+    def _start_playlist_if_idle(self, was_empty, resumed=False):
+        """
+        Start showing the playlist once the first items arrive, at the top
+        or, when *resumed*, where the restored self.index points.
+        """
+        if was_empty and self.image_list:
+            if self.current_mode == "videos":
+                if not resumed:
+                    self.index = 0
+                if not self.current_video_proc:
+                    self.next_image(force=True)
+            else:
+                if not resumed:
+                    self.index = -1
+                self.next_image(force=True)
+
+    def _run_ui_tasks(self):
+        """Run callables queued by worker threads (UI thread only)."""
+        while True:
+            try:
+                task = self.ui_tasks.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                task()
+            except Exception as e:
+                log_message(f"UI task failed: {e}")
+
+    def _update_decode_bounds(self, width, height):
+        """Track the window size images are decoded for (UI thread only)."""
+        # Cache entries are keyed by these bounds, so images decoded for the
+        # old size are simply not hit any more and age out.
+        self.decode_bounds = decode_bounds(width, height, self.disp_cfg.get("rotate", 0))
+        # Published for the web process, which sizes renditions to match.
+        self.render_stats.decode_bounds = self.decode_bounds
+
+    def load_and_cache_image(self, fullpath, bounds=None):
+        """
+        Decode *fullpath* for *bounds* (default: the current decode_bounds)
+        into a cache entry.  Runs on decode workers, so it must only produce
+        QImages: QPixmap is tied to the GUI thread and is made from the image
+        at display time.
+        """
+        ext = os.path.splitext(fullpath)[1].lower()
+        with self.render_stats.timed("decode"):
+            if ext == ".gif":
+                tmp_reader = QImageReader(fullpath)
+                tmp_reader.setAutoDetectImageFormat(True)
+                first_frame = tmp_reader.read()
+                return {"type": "gif", "path": fullpath, "first_frame": first_frame,
+                        "bytes": first_frame.sizeInBytes()}
+            if bounds is None:
+                bounds = self.decode_bounds
+            # A rendition written at upload time is already screen sized.
+            source = fresh_rendition(fullpath, bounds) or fullpath
+            image = read_scaled_image(source, bounds)
+            if image.isNull() and source != fullpath:
+                image = read_scaled_image(fullpath, bounds)
+            return {"type": "static", "image": image, "bytes": image.sizeInBytes()}
 
     def get_cached_image(self, fullpath):
-        with self.cache_lock:
-            if fullpath in self.image_cache:
-                self.image_cache.move_to_end(fullpath)
-                return self.image_cache[fullpath]
-        data = self.load_and_cache_image(fullpath)
-        with self.cache_lock:
-            self.image_cache[fullpath] = data
-            if len(self.image_cache) > self.cache_capacity:
-                self.image_cache.popitem(last=False)
+        started = time.perf_counter()
+        key = (fullpath, self.decode_bounds)
+        data = self.image_cache.get(key, owner=self.disp_name)
+        if data is not None:
+            self.render_stats.record("lookup_hit", (time.perf_counter() - started) * 1000.0)
+            return data
+        # Joins a decode of the same file that is already running, whether
+        # this window's prefetch or another window's.
+        data = get_decode_pool().load(key, lambda: self.load_and_cache_image(*key))
+        self._cache_decoded(key, data)
+        self.render_stats.record("lookup_miss", (time.perf_counter() - started) * 1000.0)
         return data
 
+    def _cache_decoded(self, key, data):
+        if not self.image_cache.put(key, data, data["bytes"]):
+            log_message(f"Not caching {key[0]}: {data['bytes'] // MB} MB exceeds the "
+                        f"{self.image_cache.budget_bytes // MB} MB image cache budget")
+
     def prefetch_next_image(self):
         if not self.image_list or self.preload_count <= 0:
             return
         total = len(self.image_list)
+        wanted = []
         for offset in range(1, self.preload_count + 1):
-            next_idx = (self.index + offset) % total
-            next_path = self.image_list[next_idx]
+            key = (self._playlist_item((self.index + offset) % total), self.decode_bounds)
+            if key not in self.image_cache and key not in wanted:
+                wanted.append(key)
+        self._cancel_prefetches(keep=wanted)
+        pool = get_decode_pool()
+        for key in wanted:
+            if key in self.prefetch_futures:
+                continue
+            future = pool.prefetch(key, lambda k=key: self.load_and_cache_image(*k))
+            future.add_done_callback(lambda f, k=key: self._prefetch_done(k, f))
+            self.prefetch_futures[key] = future
 
-            def worker(path=next_path):
-                try:
-                    self.get_cached_image(path)
-                except Exception:
-                    pass
+    def _prefetch_done(self, key, future):
+        """Runs on a decode worker; ImageCache is thread-safe."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._cache_decoded(key, future.result())
 
-            threading.Thread(target=worker, daemon=True).start()
+    def _cancel_prefetches(self, keep=()):
+        """Release queued prefetches that are no longer upcoming."""
+        pool = get_decode_pool()
+        for key, future in list(self.prefetch_futures.items()):
+            if key in keep and not future.done():
+                continue
+            del self.prefetch_futures[key]
+            if not future.done():
+                pool.cancel(key)
+
+    def _frame_key(self, path):
+        """Everything a composed frame of *path* depends on (UI thread only)."""
+        rect = self.main_widget.rect()
+        return (path, self.foreground_label.width(), self.foreground_label.height(),
+                rect.width(), rect.height(), self.fg_scale_percent,
+                self.bg_scale_percent, self.bg_blur_radius, self.disp_cfg.get("rotate", 0))
 
-    def make_background(self, pixmap):
-        """Generate a blurred/scaled background from the given pixmap."""
-        return self.make_background_cover(pixmap)
+    def _precompose_next(self):
+        """Start composing the upcoming slide so the next tick only swaps pixmaps."""
+        if not self.image_list:
+            return
+        path = self._playlist_item((self.index + 1) % len(self.image_list))
+        if os.path.splitext(path)[1].lower() == ".gif":
+            # GIFs are played by QMovie and have nothing to precompose, but
+            # degraded ones play from frames that can be prepared now.
+            self._drop_next_frame()
+            if self.fg_scale_percent != 100:
+                key = self._gif_frames_key(path)
+                if key not in self.image_cache:
+                    get_decode_pool().prefetch(key, lambda: self._prepare_gif_frames(key))
+            return
+        key = self._frame_key(path)
+        if self.next_frame is not None and self.next_frame[0] == key:
+            return
+        self._drop_next_frame()
+        future = get_decode_pool().prefetch(("frame",) + key, lambda: self._compose_frame(key))
+        self.next_frame = (key, future)
+
+    def _compose_frame(self, key):
+        """Runs on a decode worker, so QImage only."""
+        with self.render_stats.timed("precompose"):
+            path, fw, fh, sw, sh, fg_percent, bg_percent, blur_radius, rotate = key
+            data = self.get_cached_image(path)
+            if data["type"] != "static" or data["image"].isNull():
+                return None
+            image = data["image"]
+            fg = compose_foreground(image, fw, fh, fg_percent, rotate)
+            if fg is None:
+                return None
+            bg_key = background_key(path, sw, sh, blur_radius, bg_percent)
+            cache = get_background_cache()
+            bg = cache.get(bg_key) if bg_key else None
+            if bg is None:
+                bg = compose_background(image, sw, sh, bg_percent, blur_radius)
+                if bg_key and bg is not None:
+                    cache.put(bg_key, bg)
+            return {"image": image, "fg": fg, "bg": bg}
+
+    def _drop_next_frame(self):
+        if self.next_frame is None:
+            return
+        key, future = self.next_frame
+        self.next_frame = None
+        if not future.done():
+            get_decode_pool().cancel(("frame",) + key)
+
+    def _take_next_frame(self, path):
+        """
+        Return the precomposed frame for *path*, or None when there is none
+        for the current geometry and settings.  A composition that is already
+        running is waited for, as redoing it here would only take longer.
+        """
+        if self.next_frame is None:
+            return None
+        key, future = self.next_frame
+        if key != self._frame_key(path):
+            self._drop_next_frame()
+            return None
+        self._drop_next_frame()
+        if future.cancelled():
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            log_message(f"Composing {path} ahead of time failed: {e}")
+            return None
+
+    def _record_swap(self, started, precomposed):
+        """Note the time from timer tick to swapped slide and log a summary now and then."""
+        self.last_swap_ms = (time.perf_counter() - started) * 1000.0
+        self.render_stats.record("swap", self.last_swap_ms)
+        self.swap_times.append(self.last_swap_ms)
+        if precomposed:
+            self.swap_precomposed += 1
+        if len(self.swap_times) < SWAP_LOG_EVERY:
+            return
+        times = sorted(self.swap_times)
+        hits, misses = self.image_cache.counts(self.disp_name)
+        log_message(
+            f"Swap latency on {self.disp_name} over {len(times)} slides: "
+            f"median {times[len(times) // 2]:.1f} ms, max {times[-1]:.1f} ms, "
+            f"{self.swap_precomposed} precomposed; image cache {hits} hits, {misses} misses"
+        )
+        self.swap_times = []
+        self.swap_precomposed = 0
+
+    def make_background(self, pixmap, path=None):
+        """
+        Generate a blurred/scaled background from the given pixmap.  When the
+        pixmap shows the file *path* the result is looked up in and added to
+        the shared disk cache; the write is queued on the decode pool.
+        """
+        rect = self.main_widget.rect()
+        key = background_key(path, rect.width(), rect.height(),
+                             self.bg_blur_radius, self.bg_scale_percent)
+        cache = get_background_cache()
+        if key:
+            cached = cache.get(key)
+            if cached is not None:
+                return QPixmap.fromImage(cached)
+        with self.render_stats.timed("background"):
+            background = self.make_background_cover(pixmap)
+        if key and background:
+            image = background.toImage()
+            get_decode_pool().prefetch(("background", key), lambda: cache.put(key, image))
+        return background
 
     def next_image(self, force=False):
         if not self.running:
@@ -1227,12 +1906,16 @@ class DisplayWindow(QMainWindow):
                 if fallback_mode in ("random_image", "mixed", "specific_image"):
                     if not self.fallback_image_list:
                         image_list_backup = self.image_list
+                        order_backup = self.play_order
                         mode_backup = self.current_mode
                         self.current_mode = fallback_mode
-                        self.build_local_image_list()
-                        self.fallback_image_list = self.image_list
+                        self.build_local_image_list(stream=False)
+                        self.fallback_image_list = Playlist(
+                            self._playlist_item(i) for i in range(len(self.image_list))
+                        )
                         self.current_mode = mode_backup
                         self.image_list = image_list_backup
+                        self.play_order = order_backup
                         self.fallback_index = -1
                     if not self.fallback_image_list:
                         self.clear_foreground_label("No fallback images found")
@@ -1252,26 +1935,33 @@ class DisplayWindow(QMainWindow):
             return
 
         if not self.image_list:
-            self.clear_foreground_label("No images found")
+            if self.playlist_streaming:
+                self.clear_foreground_label("Scanning folders...")
+            else:
+                self.clear_foreground_label("No images found")
             return
 
-        if self.last_displayed_path and self.last_displayed_path in self.image_cache:
-            del self.image_cache[self.last_displayed_path]
-
+        started = time.perf_counter()
         if force and self.index < 0:
             self.index = 0
         else:
             self.index = (self.index + 1) % len(self.image_list)
-        new_path = self.image_list[self.index]
+        new_path = self._playlist_item(self.index)
         self.last_displayed_path = new_path
 
-        self.show_foreground_image(new_path)
+        frame = self._take_next_frame(new_path)
+        if frame is not None:
+            self._show_composed_frame(frame)
+        else:
+            self.show_foreground_image(new_path)
+        self._record_swap(started, frame is not None)
+        self._save_playlist_position(self.index)
+        self._precompose_next()
         self.prefetch_next_image()
         if self.overlay_config.get("auto_negative_font", False):
             self.clock_label.update()
 
-    def clear_foreground_label(self, message):
-        self.stop_current_video()
+    def _release_movie(self):
         if self.current_movie:
             try:
                 self.current_movie.stop()
@@ -1283,6 +1973,13 @@ class DisplayWindow(QMainWindow):
                 pass
             self.current_movie = None
             self.handling_gif_frames = False
+        self.gif_timer.stop()
+        self.gif_frames = None
+        self.gif_frames_pending = None
+
+    def clear_foreground_label(self, message):
+        self.stop_current_video()
+        self._release_movie()
         self.foreground_label.setMovie(None)
         msg = message
         lower_msg = message.lower()
@@ -1309,17 +2006,7 @@ class DisplayWindow(QMainWindow):
             self.clear_foreground_label("Missing file")
             return
 
-        if self.current_movie:
-            try:
-                self.current_movie.stop()
-            except RuntimeError:
-                pass
-            try:
-                self.current_movie.deleteLater()
-            except RuntimeError:
-                pass
-            self.current_movie = None
-            self.handling_gif_frames = False
+        self._release_movie()
 
         data = self.get_cached_image(fullpath)
         if data["type"] == "gif" and not is_spotify:
@@ -1334,33 +2021,51 @@ class DisplayWindow(QMainWindow):
                 self.handling_gif_frames = False
                 if not ff.isNull():
                     pm = QPixmap.fromImage(ff)
-                    blurred = self.make_background(pm)
+                    blurred = self.make_background(pm, fullpath)
                     self.bg_label.setPixmap(blurred if blurred else QPixmap())
             else:
-                self.current_movie = QMovie(data["path"])
-                self.handling_gif_frames = True
                 ff = data["first_frame"]
                 if ff.isNull():
                     self.clear_foreground_label("GIF error")
                     return
                 pm = QPixmap.fromImage(ff)
-                blurred = self.make_background(pm)
+                blurred = self.make_background(pm, fullpath)
                 self.bg_label.setPixmap(blurred if blurred else QPixmap())
-                bw, bh = self.calc_bounding_for_window(ff)
-                self.gif_bounds = (bw, bh)
-                self.current_movie.frameChanged.connect(self.on_gif_frame_changed)
-                self.current_movie.start()
+                key = self._gif_frames_key(fullpath)
+                prepared = self.image_cache.get(key, owner=self.disp_name)
+                if prepared is not None and prepared["frames"]:
+                    self._play_gif_frames(prepared)
+                else:
+                    self.current_movie = QMovie(data["path"])
+                    self.handling_gif_frames = True
+                    bw, bh = self.calc_bounding_for_window(ff)
+                    self.gif_bounds = (bw, bh)
+                    self.current_movie.frameChanged.connect(self.on_gif_frame_changed)
+                    self.current_movie.start()
+                    if prepared is None:
+                        self._request_gif_frames(key)
         else:
             if data["type"] == "static":
-                self.current_pixmap = data["pixmap"]
+                self.current_pixmap = QPixmap.fromImage(data["image"])
             else:
                 self.current_pixmap = QPixmap(fullpath)
+            self.current_source_image = None
             self.handling_gif_frames = False
             self.updateForegroundScaled()
-            blurred = self.make_background(self.current_pixmap)
+            blurred = self.make_background(self.current_pixmap, fullpath)
             self.bg_label.setPixmap(blurred if blurred else QPixmap())
         self.spotify_info_label.raise_()
 
+    def _show_composed_frame(self, frame):
+        """Swap in a frame built by _compose_frame; all that is left is two pixmaps."""
+        self._release_movie()
+        self.current_source_image = frame["image"]
+        self.current_pixmap = None
+        self.foreground_label.setPixmap(QPixmap.fromImage(frame["fg"]))
+        bg = frame["bg"]
+        self.bg_label.setPixmap(QPixmap.fromImage(bg) if bg is not None else QPixmap())
+        self.spotify_info_label.raise_()
+
     def on_gif_frame_changed(self, frame_index):
         if not self.current_movie or not self.handling_gif_frames:
             return
@@ -1370,21 +2075,70 @@ class DisplayWindow(QMainWindow):
         src_pm = QPixmap.fromImage(frm_img)
         degraded = self.degrade_foreground(src_pm, self.gif_bounds)
         rotated = self.apply_rotation_if_any(degraded)
-        fw = self.foreground_label.width()
-        fh = self.foreground_label.height()
-        bw, bh = self.gif_bounds
-        final_img = QImage(fw, fh, QImage.Format_ARGB32)
-        final_img.fill(Qt.transparent)
-        painter = QPainter(final_img)
-        xoff = (fw - bw) // 2
-        yoff = (fh - bh) // 2
-        painter.drawPixmap(xoff, yoff, rotated)
-        painter.end()
-        self.foreground_label.setPixmap(QPixmap.fromImage(final_img))
-        self.last_scaled_foreground_image = final_img
+        with self.render_stats.timed("compose"):
+            self.foreground_label.setPixmap(rotated)
+        if self.overlay_config.get("auto_negative_font", False):
+            self.clock_label.update()
+        self.spotify_info_label.raise_()
+
+    def _gif_frames_key(self, path):
+        """Cache key of the prepared frames of *path* (UI thread only)."""
+        return (path, "gif", self.foreground_label.width(), self.foreground_label.height(),
+                self.fg_scale_percent, self.disp_cfg.get("rotate", 0))
+
+    def _prepare_gif_frames(self, key):
+        """Runs on a decode worker; caches the frames or a marker that they do not fit."""
+        path, _, fw, fh, percent, rotate = key
+        prepared = prepare_gif_frames(path, fw, fh, percent, rotate)
+        if prepared is None:
+            log_message(f"Not preparing GIF frames for {path}; scaling them as they play")
+            prepared = {"frames": None, "bytes": 0}
+        self.image_cache.put(key, prepared, prepared["bytes"])
+        return prepared
+
+    def _request_gif_frames(self, key):
+        """Prepare the frames off-thread and switch to them once they are ready."""
+        self.gif_frames_pending = key
+        future = get_decode_pool().prefetch(key, lambda: self._prepare_gif_frames(key))
+        future.add_done_callback(
+            lambda f: self.ui_tasks.put(lambda: self._gif_frames_ready(key, f)))
+
+    def _gif_frames_ready(self, key, future):
+        if self.gif_frames_pending != key or future.cancelled() or future.exception() is not None:
+            return
+        prepared = future.result()
+        if not prepared["frames"]:
+            return
+        # Carry on from the frame QMovie is showing.
+        index = self.current_movie.currentFrameNumber() + 1 if self.current_movie else 0
+        self._release_movie()
+        self._play_gif_frames(prepared, index)
+
+    def _play_gif_frames(self, prepared, index=0):
+        self.gif_frames = prepared["frames"]
+        self.gif_frame_index = index % len(self.gif_frames)
+        self.gif_loops_left = prepared["loop_count"]
+        self._show_gif_frame()
+
+    def _show_gif_frame(self):
+        """Show the next prepared frame and wait for its delay."""
+        if not self.gif_frames:
+            return
+        image, delay = self.gif_frames[self.gif_frame_index]
+        self.foreground_label.setPixmap(QPixmap.fromImage(image))
         if self.overlay_config.get("auto_negative_font", False):
             self.clock_label.update()
         self.spotify_info_label.raise_()
+        if len(self.gif_frames) < 2:
+            return
+        self.gif_frame_index += 1
+        if self.gif_frame_index == len(self.gif_frames):
+            if self.gif_loops_left == 0:
+                return
+            if self.gif_loops_left > 0:
+                self.gif_loops_left -= 1
+            self.gif_frame_index = 0
+        self.gif_timer.start(delay)
 
     def calc_bounding_for_window(self, first_frame):
         fw = self.foreground_label.width()
@@ -1408,6 +2162,8 @@ class DisplayWindow(QMainWindow):
         return (bounding_w, bounding_h)
 
     def updateForegroundScaled(self):
+        if not self.current_pixmap and self.current_source_image is not None:
+            self.current_pixmap = QPixmap.fromImage(self.current_source_image)
         if not self.current_pixmap:
             return
         fw = self.foreground_label.width()
@@ -1421,19 +2177,11 @@ class DisplayWindow(QMainWindow):
         bw, bh = self.calc_fill_size(iw, ih, fw, fh)
         degraded = self.degrade_foreground(self.current_pixmap, (bw, bh))
         rotated = self.apply_rotation_if_any(degraded)
-        self.current_drawn_image = rotated.toImage()
-        final_img = QImage(fw, fh, QImage.Format_ARGB32)
-        final_img.fill(Qt.transparent)
-        painter = QPainter(final_img)
-        rw = rotated.width()
-        rh = rotated.height()
-        xoff = (fw - rw) // 2
-        yoff = (fh - rh) // 2
-        painter.drawPixmap(xoff, yoff, rotated)
-        painter.end()
-        self.foreground_drawn_rect = QRect(xoff, yoff, rw, rh)
-        self.foreground_label.setPixmap(QPixmap.fromImage(final_img))
-        self.last_scaled_foreground_image = final_img
+        # The label centres its pixmap, so the foreground is handed over as
+        # it is instead of being painted into a window-sized transparent
+        # image and converted back to a pixmap.
+        with self.render_stats.timed("compose"):
+            self.foreground_label.setPixmap(rotated)
         if self.overlay_config.get("auto_negative_font", False):
             self.clock_label.update()
 
@@ -1456,17 +2204,18 @@ class DisplayWindow(QMainWindow):
         bw, bh = bounding
         if bw < 1 or bh < 1:
             return src_pm
-        scaled = src_pm.scaled(bw, bh, Qt.KeepAspectRatio, Qt.FastTransformation)
-        if self.fg_scale_percent >= 100:
-            return scaled
-        sf = float(self.fg_scale_percent) / 100.0
-        down_w = int(bw * sf)
-        down_h = int(bh * sf)
-        if down_w < 1 or down_h < 1:
-            return scaled
-        smaller = scaled.scaled(down_w, down_h, Qt.IgnoreAspectRatio, Qt.FastTransformation)
-        final_pm = smaller.scaled(bw, bh, Qt.IgnoreAspectRatio, Qt.FastTransformation)
-        return final_pm
+        with self.render_stats.timed("degrade"):
+            scaled = src_pm.scaled(bw, bh, Qt.KeepAspectRatio, Qt.FastTransformation)
+            if self.fg_scale_percent >= 100:
+                return scaled
+            sf = float(self.fg_scale_percent) / 100.0
+            down_w = int(bw * sf)
+            down_h = int(bh * sf)
+            if down_w < 1 or down_h < 1:
+                return scaled
+            smaller = scaled.scaled(down_w, down_h, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+            final_pm = smaller.scaled(bw, bh, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+            return final_pm
 
     def apply_rotation_if_any(self, pixmap):
         deg = self.disp_cfg.get("rotate", 0)
@@ -1474,7 +2223,8 @@ class DisplayWindow(QMainWindow):
             return pixmap
         transform = QTransform()
         transform.rotate(deg)
-        return pixmap.transformed(transform, Qt.SmoothTransformation)
+        with self.render_stats.timed("rotate"):
+            return pixmap.transformed(transform, Qt.SmoothTransformation)
 
     def make_background_cover(self, pixmap):
         rect = self.main_widget.rect()
@@ -1515,20 +2265,8 @@ class DisplayWindow(QMainWindow):
     def blur_pixmap_once(self, pm, radius):
         if radius <= 0:
             return pm
-        scene = QGraphicsScene()
-        item = QGraphicsPixmapItem(pm)
-        blur = QGraphicsBlurEffect()
-        blur.setBlurRadius(radius)
-        blur.setBlurHints(QGraphicsBlurEffect.PerformanceHint)
-        item.setGraphicsEffect(blur)
-        scene.addItem(item)
-        result = QImage(pm.width(), pm.height(), QImage.Format_ARGB32)
-        result.fill(Qt.transparent)
-        painter = QPainter(result)
-        scene.render(painter, QRectF(0, 0, pm.width(), pm.height()),
-                     QRectF(0, 0, pm.width(), pm.height()))
-        painter.end()
-        return QPixmap.fromImage(result)
+        with self.render_stats.timed("blur"):
+            return QPixmap.fromImage(blur_image(pm.toImage(), radius))
 
     def update_clock(self):
         now_str = datetime.now().strftime("%H:%M:%S")
@@ -1664,12 +2402,16 @@ class EchoViewGUI:
                     log_message(f"Added fallback monitor to config: {mon_info['screen_name']}")
             save_config(self.cfg)
 
+        # Decoded images are shared, so windows showing the same files at
+        # the same resolution decode and hold them once.
+        self.image_cache = ImageCache()
         self.windows = []
         screens = self.app.screens()
         i = 0
         for dname, dcfg in self.cfg.get("displays", {}).items():
             assigned_screen = screens[i] if i < len(screens) else None
-            w = DisplayWindow(dname, dcfg, assigned_screen)
+            w = DisplayWindow(dname, dcfg, assigned_screen, self.image_cache)
+            w.on_cache_settings = self._configure_image_cache
             if "monitor_model" in dcfg and dcfg["monitor_model"]:
                 t = f"{dname} ({dcfg['monitor_model']})"
             else:
@@ -1678,9 +2420,46 @@ class EchoViewGUI:
             w.show()
             self.windows.append(w)
             i += 1
+        self._configure_image_cache()
+
+        # Keep playlists in sync with uploads, deletes and renames.
+        self.media_watcher = MediaWatcher(IMAGE_DIR, self._dispatch_media_deltas)
+        self.media_watcher.start()
+
+        # Publish the render stage timings for /api/render_stats and
+        # summarise them in the log now and then.
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(write_render_stats)
+        self.stats_timer.start(WRITE_INTERVAL_S * 1000)
+        self.stats_log_timer = QTimer()
+        self.stats_log_timer.timeout.connect(log_summary)
+        self.stats_log_timer.start(LOG_INTERVAL_S * 1000)
+
+    def _configure_image_cache(self):
+        """Size the shared cache for every window (again after a settings reload)."""
+        if self.windows:
+            # cache_budget_mb and cache_capacity are per display.
+            self.image_cache.configure(
+                sum(w.cache_budget_mb for w in self.windows) * MB,
+                sum(w.cache_capacity for w in self.windows),
+            )
+
+    def _dispatch_media_deltas(self, deltas):
+        """Called on the watcher thread; hand the deltas to each window."""
+        for w in self.windows:
+            w.ui_tasks.put(lambda w=w: w.apply_media_deltas(deltas))
 
     def run(self):
-        sys.exit(self.app.exec())
+        # systemctl restarts the service with SIGTERM; quit the event loop so
+        # the windows can save their positions.  Python runs the handler the
+        # next time a timer slot runs, which is at least every 100 ms.
+        signal.signal(signal.SIGTERM, lambda *_: self.app.quit())
+        code = self.app.exec()
+        for w in self.windows:
+            w.flush_playlist_state()
+        self.media_watcher.stop()
+        write_render_stats()
+        sys.exit(code)
 
 
 def main():
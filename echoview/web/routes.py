@@ -24,9 +24,11 @@ from echoview.utils import (
     get_storage_stats, format_bytes,
     CONFIG_PATH,
     is_ignored_folder,
-    media_aspect_label,
+    is_ignored_path,
 )
 from echoview import embed_utils
+from echoview.media_index import get_media_index, IMAGE_KINDS, VIDEO_KINDS
+from echoview.render_stats import load_render_stats
 
 # Supported media file extensions for the upload/file-manager features.
 VALID_MEDIA_EXT = (
@@ -34,6 +36,16 @@ VALID_MEDIA_EXT = (
     ".mp4", ".mov", ".avi", ".mkv", ".webm"
 )
 
+# /api/media: sort option -> (index order, descending) and type -> kinds.
+MEDIA_SORTS = {
+    "name_asc": ("name", False),
+    "name_desc": ("name", True),
+    "date_desc": ("mtime", True),
+    "date_asc": ("mtime", False),
+}
+MEDIA_TYPES = {"all": None, "image": IMAGE_KINDS, "video": VIDEO_KINDS}
+API_MEDIA_MAX_LIMIT = 500
+
 def detect_monitors_extended():
     """
     Calls xrandr --props to find connected monitors, their preferred/current resolution,
@@ -174,6 +186,11 @@ def stats_json():
         "disk_total": total_human
     })
 
+@main_bp.route("/api/render_stats")
+def api_render_stats():
+    """Per-display render stage histograms as last published by the viewer."""
+    return jsonify(load_render_stats())
+
 @main_bp.route("/list_monitors")
 def list_monitors():
     return jsonify({"Display0": {"resolution": "1920x1080", "offset_x": 0, "offset_y": 0}})
@@ -297,6 +314,9 @@ def move_image():
     if os.path.isfile(src) and os.path.isdir(dest_dir):
         dst = os.path.join(dest_dir, os.path.basename(src))
         os.rename(src, dst)
+        get_media_index().move_path(src, dst)
+        from echoview.renditions import move_renditions
+        move_renditions(src, dst)
     return redirect(url_for("main.upload_media"))
 
 @main_bp.route("/upload_media", methods=["GET", "POST"])
@@ -304,32 +324,16 @@ def upload_media():
     cfg = load_config()
     theme = cfg.get("theme", "dark")
     if request.method == "GET":
+        # Only the folder list is rendered here; each folder's files are
+        # fetched page by page from /api/media when it is opened.
         sort_opt = request.args.get("sort", "name_asc")
-        folder_files = {}
-        subfolders = get_subfolders()
-        for sf in subfolders:
-            try:
-                folder_path = os.path.join(IMAGE_DIR, sf)
-                files = [
-                    f for f in os.listdir(folder_path)
-                    if f.lower().endswith(VALID_MEDIA_EXT)
-                ]
-                if sort_opt.startswith("name"):
-                    files.sort(reverse=(sort_opt == "name_desc"))
-                else:
-                    files.sort(
-                        key=lambda x: os.path.getmtime(os.path.join(folder_path, x)),
-                        reverse=(sort_opt == "date_desc")
-                    )
-                folder_files[sf] = files
-            except Exception:
-                folder_files[sf] = []
+        if sort_opt not in MEDIA_SORTS:
+            sort_opt = "name_asc"
         return render_template(
             "upload_media.html",
             theme=theme,
-            folder_files=folder_files,
             sort_option=sort_opt,
-            subfolders=subfolders,
+            subfolders=get_subfolders(),
         )
 
     files = request.files.getlist("mediafiles")
@@ -342,6 +346,7 @@ def upload_media():
     if not os.path.exists(target_dir):
         os.makedirs(target_dir)
 
+    saved = []
     for f in files:
         if not f.filename:
             continue
@@ -351,10 +356,68 @@ def upload_media():
             continue
         final_path = os.path.join(target_dir, f.filename)
         f.save(final_path)
+        get_media_index().refresh_file(final_path)
         log_message(f"Uploaded file: {final_path}")
+        saved.append(final_path)
+
+    if saved:
+        # Screen-sized copies for the displays, so the viewer does not scale
+        # the originals down on every showing.
+        from echoview.renditions import ingest_in_background
+        ingest_in_background(saved, cfg)
 
     return redirect(url_for("main.upload_media"))
 
+@main_bp.route("/api/media")
+def api_media():
+    """
+    One page of a folder's media for the file manager.
+
+    Query parameters: folder (relative to IMAGE_DIR), type (all/image/video),
+    sort (name_asc/name_desc/date_desc/date_asc), cursor (from the previous
+    page's next_cursor) and limit.
+    """
+    folder = request.args.get("folder", "")
+    full = os.path.normpath(os.path.join(IMAGE_DIR, folder))
+    if full != os.path.normpath(IMAGE_DIR) and not full.startswith(os.path.normpath(IMAGE_DIR) + os.sep):
+        return jsonify({"error": "invalid_folder"}), 400
+    rel_folder = os.path.relpath(full, IMAGE_DIR)
+    rel_folder = "" if rel_folder == "." else rel_folder
+    if is_ignored_path(rel_folder):
+        return jsonify({"error": "invalid_folder"}), 400
+    kinds = MEDIA_TYPES.get(request.args.get("type", "all"), False)
+    if kinds is False:
+        return jsonify({"error": "invalid_type"}), 400
+    sort_opt = request.args.get("sort", "name_asc")
+    if sort_opt not in MEDIA_SORTS:
+        return jsonify({"error": "invalid_sort"}), 400
+    order, descending = MEDIA_SORTS[sort_opt]
+    try:
+        limit = max(1, min(int(request.args.get("limit", 100)), API_MEDIA_MAX_LIMIT))
+    except ValueError:
+        return jsonify({"error": "invalid_limit"}), 400
+    try:
+        entries, next_cursor = get_media_index().list_page(
+            full, kinds, order=order, descending=descending,
+            cursor=request.args.get("cursor") or None, limit=limit,
+        )
+    except ValueError:
+        return jsonify({"error": "invalid_cursor"}), 400
+    return jsonify({
+        "folder": rel_folder,
+        "items": [
+            {
+                "name": e["name"],
+                "path": f"{rel_folder}/{e['name']}" if rel_folder else e["name"],
+                "kind": e["kind"],
+                "size": e["size"],
+                "mtime": e["mtime"],
+            }
+            for e in entries
+        ],
+        "next_cursor": next_cursor,
+    })
+
 @main_bp.route("/restart_viewer", methods=["POST"])
 def restart_viewer():
     try:
@@ -385,6 +448,9 @@ def delete_image():
     full = os.path.join(IMAGE_DIR, rel_path)
     if os.path.exists(full):
         os.remove(full)
+        get_media_index().remove_path(full)
+        from echoview.renditions import remove_renditions
+        remove_renditions(full)
     return redirect(url_for("main.upload_media"))
 
 @main_bp.route("/rename_image", methods=["POST"])
@@ -397,6 +463,9 @@ def rename_image():
     new_full = os.path.join(os.path.dirname(full), new_name)
     if os.path.exists(full):
         os.rename(full, new_full)
+        get_media_index().move_path(full, new_full)
+        from echoview.renditions import move_renditions
+        move_renditions(full, new_full)
     return redirect(url_for("main.upload_media"))
 
 @main_bp.route("/delete_folder", methods=["POST"])
@@ -410,6 +479,10 @@ def delete_folder():
             os.rmdir(full)
         except Exception:
             pass
+        get_media_index().remove_path(full)
+        if not os.path.exists(full):
+            from echoview.renditions import remove_renditions
+            remove_renditions(full)
     return redirect(url_for("main.upload_media"))
 
 @main_bp.route("/rename_folder", methods=["POST"])
@@ -421,6 +494,9 @@ def rename_folder():
         dst = os.path.join(IMAGE_DIR, new_name)
         if os.path.isdir(src):
             os.rename(src, dst)
+            get_media_index().move_path(src, dst)
+            from echoview.renditions import move_renditions
+            move_renditions(src, dst)
     return redirect(url_for("main.upload_media"))
 
 @main_bp.route("/create_folder", methods=["POST"])
@@ -429,6 +505,7 @@ def create_folder():
     if name:
         path = os.path.join(IMAGE_DIR, name)
         os.makedirs(path, exist_ok=True)
+        get_media_index().invalidate_folder(os.path.dirname(path))
     return redirect(url_for("main.upload_media"))
 
 @main_bp.route("/settings", methods=["GET", "POST"])
@@ -466,6 +543,18 @@ def settings():
             cfg["cache_capacity"] = int(request.form.get("cache_capacity", cfg.get("cache_capacity", 15)))
         except:
             cfg["cache_capacity"] = cfg.get("cache_capacity", 15)
+        try:
+            cfg["cache_budget_mb"] = int(request.form.get("cache_budget_mb", cfg.get("cache_budget_mb", 128)))
+        except:
+            cfg["cache_budget_mb"] = cfg.get("cache_budget_mb", 128)
+        if cfg["cache_budget_mb"] < 1:
+            cfg["cache_budget_mb"] = 1
+        try:
+            cfg["background_cache_mb"] = int(request.form.get("background_cache_mb", cfg.get("background_cache_mb", 256)))
+        except:
+            cfg["background_cache_mb"] = cfg.get("background_cache_mb", 256)
+        if cfg["background_cache_mb"] < 1:
+            cfg["background_cache_mb"] = 1
         try:
             cfg["preload_count"] = int(request.form.get("preload_count", cfg.get("preload_count", 1)))
         except:
@@ -697,6 +786,7 @@ def index():
                 "video_play_to_end": True,
                 "video_max_seconds": 120,
                 "aspect_filter": "any",
+                "include_subfolders": False,
                 "rotate": 0,
                 "screen_name": f"{mon_name}: {minfo['current_mode']}",
                 "chosen_mode": minfo["current_mode"],
@@ -765,6 +855,7 @@ def index():
                 dcfg["specific_image"] = new_spec
                 dcfg["rotate"] = new_rotate
                 dcfg["aspect_filter"] = aspect_filter
+                dcfg["include_subfolders"] = True if request.form.get(pre + "include_subfolders") else False
                 dcfg["web_url"] = new_url
                 dcfg["web_use_external_browser"] = True if request.form.get(pre + "web_use_external_browser") else False
                 dcfg["youtube_autoplay"] = True if request.form.get(pre + "youtube_autoplay") else False
@@ -855,38 +946,70 @@ def index():
                 pass
             return redirect(url_for("main.index"))
 
-    # Build folder counts
+    # Build folder counts (read from the media index's per-folder aggregates).
+    # Displays list the top-level folders; only those that include subfolders
+    # get nested folders and subtree counts, so the tree is walked at most once
+    # and only when one of them asks for it.
+    subfolders = get_subfolders()
     folder_counts = {}
-    for sf in get_subfolders():
+    for sf in subfolders:
         folder_counts[sf] = count_files_in_folder(os.path.join(IMAGE_DIR, sf))
+    nested = None
+    display_folders, display_counts = {}, {}
+    for dname, dcfg in cfg["displays"].items():
+        if not dcfg.get("include_subfolders", False):
+            display_folders[dname], display_counts[dname] = subfolders, folder_counts
+            continue
+        if nested is None:
+            tree = get_subfolders(recursive=True)
+            nested = (tree, {
+                sf: get_media_index().folder_stats(
+                    os.path.join(IMAGE_DIR, sf), recursive=True
+                )["files"]
+                for sf in tree
+            })
+        display_folders[dname], display_counts[dname] = nested
+
+    # Aspect histogram of what each display would play, shown next to the
+    # aspect filter choices.
+    aspect_counts = {}
+    for dname, dcfg in cfg["displays"].items():
+        if dcfg.get("mode") == "videos":
+            cats, kinds = [dcfg.get("video_category", "")], VIDEO_KINDS
+        elif dcfg.get("mode") == "mixed":
+            cats, kinds = dcfg.get("mixed_folders", []), IMAGE_KINDS
+        else:
+            cats, kinds = [dcfg.get("image_category", "")], IMAGE_KINDS
+        counts = {}
+        for cat in cats:
+            if is_ignored_folder(cat):
+                continue
+            stats = get_media_index().folder_stats(
+                os.path.join(IMAGE_DIR, cat) if cat else IMAGE_DIR, kinds,
+                recursive=dcfg.get("include_subfolders", False),
+            )
+            for bucket, n in stats["aspects"].items():
+                counts[bucket] = counts.get(bucket, 0) + n
+        aspect_counts[dname] = counts
 
     # Collect images for "specific_image" selection
     display_images = {}
     for dname, dcfg in cfg["displays"].items():
         cat = dcfg.get("image_category", "")
         base_dir = os.path.join(IMAGE_DIR, cat) if cat else IMAGE_DIR
-        img_list = []
-        if os.path.isdir(base_dir):
-            for fname in os.listdir(base_dir):
-                lf = fname.lower()
-                if lf.endswith((".jpg", ".jpeg", ".png", ".gif")):
-                    rel_path = fname
-                    img_list.append(os.path.join(cat, rel_path) if cat else rel_path)
-        img_list.sort()
+        img_list = [
+            os.path.join(cat, e["name"]) if cat else e["name"]
+            for e in get_media_index().list_entries(base_dir, IMAGE_KINDS)
+        ]
         aspect_pref = dcfg.get("aspect_filter", "any")
         if aspect_pref not in ("", None, "any"):
-            filtered = []
-            for rel_path in img_list:
-                full_path = os.path.join(IMAGE_DIR, rel_path)
-                if not os.path.exists(full_path):
-                    continue
-                try:
-                    label = media_aspect_label(full_path)
-                except Exception:
-                    label = "unknown"
-                if label == aspect_pref:
-                    filtered.append(rel_path)
-            img_list = filtered
+            labels = get_media_index().aspect_labels(
+                os.path.join(IMAGE_DIR, rel_path) for rel_path in img_list
+            )
+            img_list = [
+                rel_path for rel_path in img_list
+                if labels.get(os.path.join(IMAGE_DIR, rel_path)) == aspect_pref
+            ]
         display_images[dname] = img_list
 
     cpu, mem_used_mb, mem_total_mb, load1, temp = get_system_stats()
@@ -927,8 +1050,9 @@ def index():
     return render_template(
         "index.html",
         cfg=cfg,
-        subfolders=get_subfolders(),
-        folder_counts=folder_counts,
+        display_folders=display_folders,
+        display_counts=display_counts,
+        aspect_counts=aspect_counts,
         display_images=display_images,
         cpu=cpu,
         mem_line=mem_line,
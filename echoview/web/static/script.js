@@ -404,6 +404,92 @@ document.addEventListener('click', (e) => {
   }
 });
 
+// ---- File manager: pages of files from /api/media ----
+function mediaUrl(prefix, path) {
+  return prefix + path.split("/").map(encodeURIComponent).join("/");
+}
+
+function buildFileItem(tpl, folder, item) {
+  const node = tpl.content.firstElementChild.cloneNode(true);
+  let media;
+  if (item.kind === "video") {
+    media = document.createElement("video");
+    media.src = mediaUrl("/images/", item.path);
+    media.controls = true;
+    media.preload = "metadata";
+  } else {
+    media = document.createElement("img");
+    media.src = mediaUrl("/thumb/", item.path) + "?size=120";
+    media.loading = "lazy";
+  }
+  media.className = "file-thumb";
+  node.insertBefore(media, node.firstChild);
+  node.querySelectorAll('input[name="path"]').forEach(inp => { inp.value = item.path; });
+  node.querySelector(".file-download").href = mediaUrl("/download/", item.path);
+  node.querySelectorAll('select[name="dest"] option').forEach(opt => {
+    if (opt.value === folder) opt.remove();
+  });
+  node.querySelector(".filename").textContent = item.name;
+  return node;
+}
+
+function initFileManager() {
+  const fm = document.getElementById("file-manager");
+  const tpl = document.getElementById("file-item-template");
+  if (!fm || !tpl) return;
+  const sort = fm.dataset.sort || "name_asc";
+
+  fm.querySelectorAll("details.media-folder").forEach(det => {
+    const grid = det.querySelector(".folder-grid");
+    const sentinel = det.querySelector(".media-sentinel");
+    // Pages go in front of the upload tile, which stays last in the grid.
+    const uploadThumb = grid.querySelector(".upload-thumb");
+    const uploadTile = uploadThumb ? uploadThumb.closest(".file-item") : null;
+    const state = { cursor: null, done: false, loading: false };
+
+    const nearViewport = () => {
+      const rect = sentinel.getBoundingClientRect();
+      return rect.top < window.innerHeight + 400;
+    };
+
+    const loadPage = () => {
+      if (state.loading || state.done || !det.open) return;
+      state.loading = true;
+      const params = new URLSearchParams({ folder: det.dataset.folder, sort: sort, limit: "60" });
+      if (state.cursor) params.set("cursor", state.cursor);
+      fetch("/api/media?" + params.toString())
+        .then(r => r.json())
+        .then(data => {
+          (data.items || []).forEach(item => {
+            grid.insertBefore(buildFileItem(tpl, det.dataset.folder, item), uploadTile);
+          });
+          state.cursor = data.next_cursor || null;
+          state.done = !state.cursor;
+        })
+        .catch(e => {
+          console.log("Media list fetch error:", e);
+          state.done = true;
+        })
+        .finally(() => {
+          state.loading = false;
+          // Keep going while the end of the grid is still on screen.
+          if (!state.done && nearViewport()) loadPage();
+        });
+    };
+
+    if ("IntersectionObserver" in window) {
+      const observer = new IntersectionObserver(entries => {
+        if (entries.some(e => e.isIntersecting)) loadPage();
+      }, { rootMargin: "400px" });
+      observer.observe(sentinel);
+    } else {
+      window.addEventListener("scroll", () => { if (nearViewport()) loadPage(); });
+    }
+    det.addEventListener("toggle", () => { if (det.open) loadPage(); });
+  });
+}
+document.addEventListener("DOMContentLoaded", initFileManager);
+
 // ---- Web embed detection ----
 function escapeHtml(str) {
   if (str === null || str === undefined) {
@@ -254,7 +254,7 @@ if [ -f "$REQ_FILE" ]; then
   "$VENV_DIR/bin/pip" install -r "$REQ_FILE"
 else
   echo "requirements.txt not found; installing core dependencies ..."
-  "$VENV_DIR/bin/pip" install flask psutil requests spotipy PySide6 Pillow
+  "$VENV_DIR/bin/pip" install flask psutil requests spotipy PySide6 Pillow numpy
 fi
 if [ $? -ne 0 ]; then
   echo "Error installing pip packages inside the virtualenv. Exiting."
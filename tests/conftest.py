@@ -1,22 +1,313 @@
 import sys
 import types
 
+import pytest
+
+
+# Stub PySide6 and spotipy so echoview.viewer imports without them.
+qtcore = types.ModuleType("PySide6.QtCore")
+
+
+class DummyQt:
+    AlignCenter = 0
+    AlignLeft = 0
+    AlignRight = 0
+    AlignHCenter = 0
+    AlignVCenter = 0
+    TextWordWrap = 0
+    CompositionMode_Difference = 0
+    FramelessWindowHint = 0
+    KeepAspectRatio = 0
+    FastTransformation = 0
+    IgnoreAspectRatio = 0
+    SmoothTransformation = 0
+    white = 0
+    transparent = 0
+
+
+class DummyTimer:
+    def __init__(self, *a, **k):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def setInterval(self, *a):
+        pass
+
+    @staticmethod
+    def singleShot(ms, func):
+        func()
+
+
+qtcore.Qt = DummyQt
+qtcore.QTimer = DummyTimer
+qtcore.Slot = lambda *a, **k: (lambda f: f)
+qtcore.QSize = object
+qtcore.QRect = object
+qtcore.QRectF = object
+qtcore.QUrl = object
+
+qtgui = types.ModuleType("PySide6.QtGui")
+for name in ["QPixmap", "QMovie", "QPainter", "QImage", "QImageIOHandler", "QImageReader", "QTransform", "QFont"]:
+    setattr(qtgui, name, type(name, (), {}))
+
+qtwidgets = types.ModuleType("PySide6.QtWidgets")
+qtwidgets.QApplication = type("QApplication", (), {"screens": staticmethod(lambda: [])})
+for name in [
+    "QMainWindow",
+    "QWidget",
+    "QLabel",
+    "QProgressBar",
+    "QGraphicsScene",
+    "QGraphicsPixmapItem",
+    "QGraphicsBlurEffect",
+    "QSizePolicy",
+]:
+    setattr(qtwidgets, name, type(name, (), {}))
+
+qtweb = types.ModuleType("PySide6.QtWebEngineWidgets")
+qtweb.QWebEngineView = type("QWebEngineView", (), {})
+
+qtwebcore = types.ModuleType("PySide6.QtWebEngineCore")
+qtwebcore.QWebEngineSettings = type(
+    "QWebEngineSettings",
+    (),
+    {
+        "PlaybackRequiresUserGesture": object(),
+        "defaultSettings": staticmethod(
+            lambda: types.SimpleNamespace(setAttribute=lambda *args, **kwargs: None)
+        ),
+        "globalSettings": staticmethod(
+            lambda: types.SimpleNamespace(setAttribute=lambda *args, **kwargs: None)
+        ),
+    },
+)
+
+
+qtmultimedia = types.ModuleType("PySide6.QtMultimedia")
+
+
+class _DummyAudioOutput:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def setVolume(self, *args, **kwargs):
+        pass
+
+    def setMuted(self, *args, **kwargs):
+        pass
+
+
+class _DummyMediaPlayer:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def setAudioOutput(self, *args, **kwargs):
+        pass
+
+    def setVideoOutput(self, *args, **kwargs):
+        pass
+
+    def setSource(self, *args, **kwargs):
+        pass
+
+    def play(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+qtmultimedia.QAudioOutput = _DummyAudioOutput
+qtmultimedia.QMediaPlayer = _DummyMediaPlayer
+
+qtmultimedia_widgets = types.ModuleType("PySide6.QtMultimediaWidgets")
+
+
+class _DummyVideoWidget:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def hide(self):
+        pass
+
+    def show(self):
+        pass
+
+    def setGeometry(self, *args, **kwargs):
+        pass
+
+    def lower(self):
+        pass
+
+
+qtmultimedia_widgets.QVideoWidget = _DummyVideoWidget
+
+spotipy = types.ModuleType("spotipy")
+spotipy.Spotify = type("Spotify", (), {})
+oauth2 = types.ModuleType("spotipy.oauth2")
+oauth2.SpotifyOAuth = type("SpotifyOAuth", (), {})
+spotipy.oauth2 = oauth2
 
 sys.modules.setdefault("PySide6", types.ModuleType("PySide6"))
+sys.modules.setdefault("PySide6.QtCore", qtcore)
+sys.modules.setdefault("PySide6.QtGui", qtgui)
+sys.modules.setdefault("PySide6.QtWidgets", qtwidgets)
+sys.modules.setdefault("PySide6.QtWebEngineCore", qtwebcore)
+sys.modules.setdefault("PySide6.QtWebEngineWidgets", qtweb)
+sys.modules.setdefault("PySide6.QtMultimedia", qtmultimedia)
+sys.modules.setdefault("PySide6.QtMultimediaWidgets", qtmultimedia_widgets)
+sys.modules.setdefault("spotipy", spotipy)
+sys.modules.setdefault("spotipy.oauth2", oauth2)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_media_index(tmp_path, monkeypatch):
+    """Keep the SQLite media index out of VIEWER_HOME during tests."""
+    from echoview import media_index
+
+    monkeypatch.setattr(media_index, "MEDIA_INDEX_PATH", str(tmp_path / "media_index.db"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_log(tmp_path, monkeypatch):
+    """Send log_message() output to the test's temp dir instead of VIEWER_HOME."""
+    from echoview import utils
+
+    monkeypatch.setattr(utils, "LOG_PATH", str(tmp_path / "viewer.log"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_playlist_state(tmp_path, monkeypatch):
+    """Keep saved playlist positions out of VIEWER_HOME during tests."""
+    from echoview import playlist_state
+
+    monkeypatch.setattr(playlist_state, "PLAYLIST_STATE_PATH", str(tmp_path / "playlist_state.json"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_background_cache(tmp_path, monkeypatch):
+    """Keep cached slide backgrounds out of VIEWER_HOME during tests."""
+    # Imported by whichever test stubbed Qt first; nothing to do otherwise.
+    background_cache = sys.modules.get("echoview.background_cache")
+    if background_cache is not None:
+        monkeypatch.setattr(background_cache, "BACKGROUND_CACHE_DIR", str(tmp_path / "background_cache"))
+        monkeypatch.setattr(background_cache, "_cache", None)
+
+
+class FakeSize:
+    def __init__(self, w, h):
+        self.w, self.h = w, h
+
+    def width(self):
+        return self.w
+
+    def height(self):
+        return self.h
+
+    def isValid(self):
+        return self.w >= 0 and self.h >= 0
+
+
+class FakeImage:
+    def __init__(self, path):
+        self.path = path
+
+    def isNull(self):
+        return False
+
+
+class FakePixmap:
+    def __init__(self, source=None):
+        self.source = source
+
+    @staticmethod
+    def fromImage(image):
+        return FakePixmap(image)
+
+
+class FakeLabel:
+    def __init__(self, w, h):
+        self.w, self.h = w, h
+        self.pixmap = None
+
+    def width(self):
+        return self.w
+
+    def height(self):
+        return self.h
+
+    def setPixmap(self, pixmap):
+        self.pixmap = pixmap
+
+    def raise_(self):
+        pass
+
+
+class FakeTimer:
+    def __init__(self):
+        self.started = []
+
+    def start(self, ms):
+        self.started.append(ms)
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def slideshow_window(monkeypatch):
+    """Build a bare DisplayWindow running a three-image slideshow.
+
+    Composing returns tagged tuples instead of pixmaps, and
+    show_foreground_image() only records the paths it was given.
+    """
+    from echoview import render_stats, viewer
+
+    monkeypatch.setattr(viewer, "QPixmap", FakePixmap)
+    monkeypatch.setattr(viewer, "compose_foreground",
+                        lambda img, fw, fh, pct, rot: ("fg", img.path, fw, fh))
+    monkeypatch.setattr(viewer, "compose_background",
+                        lambda img, sw, sh, pct, blur: ("bg", img.path, blur))
+
+    def build():
+        dw = viewer.DisplayWindow.__new__(viewer.DisplayWindow)
+        dw.running = True
+        dw.current_mode = "random_image"
+        dw.disp_name = "HDMI-1"
+        dw.disp_cfg = {}
+        dw.image_list = ["a.jpg", "b.jpg", "c.jpg"]
+        dw.play_order = None
+        dw.playlist_key = None
+        dw.index = -1
+        dw.last_displayed_path = None
+        dw.overlay_config = {}
+        dw.fg_scale_percent = dw.bg_scale_percent = 100
+        dw.bg_blur_radius = 8
+        dw.decode_bounds = (1920, 1080)
+        dw.cache_budget_mb = 128
+        dw.image_cache = viewer.ImageCache()
+        dw.current_movie = None
+        dw.gif_timer = FakeTimer()
+        dw.gif_frames = None
+        dw.gif_frames_pending = None
+        dw.next_frame = None
+        dw.swap_times = []
+        dw.swap_precomposed = 0
+        dw.render_stats = render_stats.RenderStats(dw.disp_name)
+        dw.foreground_label = FakeLabel(1920, 1080)
+        dw.bg_label = FakeLabel(1920, 1080)
+        dw.spotify_info_label = FakeLabel(0, 0)
+        dw.main_widget = types.SimpleNamespace(rect=lambda: FakeSize(1920, 1080))
+        dw.load_and_cache_image = lambda path, bounds=None: {
+            "type": "static", "image": FakeImage(path), "bytes": 1}
+        dw.prefetch_next_image = lambda: None
+        dw.shown = []
+        dw.show_foreground_image = lambda path, is_spotify=False: dw.shown.append(path)
+        return dw
 
-if "PySide6.QtWebEngineCore" not in sys.modules:
-    qtwebengine_core = types.ModuleType("PySide6.QtWebEngineCore")
-    qtwebengine_core.QWebEngineSettings = type(
-        "QWebEngineSettings",
-        (),
-        {
-            "PlaybackRequiresUserGesture": object(),
-            "defaultSettings": staticmethod(
-                lambda: types.SimpleNamespace(setAttribute=lambda *args, **kwargs: None)
-            ),
-            "globalSettings": staticmethod(
-                lambda: types.SimpleNamespace(setAttribute=lambda *args, **kwargs: None)
-            ),
-        },
-    )
-    sys.modules["PySide6.QtWebEngineCore"] = qtwebengine_core
+    return build
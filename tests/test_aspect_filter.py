@@ -1,5 +1,7 @@
 import os
 import sys
+import threading
+import time
 import types
 
 import pytest
@@ -48,7 +50,7 @@ qtcore.QRectF = object
 qtcore.QUrl = object
 
 qtgui = types.ModuleType("PySide6.QtGui")
-for name in ["QPixmap", "QMovie", "QPainter", "QImage", "QImageReader", "QTransform", "QFont"]:
+for name in ["QPixmap", "QMovie", "QPainter", "QImage", "QImageIOHandler", "QImageReader", "QTransform", "QFont"]:
     setattr(qtgui, name, type(name, (), {}))
 
 qtwidgets = types.ModuleType("PySide6.QtWidgets")
@@ -114,7 +116,8 @@ REPO_ROOT = os.path.dirname(os.path.dirname(__file__))
 sys.path.insert(0, REPO_ROOT)
 sys.path.insert(0, os.path.join(REPO_ROOT, "echoview"))
 
-from echoview import utils, viewer  # noqa: E402
+from echoview import media_index, utils, viewer  # noqa: E402
+from echoview.video_probe import VideoInfo  # noqa: E402
 
 
 def _make_image(path, size):
@@ -136,21 +139,121 @@ def test_media_aspect_label_images(tmp_path):
     assert utils.media_aspect_label(portrait) == "portrait"
 
 
-def test_filter_by_aspect_uses_cache(monkeypatch):
+def test_filter_by_aspect_uses_cache(monkeypatch, tmp_path):
     dw = viewer.DisplayWindow.__new__(viewer.DisplayWindow)
     dw.disp_cfg = {"aspect_filter": "square"}
-    dw.aspect_cache = {}
 
-    labels = {
-        "/tmp/a.jpg": "square",
-        "/tmp/b.jpg": "landscape",
-        "/tmp/c.jpg": "portrait",
-    }
+    dims = {"a.jpg": (100, 100), "b.jpg": (160, 90), "c.jpg": (90, 160)}
+    paths = []
+    for name in dims:
+        (tmp_path / name).write_text("x")
+        paths.append(str(tmp_path / name))
+
+    probes = []
+
+    def fake_dimensions(path):
+        probes.append(path)
+        return dims[os.path.basename(path)]
 
-    monkeypatch.setattr(viewer, "media_aspect_label", lambda p: labels.get(p, "unknown"))
+    monkeypatch.setattr(media_index, "media_dimensions", fake_dimensions)
 
-    result = viewer.DisplayWindow._filter_by_aspect(dw, list(labels.keys()))
-    assert result == ["/tmp/a.jpg"]
-    # Second call should hit cache and produce same result
-    result2 = viewer.DisplayWindow._filter_by_aspect(dw, list(labels.keys()))
+    result = viewer.DisplayWindow._filter_by_aspect(dw, paths)
+    assert result == [str(tmp_path / "a.jpg")]
+    assert len(probes) == 3
+
+    # Second call, and a fresh index as after a restart, should hit the
+    # persistent cache and produce the same result without probing.
+    result2 = viewer.DisplayWindow._filter_by_aspect(dw, paths)
     assert result2 == result
+    fresh = media_index.MediaIndex(media_index.MEDIA_INDEX_PATH)
+    assert fresh.aspect_labels(paths)[paths[1]] == "landscape"
+    assert len(probes) == 3
+
+
+def test_aspect_cache_invalidated_when_file_changes(monkeypatch, tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_text("x")
+    current = {"dims": (100, 100)}
+    monkeypatch.setattr(media_index, "media_dimensions", lambda p: current["dims"])
+    index = media_index.get_media_index()
+
+    assert index.aspect_label(path) == "square"
+
+    current["dims"] = (90, 160)
+    path.write_text("changed")
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 5))
+    index.refresh_file(path)
+    assert index.aspect_label(path) == "portrait"
+
+    current["dims"] = (160, 90)
+    index.invalidate_metadata(tmp_path)
+    assert index.aspect_label(path) == "landscape"
+
+
+def test_warm_probes_only_uncached_files(monkeypatch, tmp_path):
+    for name in ("a.jpg", "b.png", "c.mp4"):
+        (tmp_path / name).write_text("x")
+    probes = []
+    monkeypatch.setattr(media_index, "media_dimensions", lambda p: probes.append(p) or (16, 9))
+    monkeypatch.setattr(
+        media_index,
+        "probe_videos",
+        lambda paths: {p: probes.append(p) or VideoInfo(16, 9, 12.5, "h264") for p in paths},
+    )
+    index = media_index.get_media_index()
+
+    assert index.warm([tmp_path]) == 3
+    assert index.warm([tmp_path]) == 0
+    assert len(probes) == 3
+    assert index.video_info([tmp_path / "c.mp4"]) == {
+        str(tmp_path / "c.mp4"): VideoInfo(16, 9, 12.5, "h264")
+    }
+    assert len(probes) == 3
+
+
+def test_filter_by_aspect_probes_videos_in_background(monkeypatch, tmp_path):
+    dw = viewer.DisplayWindow.__new__(viewer.DisplayWindow)
+    dw.prefetch_futures = {}
+    dw.disp_cfg = {"aspect_filter": "portrait"}
+    dw.current_mode = "videos"
+    dw.current_video_proc = None
+    dw.image_list = []
+    dw.index = 0
+    dw.aspect_probe_id = 0
+    dw.aspect_probe_paths = None
+    dw.ui_tasks = viewer.queue.SimpleQueue()
+    started = []
+    dw.next_image = lambda force=False: started.append(force)
+
+    dims = {"a.mp4": (1080, 1920), "b.mp4": (1920, 1080), "c.mp4": (720, 1280)}
+    paths = []
+    for name in dims:
+        (tmp_path / name).write_text("x")
+        paths.append(str(tmp_path / name))
+
+    release = threading.Event()
+
+    def slow_probe(batch):
+        release.wait(5)
+        return {p: VideoInfo(*dims[os.path.basename(p)]) for p in batch}
+
+    monkeypatch.setattr(media_index, "probe_videos", slow_probe)
+
+    # Nothing is cached yet, so the UI thread gets an empty list right away.
+    dw.image_list = viewer.DisplayWindow._filter_by_aspect(dw, paths)
+    assert dw.image_list == []
+    assert dw.aspect_probe_paths == paths
+
+    release.set()
+    deadline = time.time() + 5
+    while dw.ui_tasks.empty() and time.time() < deadline:
+        time.sleep(0.01)
+    dw._run_ui_tasks()
+
+    assert dw.image_list == [paths[0], paths[2]]
+    assert dw.aspect_probe_paths is None
+    assert started == [True]
+
+    # Labels are cached now, so a rebuild filters synchronously.
+    assert viewer.DisplayWindow._filter_by_aspect(dw, paths) == [paths[0], paths[2]]
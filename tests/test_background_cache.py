@@ -0,0 +1,123 @@
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+
+class FakeImage:
+    """QImage stand-in: 'encodes' to its payload bytes."""
+
+    def __init__(self, source=None):
+        self.data = b""
+        if isinstance(source, bytes):
+            self.data = source
+        elif source and os.path.exists(source):
+            with open(source, "rb") as f:
+                self.data = f.read()
+
+    def isNull(self):
+        return not self.data
+
+    def save(self, path, fmt, quality):
+        with open(path, "wb") as f:
+            f.write(self.data)
+        return True
+
+
+@pytest.fixture
+def bgcache(tmp_path, monkeypatch):
+    if "PySide6.QtGui" not in sys.modules:
+        qtgui = types.ModuleType("PySide6.QtGui")
+        qtgui.QImage = FakeImage
+        monkeypatch.setitem(sys.modules, "PySide6.QtGui", qtgui)
+    monkeypatch.delitem(sys.modules, "echoview.background_cache", raising=False)
+    module = importlib.import_module("echoview.background_cache")
+    monkeypatch.setattr(module, "QImage", FakeImage)
+    monkeypatch.setattr(module, "BACKGROUND_CACHE_DIR", str(tmp_path / "bg"))
+    return module
+
+
+def test_backgrounds_round_trip_through_disk(bgcache, tmp_path):
+    cache = bgcache.BackgroundCache(budget_bytes=1000)
+    assert cache.get("k1") is None
+    assert cache.put("k1", FakeImage(b"x" * 100))
+    assert cache.get("k1").data == b"x" * 100
+    assert os.listdir(tmp_path / "bg") == ["k1.jpg"]
+    assert cache.total_bytes == 100 and len(cache) == 1
+
+
+def test_least_recently_used_backgrounds_are_evicted(bgcache, tmp_path):
+    cache = bgcache.BackgroundCache(budget_bytes=250)
+    cache.put("a", FakeImage(b"a" * 100))
+    cache.put("b", FakeImage(b"b" * 100))
+    assert cache.get("a") is not None  # a is now the most recently used
+    cache.put("c", FakeImage(b"c" * 100))
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert sorted(os.listdir(tmp_path / "bg")) == ["a.jpg", "c.jpg"]
+
+    cache.configure(150)
+    assert list(cache._index()) == ["c"] and cache.total_bytes == 100
+
+
+def test_cache_order_survives_a_restart(bgcache, tmp_path):
+    cache = bgcache.BackgroundCache(budget_bytes=1000)
+    for key in ["old", "new", "mid"]:
+        cache.put(key, FakeImage(b"z" * 10))
+    folder = tmp_path / "bg"
+    os.utime(folder / "old.jpg", (1000, 1000))
+    os.utime(folder / "mid.jpg", (2000, 2000))
+    os.utime(folder / "new.jpg", (3000, 3000))
+    (folder / "stray.tmp").write_bytes(b"partial")
+
+    again = bgcache.BackgroundCache(budget_bytes=1000)
+    assert list(again._index()) == ["old", "mid", "new"]
+    assert again.total_bytes == 30
+
+
+def test_unreadable_background_is_dropped(bgcache, tmp_path):
+    cache = bgcache.BackgroundCache()
+    cache.put("k", FakeImage(b"data"))
+    (tmp_path / "bg" / "k.jpg").write_bytes(b"")
+    assert cache.get("k") is None
+    assert "k" not in cache and not (tmp_path / "bg" / "k.jpg").exists()
+
+
+def test_background_key_tracks_file_and_settings(bgcache, tmp_path):
+    photo = tmp_path / "photo.jpg"
+    photo.write_bytes(b"jpeg")
+    key = bgcache.background_key(str(photo), 1920, 1080, 20, 100)
+    assert key == bgcache.background_key(str(photo), 1920, 1080, 20, 100)
+    assert key != bgcache.background_key(str(photo), 1280, 720, 20, 100)
+    assert key != bgcache.background_key(str(photo), 1920, 1080, 10, 100)
+    assert key != bgcache.background_key(str(photo), 1920, 1080, 20, 50)
+    os.utime(photo, ns=(1, 1))
+    assert key != bgcache.background_key(str(photo), 1920, 1080, 20, 100)
+
+    # Nothing to gain without a blur, and no key for missing files.
+    assert bgcache.background_key(str(photo), 1920, 1080, 0, 100) is None
+    assert bgcache.background_key(str(tmp_path / "gone.jpg"), 1920, 1080, 20, 100) is None
+    assert bgcache.background_key(None, 1920, 1080, 20, 100) is None
+
+
+def test_looping_folder_blurs_each_background_once(slideshow_window, tmp_path, monkeypatch):
+    from echoview import viewer
+
+    dw = slideshow_window()
+    dw.image_list = []
+    for name in ("a.jpg", "b.jpg", "c.jpg"):
+        (tmp_path / name).write_bytes(b"jpeg")
+        dw.image_list.append(str(tmp_path / name))
+    stored = {}
+    monkeypatch.setattr(viewer, "get_background_cache", lambda: types.SimpleNamespace(
+        get=stored.get, put=stored.__setitem__))
+    composed = []
+    monkeypatch.setattr(viewer, "compose_background",
+                        lambda img, sw, sh, pct, blur: composed.append(img.path) or ("bg", img.path))
+
+    for _ in range(3):
+        for path in dw.image_list:
+            dw._compose_frame(dw._frame_key(path))
+    assert composed == dw.image_list
+    assert len(stored) == 3
@@ -0,0 +1,48 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def blur(monkeypatch):
+    """echoview.blur with its Qt imports stubbed unless another test already did."""
+    for name, attr in (("PySide6.QtCore", "Qt"), ("PySide6.QtGui", "QImage")):
+        if name not in sys.modules:
+            stub = types.ModuleType(name)
+            setattr(stub, attr, type(attr, (), {}))
+            monkeypatch.setitem(sys.modules, name, stub)
+    monkeypatch.delitem(sys.modules, "echoview.blur", raising=False)
+    return importlib.import_module("echoview.blur")
+
+
+@pytest.mark.parametrize("sigma", [0.8, 2.5, 6.0, 12.0])
+def test_box_sizes_match_the_gaussian_variance(blur, sigma):
+    widths = blur.box_sizes(sigma)
+    assert len(widths) == blur.BOX_PASSES
+    assert all(w % 2 == 1 for w in widths)
+    variance = sum((w * w - 1) / 12.0 for w in widths)
+    assert variance == pytest.approx(sigma * sigma, rel=0.15)
+
+
+def test_box_blur_spreads_an_impulse_like_a_gaussian(blur):
+    pixels = np.zeros((1, 101, 1), dtype=np.uint8)
+    pixels[0, 50, 0] = 255
+    out = blur.box_blur(pixels, 5.0)[0, :, 0]
+    assert out.sum() == pytest.approx(255, rel=1e-4)
+    x = np.arange(101) - 50
+    spread = np.sqrt((out * x * x).sum() / out.sum())
+    assert spread == pytest.approx(5.0, rel=0.1)
+    assert out.argmax() == 50
+
+
+def test_box_blur_extends_edges_instead_of_darkening_them(blur):
+    pixels = np.full((20, 30, 4), 200, dtype=np.uint8)
+    out = blur.box_blur(pixels, 4.0)
+    assert np.allclose(out, 200, atol=1e-3)
+    # Windows wider than the image itself.
+    tiny = np.full((2, 1, 4), 90, dtype=np.uint8)
+    assert np.allclose(blur.box_blur(tiny, 6.0), 90, atol=1e-3)
@@ -22,10 +22,15 @@ def test_upgrade_config_adds_missing_display_keys_without_overwriting_existing()
     assert display["youtube_captions"] is False
     assert display["youtube_quality"] == "default"
     assert display["aspect_filter"] == "any"
+    assert display["include_subfolders"] is False
+    assert cfg["cache_budget_mb"] == 128
+    assert cfg["background_cache_mb"] == 256
 
 
 def test_upgrade_config_is_noop_when_display_config_is_current():
     cfg = {
+        "cache_budget_mb": 64,
+        "background_cache_mb": 512,
         "displays": {
             "HDMI-1": {
                 "embed_metadata": {"embed_type": "iframe"},
@@ -35,6 +40,7 @@ def test_upgrade_config_is_noop_when_display_config_is_current():
                 "youtube_captions": True,
                 "youtube_quality": "hd1080",
                 "aspect_filter": "portrait",
+                "include_subfolders": True,
             }
         }
     }
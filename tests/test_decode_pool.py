@@ -0,0 +1,64 @@
+import threading
+
+from echoview.decode_pool import DecodePool
+
+
+def test_prefetches_of_the_same_key_share_one_decode():
+    pool = DecodePool(workers=1)
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "image"
+
+    first = pool.prefetch("a", loader)
+    second = pool.prefetch("a", loader)
+    assert first is second
+    release.set()
+    assert first.result(5) == "image"
+    assert calls == [1]
+    assert not pool.in_flight("a")
+
+
+def test_load_joins_running_decode_and_takes_over_queued_one():
+    pool = DecodePool(workers=1)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append("slow")
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    running = pool.prefetch("busy", slow)
+    queued = pool.prefetch("next", lambda: calls.append("queued") or "queued")
+    started.wait(5)
+
+    # "next" is stuck behind "busy": decode it on the calling thread instead.
+    assert pool.load("next", lambda: "inline") == "inline"
+    assert queued.cancelled()
+
+    waiter = []
+    t = threading.Thread(target=lambda: waiter.append(pool.load("busy", lambda: "again")))
+    t.start()
+    release.set()
+    t.join(5)
+    assert waiter == ["slow"] and running.result() == "slow"
+    assert calls == ["slow"]
+
+
+def test_cancel_drops_queued_work_only_when_unreferenced():
+    pool = DecodePool(workers=1)
+    release = threading.Event()
+    pool.prefetch("busy", lambda: release.wait(5))
+    queued = pool.prefetch("x", lambda: "x")
+    pool.prefetch("x", lambda: "x")
+
+    pool.cancel("x")
+    assert not queued.cancelled()
+    pool.cancel("x")
+    assert queued.cancelled() and not pool.in_flight("x")
+    release.set()
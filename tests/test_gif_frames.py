@@ -0,0 +1,190 @@
+import importlib
+import sys
+import threading
+import types
+
+import pytest
+
+
+class FakeFrame:
+    def __init__(self, w, h, tag=None):
+        self.w, self.h, self.tag = w, h, tag
+
+    def isNull(self):
+        return self.w == 0
+
+    def width(self):
+        return self.w
+
+    def height(self):
+        return self.h
+
+    def convertToFormat(self, fmt):
+        return self
+
+    def sizeInBytes(self):
+        return self.w * self.h * 4
+
+
+class FakeReader:
+    frames = []
+    loops = -1
+
+    def __init__(self, path):
+        self.queue = list(self.frames)
+        self.delay = 0
+
+    def setAutoDetectImageFormat(self, on):
+        pass
+
+    def read(self):
+        if not self.queue:
+            return FakeFrame(0, 0)
+        frame, self.delay = self.queue.pop(0)
+        return frame
+
+    def nextImageDelay(self):
+        return self.delay
+
+    def loopCount(self):
+        return self.loops
+
+
+@pytest.fixture
+def gif_frames(monkeypatch):
+    """echoview.gif_frames with a fake reader and scaler."""
+    stubs = {
+        "PySide6.QtCore": {"Qt": type("Qt", (), {})},
+        "PySide6.QtGui": {name: type(name, (), {}) for name in
+                          ("QImage", "QImageReader", "QPainter", "QTransform")},
+    }
+    for name, attrs in stubs.items():
+        if name not in sys.modules:
+            stub = types.ModuleType(name)
+            for attr, value in attrs.items():
+                setattr(stub, attr, value)
+            monkeypatch.setitem(sys.modules, name, stub)
+    module = importlib.import_module("echoview.gif_frames")
+    monkeypatch.setattr(module, "QImageReader", FakeReader)
+    monkeypatch.setattr(module, "QImage", types.SimpleNamespace(Format_ARGB32_Premultiplied=0))
+    scaled = []
+
+    def scale_foreground(image, bw, bh, percent, rotate):
+        scaled.append((image.tag, bw, bh, percent, rotate))
+        return FakeFrame(bw, bh, image.tag)
+
+    monkeypatch.setattr(module, "scale_foreground", scale_foreground)
+    module.scaled = scaled
+    return module
+
+
+def test_frames_are_scaled_once_with_their_delays(gif_frames):
+    FakeReader.frames = [(FakeFrame(400, 200, "a"), 80), (FakeFrame(400, 200, "b"), 0)]
+    FakeReader.loops = 2
+    prepared = gif_frames.prepare_gif_frames("anim.gif", 1920, 1080, 50, 90)
+
+    assert gif_frames.scaled == [("a", 1920, 960, 50, 90), ("b", 1920, 960, 50, 90)]
+    assert [(f.tag, delay) for f, delay in prepared["frames"]] == [
+        ("a", 80), ("b", gif_frames.MIN_FRAME_DELAY_MS)]
+    assert prepared["loop_count"] == 2
+    assert prepared["bytes"] == 2 * 1920 * 960 * 4
+
+
+def test_frames_over_budget_are_not_prepared(gif_frames):
+    FakeReader.frames = [(FakeFrame(100, 100), 50)] * 10
+    assert gif_frames.prepare_gif_frames("anim.gif", 100, 100, budget_bytes=9 * 40_000) is None
+    assert gif_frames.prepare_gif_frames("anim.gif", 100, 100, budget_bytes=10 * 40_000)
+
+    FakeReader.frames = []
+    assert gif_frames.prepare_gif_frames("broken.gif", 100, 100) is None
+    assert gif_frames.prepare_gif_frames("anim.gif", 0, 0) is None
+
+
+def _wait_for_decode_pool():
+    from echoview.decode_pool import get_decode_pool
+
+    pool = get_decode_pool()
+    for _ in range(500):
+        if not pool._inflight:
+            return
+        threading.Event().wait(0.01)
+
+
+@pytest.fixture
+def gif_window(slideshow_window, monkeypatch):
+    """A slideshow window that really shows GIFs, at 50% foreground scale."""
+    from echoview import viewer
+
+    dw = slideshow_window()
+    del dw.show_foreground_image
+    load_static = dw.load_and_cache_image
+    dw.fg_scale_percent = 50
+    dw.ui_tasks = viewer.queue.SimpleQueue()
+    dw.make_background = lambda pm, path=None: None
+    dw.calc_bounding_for_window = lambda first_frame: (960, 540)
+    dw.load_and_cache_image = lambda path, bounds=None: {
+        "type": "gif", "path": path, "first_frame": load_static(path)["image"], "bytes": 1}
+    monkeypatch.setattr(viewer.os.path, "exists", lambda path: True)
+    return dw
+
+
+def _movie(frame=0):
+    return types.SimpleNamespace(
+        frameChanged=types.SimpleNamespace(connect=lambda slot: None),
+        start=lambda: None, stop=lambda: None, deleteLater=lambda: None,
+        currentFrameNumber=lambda: frame)
+
+
+def test_degraded_gif_plays_prepared_frames_with_their_delays(gif_window, monkeypatch):
+    from echoview import viewer
+
+    dw = gif_window
+    prepared = {"frames": [("f0", 40), ("f1", 100), ("f2", 60)], "loop_count": 1, "bytes": 3}
+    dw.image_cache.put(dw._gif_frames_key("anim.gif"), prepared, 3)
+    monkeypatch.setattr(viewer, "QMovie", lambda path: pytest.fail("QMovie used"))
+
+    dw.show_foreground_image("anim.gif")
+    for _ in range(5):  # the timer firing
+        dw._show_gif_frame()
+    # Two passes (loop_count 1 repeats once), then it stays on the last frame.
+    assert dw.gif_timer.started == [40, 100, 60, 40, 100]
+    assert dw.foreground_label.pixmap.source == "f2"
+
+
+def test_degraded_gif_switches_to_prepared_frames_when_ready(gif_window, monkeypatch):
+    from echoview import viewer
+
+    dw = gif_window
+    movie = _movie(frame=1)
+    monkeypatch.setattr(viewer, "QMovie", lambda path: movie)
+    monkeypatch.setattr(viewer, "prepare_gif_frames", lambda path, fw, fh, pct, rot: {
+        "frames": [("f0", 40), ("f1", 50), ("f2", 60)], "loop_count": -1, "bytes": 3})
+
+    dw.show_foreground_image("anim.gif")
+    assert dw.current_movie is movie and dw.handling_gif_frames
+    _wait_for_decode_pool()
+    dw._run_ui_tasks()
+    # Picks up after the frame QMovie was showing.
+    assert dw.current_movie is None and dw.foreground_label.pixmap.source == "f2"
+    assert dw.gif_timer.started == [60]
+    assert dw.image_cache.get(dw._gif_frames_key("anim.gif"))["bytes"] == 3
+
+
+def test_gif_too_large_to_prepare_keeps_the_per_frame_path(gif_window, monkeypatch):
+    from echoview import viewer
+
+    dw = gif_window
+    movies = []
+    prepared = []
+    monkeypatch.setattr(viewer, "QMovie", lambda path: movies.append(_movie()) or movies[-1])
+    monkeypatch.setattr(viewer, "prepare_gif_frames",
+                        lambda *a: prepared.append(a) and None)
+    monkeypatch.setattr(viewer, "log_message", lambda msg: None)
+
+    dw.show_foreground_image("huge.gif")
+    _wait_for_decode_pool()
+    dw._run_ui_tasks()
+    assert dw.current_movie is movies[0]
+    dw.show_foreground_image("huge.gif")
+    _wait_for_decode_pool()
+    assert len(movies) == 2 and len(prepared) == 1
@@ -0,0 +1,32 @@
+from echoview.image_cache import ImageCache
+
+
+def test_cache_evicts_by_bytes_and_rejects_oversized_entries():
+    cache = ImageCache(budget_bytes=100, capacity=10)
+    assert cache.put("a", "A", 40) and cache.put("b", "B", 40)
+    assert cache.get("a") == "A"  # a is now the most recently used
+    assert cache.put("c", "C", 40)
+    assert "b" not in cache and cache.total_bytes == 80
+
+    assert not cache.put("huge", "H", 101)
+    assert "huge" not in cache and len(cache) == 2
+
+    cache.configure(budget_bytes=100, capacity=1)
+    assert list(cache._entries) == ["c"] and cache.total_bytes == 40
+    assert cache.pop("c") == "C" and cache.total_bytes == 0
+
+
+def test_cache_counts_hits_and_misses_per_owner():
+    cache = ImageCache()
+    cache.put(("a.jpg", (800, 800)), "A", 10)
+    cache.put(("b.jpg", (800, 800)), "B", 10)
+    cache.get(("a.jpg", (800, 800)), owner="Display0")
+    cache.get(("c.jpg", (800, 800)), owner="Display0")
+    cache.get(("a.jpg", (800, 800)), owner="Display1")
+    cache.get(("a.jpg", (800, 800)))
+    assert cache.counts("Display0") == (1, 1)
+    assert cache.counts("Display1") == (1, 0)
+    assert cache.counts("Display2") == (0, 0)
+
+    assert cache.discard_if(lambda key: key[0] == "a.jpg") == 1
+    assert len(cache) == 1 and cache.total_bytes == 10
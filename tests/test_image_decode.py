@@ -0,0 +1,187 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class FakeSize:
+    def __init__(self, w, h):
+        self.w, self.h = w, h
+
+    def width(self):
+        return self.w
+
+    def height(self):
+        return self.h
+
+    def isValid(self):
+        return self.w > 0 and self.h > 0
+
+
+class FakeImage:
+    Format_RGB32 = 4
+
+    def __init__(self, w=0, h=0, fmt=None):
+        self.w, self.h = w, h
+
+    def isNull(self):
+        return self.w == 0
+
+    def width(self):
+        return self.w
+
+    def height(self):
+        return self.h
+
+
+class FakePainter:
+    drawn = []
+
+    def __init__(self, image):
+        pass
+
+    def drawImage(self, x, y, image):
+        self.drawn.append((y, image.h))
+
+    def end(self):
+        pass
+
+
+class FakeReader:
+    """Header sizes by path; records every clip rect and scaled size read."""
+
+    sizes = {}
+    clip_formats = (".jpg",)
+    auto_transform = False
+    reads = []
+
+    def __init__(self, path):
+        self.path = path
+        self.clip = None
+        self.scaled = None
+
+    def setAutoDetectImageFormat(self, on):
+        pass
+
+    def setAutoTransform(self, on):
+        pass
+
+    def autoTransform(self):
+        return self.auto_transform
+
+    def supportsOption(self, option):
+        return self.path.endswith(self.clip_formats)
+
+    def size(self):
+        return FakeSize(*self.sizes[self.path])
+
+    def setClipRect(self, rect):
+        self.clip = rect
+
+    def setScaledSize(self, size):
+        self.scaled = size
+
+    def read(self):
+        self.reads.append((self.clip, self.scaled and (self.scaled.w, self.scaled.h)))
+        size = self.scaled or self.size()
+        return FakeImage(size.w, size.h)
+
+
+@pytest.fixture
+def decode(monkeypatch):
+    """echoview.image_decode with fake Qt image classes."""
+    stubs = {
+        "PySide6.QtCore": ("QRect", "QSize"),
+        "PySide6.QtGui": ("QImage", "QImageIOHandler", "QImageReader", "QPainter", "QTransform"),
+    }
+    for name, attrs in stubs.items():
+        if name not in sys.modules:
+            stub = types.ModuleType(name)
+            for attr in attrs:
+                setattr(stub, attr, type(attr, (), {}))
+            monkeypatch.setitem(sys.modules, name, stub)
+    module = importlib.import_module("echoview.image_decode")
+    monkeypatch.setattr(module, "QImageReader", FakeReader)
+    monkeypatch.setattr(module, "QImageIOHandler", types.SimpleNamespace(ClipRect="clip"))
+    monkeypatch.setattr(module, "QImage", FakeImage)
+    monkeypatch.setattr(module, "QPainter", FakePainter)
+    monkeypatch.setattr(module, "QRect", lambda x, y, w, h: (x, y, w, h))
+    monkeypatch.setattr(module, "QSize", FakeSize)
+    monkeypatch.setattr(module, "log_message", lambda msg: None)
+    FakeReader.auto_transform = False
+    FakeReader.reads = []
+    FakePainter.drawn = []
+    return module
+
+
+def test_target_covers_the_screen_but_caps_panoramas(decode):
+    assert decode.target_size(6000, 4000, (1920, 1080)) == (1920, 1280)
+    assert decode.target_size(800, 600, (1920, 1080)) == (800, 600)
+    # 30000x4000 would cover 1920x1080 at 8100x1080; capped at 4 screens.
+    w, h = decode.target_size(30000, 4000, (1920, 1080))
+    assert w * h <= 4 * 1920 * 1080 and w == pytest.approx(7.5 * h, rel=0.01)
+    assert decode.dct_scale(30000, 4000, w, h) == 2
+    assert decode.dct_scale(6000, 4000, 1920, 1280) == 2
+    assert decode.dct_scale(800, 600, 800, 600) == 1
+
+
+def test_images_are_decoded_to_cover_the_window(decode):
+    FakeReader.sizes = {"big.jpg": (6000, 4000), "tall.jpg": (3000, 6000),
+                        "small.png": (800, 600), "odd.xyz": (-1, -1)}
+
+    def decoded_size(path, bounds):
+        image = decode.read_scaled_image(path, bounds)
+        return image.w, image.h
+
+    # 24 MP landscape: just enough to cover 1920x1080.
+    assert decoded_size("big.jpg", (1920, 1080)) == (1920, 1280)
+    # Portrait: the width has to cover the screen, the height overflows.
+    assert decoded_size("tall.jpg", (1920, 1080)) == (1920, 3840)
+    # Never upscaled.
+    assert decoded_size("small.png", (1920, 1080)) == (800, 600)
+    # No window size yet: capped instead of decoded whole.
+    assert decoded_size("big.jpg", (0, 0)) == (3464, 2309)
+    # Unknown size (unsupported header): decode as is.
+    assert decoded_size("odd.xyz", (1920, 1080)) == (-1, -1)
+
+    # EXIF rotation is applied after decoding, so cover both orientations.
+    FakeReader.auto_transform = True
+    assert decoded_size("big.jpg", (1920, 1080)) == (2880, 1920)
+
+
+def test_photo_is_read_in_one_scaled_read(decode):
+    FakeReader.sizes = {"photo.jpg": (6000, 4000)}
+    image = decode.read_scaled_image("photo.jpg", (1920, 1080))
+    assert (image.w, image.h) == (1920, 1280)
+    assert FakeReader.reads == [(None, (1920, 1280))]
+
+
+@pytest.mark.parametrize("size", [(30000, 4000), (120000, 12000), (4000, 80000)])
+def test_huge_jpeg_is_read_in_stripes_within_budget(decode, size):
+    iw, ih = size
+    FakeReader.sizes = {"pano.jpg": size}
+    image = decode.read_scaled_image("pano.jpg", (1920, 1080))
+    tw, th = decode.target_size(iw, ih, (1920, 1080))
+    assert (image.w, image.h) == (tw, th)
+
+    d = decode.dct_scale(iw, ih, tw, th)
+    clips = [clip for clip, _ in FakeReader.reads]
+    assert len(clips) > 1
+    # The stripes tile the source top to bottom...
+    assert clips[0][1] == 0 and clips[-1][1] + clips[-1][3] == ih
+    assert all(a[1] + a[3] == b[1] for a, b in zip(clips, clips[1:]))
+    assert all(clip[2] == iw for clip in clips)
+    # ...each within the budget after DCT scaling...
+    assert all((iw // d) * (h // d) <= decode.DECODE_BUDGET_PIXELS for _, _, _, h in clips)
+    # ...and the target rows they are scaled to.
+    drawn = FakePainter.drawn
+    assert drawn[0][0] == 0 and drawn[-1][0] + drawn[-1][1] == th
+    assert all(a[0] + a[1] == b[0] for a, b in zip(drawn, drawn[1:]))
+
+
+def test_huge_image_that_cannot_be_clipped_is_refused(decode):
+    FakeReader.sizes = {"pano.png": (30000, 4000), "big.png": (6000, 4000)}
+    assert decode.read_scaled_image("pano.png", (1920, 1080)).isNull()
+    assert FakeReader.reads == []
+    assert not decode.read_scaled_image("big.png", (1920, 1080)).isNull()
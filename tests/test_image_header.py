@@ -0,0 +1,74 @@
+import io
+import struct
+import sys
+
+import pytest
+
+from echoview import image_header, utils
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+needs_pillow = pytest.mark.skipif(Image is None, reason="Pillow not installed")
+
+
+@needs_pillow
+@pytest.mark.parametrize(
+    "fmt, ext, kwargs",
+    [
+        ("JPEG", "jpg", {}),
+        ("JPEG", "jpg", {"progressive": True}),
+        ("PNG", "png", {}),
+        ("GIF", "gif", {}),
+        ("BMP", "bmp", {}),
+        ("WEBP", "webp", {"lossless": False}),
+        ("WEBP", "webp", {"lossless": True}),
+    ],
+)
+def test_read_image_size_matches_pillow(tmp_path, fmt, ext, kwargs):
+    path = tmp_path / f"img.{ext}"
+    Image.new("RGB", (321, 123), color=(10, 200, 30)).save(path, fmt, **kwargs)
+
+    assert image_header.read_image_size(path) == (321, 123)
+
+
+@needs_pillow
+def test_read_image_size_webp_extended(tmp_path):
+    path = tmp_path / "alpha.webp"
+    Image.new("RGBA", (50, 70), color=(0, 0, 0, 128)).save(path, "WEBP", exif=b"Exif\x00\x00")
+
+    assert image_header.read_image_size(path) == (50, 70)
+
+
+@needs_pillow
+def test_read_image_size_skips_large_jpeg_segments(tmp_path):
+    buf = io.BytesIO()
+    Image.new("RGB", (640, 480)).save(buf, "JPEG")
+    data = buf.getvalue()
+    # Insert a 60 KB APP1 segment (EXIF-sized) and fill bytes before the frame.
+    app1 = b"\xff\xe1" + struct.pack(">H", 60000) + b"\x00" * 59998
+    path = tmp_path / "exif.jpg"
+    path.write_bytes(data[:2] + app1 + b"\xff" + data[2:])
+
+    assert image_header.read_image_size(path) == (640, 480)
+
+
+def test_read_image_size_rejects_unknown_and_truncated(tmp_path):
+    text = tmp_path / "notes.jpg"
+    text.write_text("not an image")
+    truncated = tmp_path / "cut.png"
+    truncated.write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00")
+
+    assert image_header.read_image_size(text) == ()
+    assert image_header.read_image_size(truncated) == ()
+    assert image_header.read_image_size(tmp_path / "missing.gif") == ()
+
+
+def test_media_dimensions_prefers_header_parser(tmp_path, monkeypatch):
+    path = tmp_path / "tiny.gif"
+    path.write_bytes(b"GIF89a" + struct.pack("<HH", 12, 34) + b"\x00" * 16)
+    monkeypatch.setitem(sys.modules, "PIL", None)
+
+    assert utils.media_dimensions(str(path)) == (12, 34)
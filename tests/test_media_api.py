@@ -0,0 +1,98 @@
+import os
+
+import pytest
+from flask import Flask
+
+from echoview.web import routes
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Call the api_media view for a query; returns (status, json)."""
+    monkeypatch.setattr(routes, "IMAGE_DIR", str(tmp_path))
+    app = Flask(__name__)
+
+    def call(**query):
+        with app.test_request_context("/api/media", query_string=query):
+            resp = routes.api_media()
+            status = 200
+            if isinstance(resp, tuple):
+                resp, status = resp
+            return status, resp.get_json()
+
+    return call
+
+
+def _pages(api, **params):
+    names, cursor = [], None
+    while True:
+        query = dict(params, limit=2)
+        if cursor:
+            query["cursor"] = cursor
+        _, data = api(**query)
+        names.append([item["name"] for item in data["items"]])
+        cursor = data["next_cursor"]
+        if not cursor:
+            return names
+
+
+def test_api_media_pages_by_name(api, tmp_path):
+    photos = tmp_path / "Photos"
+    photos.mkdir()
+    for name in ("e.jpg", "a.jpg", "c.gif", "b.png", "d.mp4", "notes.txt"):
+        (photos / name).write_text("x")
+
+    assert _pages(api, folder="Photos") == [
+        ["a.jpg", "b.png"], ["c.gif", "d.mp4"], ["e.jpg"],
+    ]
+    assert _pages(api, folder="Photos", sort="name_desc", type="image") == [
+        ["e.jpg", "c.gif"], ["b.png", "a.jpg"],
+    ]
+
+    assert api(folder="Photos", type="video") == (200, {
+        "folder": "Photos",
+        "items": [{
+            "name": "d.mp4",
+            "path": "Photos/d.mp4",
+            "kind": "video",
+            "size": 1,
+            "mtime": os.stat(photos / "d.mp4").st_mtime,
+        }],
+        "next_cursor": None,
+    })
+
+
+def test_api_media_cursor_is_stable_across_changes(api, tmp_path):
+    folder = tmp_path / "Days"
+    folder.mkdir()
+    for i, name in enumerate(("a.jpg", "b.jpg", "c.jpg", "d.jpg")):
+        (folder / name).write_text("x")
+        os.utime(folder / name, (1000 + i, 1000 + i))
+
+    _, page = api(folder="Days", sort="date_desc", limit=2)
+    assert [i["name"] for i in page["items"]] == ["d.jpg", "c.jpg"]
+
+    # A new upload and a deletion must not shift the next page.
+    (folder / "new.jpg").write_text("x")
+    os.remove(folder / "d.jpg")
+    st = os.stat(folder)
+    os.utime(folder, (st.st_atime, st.st_mtime + 5))
+
+    _, page = api(folder="Days", sort="date_desc", limit=2, cursor=page["next_cursor"])
+    assert [i["name"] for i in page["items"]] == ["b.jpg", "a.jpg"]
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.parametrize("query", [
+    {"folder": "../etc"},
+    {"folder": "_hidden"},
+    {"folder": "_hidden/"},
+    {"folder": "_hidden/Sub"},
+    {"folder": "Photos/_hidden/Sub"},
+    {"folder": "", "type": "audio"},
+    {"folder": "", "sort": "size"},
+    {"folder": "", "cursor": "not-a-cursor"},
+    {"folder": "", "limit": "many"},
+])
+def test_api_media_rejects_bad_parameters(api, query):
+    assert api(**query)[0] == 400
@@ -0,0 +1,268 @@
+import contextlib
+import os
+import types
+
+from echoview import media_index, utils
+
+
+def _touch(path, data="x"):
+    path.write_text(data)
+    return path
+
+
+class _StatRecorder:
+    def __init__(self, entry, stats):
+        self._entry, self._stats = entry, stats
+        self.name = entry.name
+
+    def is_dir(self):
+        return self._entry.is_dir()
+
+    def stat(self):
+        self._stats.append(self.name)
+        return self._entry.stat()
+
+
+def _recording_scandir(stats):
+    real_scandir = os.scandir
+
+    @contextlib.contextmanager
+    def scandir(path):
+        with real_scandir(path) as it:
+            yield [_StatRecorder(e, stats) for e in it]
+
+    return scandir
+
+
+def test_list_files_filters_kinds_and_sorts(tmp_path):
+    _touch(tmp_path / "b.jpg")
+    _touch(tmp_path / "a.png")
+    _touch(tmp_path / "c.gif")
+    _touch(tmp_path / "clip.mp4")
+    _touch(tmp_path / "notes.txt")
+    (tmp_path / "Sub").mkdir()
+
+    index = media_index.get_media_index()
+
+    assert index.list_files(tmp_path, media_index.IMAGE_KINDS) == [
+        str(tmp_path / "a.png"),
+        str(tmp_path / "b.jpg"),
+        str(tmp_path / "c.gif"),
+    ]
+    assert index.list_files(tmp_path, media_index.VIDEO_KINDS) == [str(tmp_path / "clip.mp4")]
+    assert index.count_files(tmp_path) == 4
+    assert index.list_subfolders(tmp_path) == ["Sub"]
+
+
+def test_cached_listing_is_reused_until_folder_changes(tmp_path, monkeypatch):
+    _touch(tmp_path / "a.jpg")
+    index = media_index.get_media_index()
+    assert index.list_files(tmp_path) == [str(tmp_path / "a.jpg")]
+
+    scans = []
+    real_scan = media_index.MediaIndex._scan_folder
+
+    def counting_scan(self, *args, **kwargs):
+        scans.append(args[1])
+        return real_scan(self, *args, **kwargs)
+
+    monkeypatch.setattr(media_index.MediaIndex, "_scan_folder", counting_scan)
+    assert index.list_files(tmp_path) == [str(tmp_path / "a.jpg")]
+    assert scans == []
+
+    _touch(tmp_path / "b.jpg")
+    # Make sure the directory mtime differs even on coarse-grained filesystems.
+    st = os.stat(tmp_path)
+    os.utime(tmp_path, (st.st_atime, st.st_mtime + 5))
+    assert index.list_files(tmp_path) == [str(tmp_path / "a.jpg"), str(tmp_path / "b.jpg")]
+    assert scans == [str(tmp_path)]
+
+
+def test_expired_listing_only_stats_new_names(tmp_path, monkeypatch):
+    _touch(tmp_path / "a.jpg")
+    index = media_index.get_media_index()
+    assert [e["size"] for e in index.list_entries(tmp_path)] == [1]
+
+    # A rewrite in place and an upload the (lazy) folder mtime does not show.
+    st = os.stat(tmp_path)
+    _touch(tmp_path / "a.jpg", "xyz")
+    _touch(tmp_path / "b.jpg")
+    os.utime(tmp_path, (st.st_atime, st.st_mtime))
+    monkeypatch.setattr(media_index, "MAX_LISTING_AGE", 0)
+    stats = []
+    monkeypatch.setattr(media_index.os, "scandir", _recording_scandir(stats))
+
+    entries = index.list_entries(tmp_path)
+    assert [(e["name"], e["size"]) for e in entries] == [("a.jpg", 1), ("b.jpg", 1)]
+    assert stats == ["b.jpg"]
+
+    assert index.restat_folder(tmp_path) == [str(tmp_path / "a.jpg")]
+    assert [e["size"] for e in index.list_entries(tmp_path)] == [3, 1]
+    os.remove(tmp_path / "b.jpg")
+    assert index.restat_folder(tmp_path) == [str(tmp_path / "b.jpg")]
+    assert index.restat_folder(tmp_path) == []
+
+
+def test_refresh_and_remove_keep_index_in_sync(tmp_path):
+    index = media_index.get_media_index()
+    assert index.list_files(tmp_path) == []
+
+    new_file = _touch(tmp_path / "upload.jpg")
+    index.refresh_file(new_file)
+    entries = index.list_entries(tmp_path)
+    assert [e["name"] for e in entries] == ["upload.jpg"]
+    assert entries[0]["size"] == 1
+
+    os.remove(new_file)
+    index.remove_path(new_file)
+    assert index.list_files(tmp_path) == []
+
+
+def test_removed_folder_is_forgotten(tmp_path):
+    sub = tmp_path / "Trips"
+    sub.mkdir()
+    _touch(sub / "a.jpg")
+    index = media_index.get_media_index()
+    assert index.count_files(sub) == 1
+
+    os.remove(sub / "a.jpg")
+    sub.rmdir()
+    assert index.count_files(sub) == 0
+    assert index.list_subfolders(tmp_path) == []
+
+
+def test_falls_back_to_live_listing_without_database(tmp_path, monkeypatch):
+    _touch(tmp_path / "a.jpg")
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("")
+    monkeypatch.setattr(media_index, "MEDIA_INDEX_PATH", str(blocker / "media_index.db"))
+    logged = []
+    monkeypatch.setattr(media_index, "log_message", logged.append)
+
+    assert media_index.get_media_index().list_files(tmp_path) == [str(tmp_path / "a.jpg")]
+    assert logged and "Media index unavailable" in logged[0]
+
+
+def test_count_files_in_folder_uses_index(tmp_path):
+    folder = tmp_path / "Photos"
+    folder.mkdir()
+    _touch(folder / "a.jpg")
+    _touch(folder / "b.webm")
+    _touch(folder / "c.txt")
+    assert utils.count_files_in_folder(folder) == 2
+
+
+def test_folder_stats_follow_every_change(tmp_path, monkeypatch):
+    trips = tmp_path / "Trips"
+    trips.mkdir()
+    _touch(trips / "a.jpg", "aaaa")
+    _touch(trips / "b.gif", "bb")
+    _touch(trips / "c.mp4", "cccccc")
+    monkeypatch.setattr(media_index, "media_dimensions", lambda p: (90, 160))
+    index = media_index.get_media_index()
+
+    stats = index.folder_stats(trips)
+    assert stats["files"] == 3
+    assert stats["bytes"] == 12
+    assert stats["kinds"] == {"image": 1, "gif": 1, "video": 1}
+    assert stats["newest_mtime"] == max(os.stat(trips / n).st_mtime for n in ("a.jpg", "b.gif", "c.mp4"))
+    assert stats["aspects"]["unprobed"] == 3
+
+    index.aspect_labels([trips / "a.jpg", trips / "b.gif"])
+    stats = index.folder_stats(trips, media_index.IMAGE_KINDS)
+    assert stats["files"] == 2
+    assert stats["aspects"]["portrait"] == 2
+    assert stats["aspects"]["unprobed"] == 0
+
+    # Rename into another folder: both sides update without a rescan.
+    other = tmp_path / "Other"
+    other.mkdir()
+    assert index.count_files(other) == 0
+    os.rename(trips / "a.jpg", other / "a.jpg")
+    index.move_path(trips / "a.jpg", other / "a.jpg")
+    assert index.folder_stats(trips)["kinds"] == {"gif": 1, "video": 1}
+    assert index.folder_stats(other)["bytes"] == 4
+
+    os.remove(trips / "c.mp4")
+    index.remove_path(trips / "c.mp4")
+    stats = index.folder_stats(trips)
+    assert (stats["files"], stats["bytes"]) == (1, 2)
+    assert stats["newest_mtime"] == os.stat(trips / "b.gif").st_mtime
+
+
+def test_folder_stats_backfilled_for_older_databases(tmp_path):
+    _touch(tmp_path / "a.jpg")
+    _touch(tmp_path / "b.png")
+    index = media_index.get_media_index()
+    assert index.count_files(tmp_path) == 2
+
+    # Simulate a database created before the aggregates existed.
+    conn = index._connect()
+    conn.executescript(
+        "DROP TRIGGER media_stats_insert; DROP TRIGGER media_stats_delete;"
+        "DROP TRIGGER media_stats_update; DELETE FROM folder_stats;"
+    )
+    fresh = media_index.MediaIndex(media_index.MEDIA_INDEX_PATH)
+    assert fresh.folder_stats(tmp_path)["kinds"] == {"image": 2}
+
+
+def test_storage_stats_are_cached(monkeypatch):
+    calls = []
+
+    def fake_usage(path):
+        calls.append(path)
+        return types.SimpleNamespace(used=1, total=2)
+
+    monkeypatch.setattr(utils.shutil, "disk_usage", fake_usage)
+    monkeypatch.setattr(utils, "_storage_cache", {})
+    assert utils.get_storage_stats("/share") == (1, 2)
+    assert utils.get_storage_stats("/share") == (1, 2)
+    assert calls == ["/share"]
+
+
+def test_walk_folders_is_depth_first_and_skips_ignored(tmp_path, monkeypatch):
+    for rel in ("2023/Beach", "2023/_drafts/Old", "2023/Alps", "2024", "_trash"):
+        (tmp_path / rel).mkdir(parents=True)
+    _touch(tmp_path / "2023" / "Alps" / "a.jpg")
+    _touch(tmp_path / "2023" / "_drafts" / "Old" / "b.jpg")
+    _touch(tmp_path / "2024" / "c.jpg")
+    _touch(tmp_path / "2024" / "d.mp4")
+    index = media_index.get_media_index()
+
+    assert list(index.walk_folders(tmp_path)) == [
+        str(tmp_path),
+        str(tmp_path / "2023"),
+        str(tmp_path / "2023" / "Alps"),
+        str(tmp_path / "2023" / "Beach"),
+        str(tmp_path / "2024"),
+    ]
+    assert list(index.walk_files(tmp_path, media_index.IMAGE_KINDS)) == [
+        [str(tmp_path / "2023" / "Alps" / "a.jpg")],
+        [str(tmp_path / "2024" / "c.jpg")],
+    ]
+
+    monkeypatch.setattr(utils, "IMAGE_DIR", str(tmp_path))
+    assert utils.get_subfolders() == ["2023", "2024"]
+    assert utils.get_subfolders(recursive=True) == [
+        "2023", os.path.join("2023", "Alps"), os.path.join("2023", "Beach"), "2024",
+    ]
+
+
+def test_command_line_covers_nested_folders(tmp_path, monkeypatch, capsys):
+    (tmp_path / "Trips" / "2024" / "Alps").mkdir(parents=True)
+    (tmp_path / "Trips" / "_private").mkdir()
+    (tmp_path / "Pets").mkdir()
+    monkeypatch.setattr(media_index, "IMAGE_DIR", str(tmp_path))
+    seen = []
+    monkeypatch.setattr(media_index.MediaIndex, "invalidate_metadata",
+                        lambda self, folder: seen.append(folder))
+
+    assert media_index.main(["invalidate"]) == 0
+    assert seen == [str(tmp_path), str(tmp_path / "Pets"), str(tmp_path / "Trips"),
+                    str(tmp_path / "Trips" / "2024"), str(tmp_path / "Trips" / "2024" / "Alps")]
+    assert "for 5 folder(s)" in capsys.readouterr().out
+
+    seen.clear()
+    assert media_index.main(["invalidate", "Trips"]) == 0
+    assert seen == [str(tmp_path / "Trips"), str(tmp_path / "Trips" / "2024"),
+                    str(tmp_path / "Trips" / "2024" / "Alps")]
@@ -0,0 +1,105 @@
+import os
+import queue
+import time
+
+import pytest
+
+from echoview import media_index
+from echoview.media_watch import MediaDelta, MediaWatcher, _Inotify
+
+
+def _inotify_available():
+    try:
+        _Inotify().close()
+    except (OSError, AttributeError):
+        return False
+    return True
+
+
+def _collect(events, count, timeout=5):
+    """Gather at least *count* deltas from the callback queue."""
+    found = []
+    deadline = time.time() + timeout
+    while len(found) < count and time.time() < deadline:
+        try:
+            found.extend(events.get(timeout=0.1))
+        except queue.Empty:
+            pass
+    return found
+
+
+@pytest.mark.skipif(not _inotify_available(), reason="inotify not available")
+def test_inotify_reports_add_move_and_remove(tmp_path):
+    (tmp_path / "Trips").mkdir()
+    events = queue.Queue()
+    watcher = MediaWatcher(tmp_path, events.put)
+    watcher.start()
+    try:
+        # Wait until the watches are installed.
+        deadline = time.time() + 5
+        while watcher._inotify is None or len(watcher._inotify.paths) < 2:
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+        photo = tmp_path / "Trips" / "a.jpg"
+        photo.write_bytes(b"x")
+        (tmp_path / "Trips" / "notes.txt").write_text("ignored")
+        assert _collect(events, 1) == [MediaDelta("added", str(photo))]
+        assert media_index.get_media_index().list_files(tmp_path / "Trips") == [str(photo)]
+
+        renamed = tmp_path / "Trips" / "b.jpg"
+        os.rename(photo, renamed)
+        assert _collect(events, 1) == [MediaDelta("moved", str(photo), str(renamed))]
+
+        os.remove(renamed)
+        assert _collect(events, 1) == [MediaDelta("removed", str(renamed))]
+
+        # Files in a new folder are picked up, and the folder is watched.
+        new_dir = tmp_path / "New"
+        new_dir.mkdir()
+        deadline = time.time() + 5
+        while str(new_dir) not in watcher._inotify.paths.values():
+            assert time.time() < deadline
+            time.sleep(0.01)
+        (new_dir / "c.png").write_bytes(b"x")
+        assert MediaDelta("added", str(new_dir / "c.png")) in _collect(events, 1)
+    finally:
+        watcher.stop()
+
+
+def test_polling_fallback_diffs_changed_folders(tmp_path):
+    (tmp_path / "a.jpg").write_bytes(b"x")
+    (tmp_path / "Sub").mkdir()
+    watcher = MediaWatcher(tmp_path, lambda deltas: None, use_inotify=False)
+    watcher.setup()
+    assert watcher.poll() == []
+
+    (tmp_path / "b.jpg").write_bytes(b"x")
+    os.remove(tmp_path / "a.jpg")
+    (tmp_path / "Sub" / "c.mp4").write_bytes(b"x")
+    # Coarse directory mtimes on network shares: force a visible change.
+    for folder in (tmp_path, tmp_path / "Sub"):
+        st = os.stat(folder)
+        os.utime(folder, (st.st_atime, st.st_mtime + 5))
+
+    deltas = watcher.poll()
+    assert set(deltas) == {
+        MediaDelta("removed", str(tmp_path / "a.jpg")),
+        MediaDelta("added", str(tmp_path / "b.jpg")),
+        MediaDelta("added", str(tmp_path / "Sub" / "c.mp4")),
+    }
+    # Nothing changed since, so the next poll only stats the folders.
+    assert watcher.poll() == []
+
+
+def test_restat_reports_files_rewritten_in_place(tmp_path):
+    (tmp_path / "a.jpg").write_bytes(b"x")
+    watcher = MediaWatcher(tmp_path, lambda deltas: None, use_inotify=False)
+    watcher.setup()
+    st = os.stat(tmp_path)
+    (tmp_path / "a.jpg").write_bytes(b"xyz")
+    os.utime(tmp_path, (st.st_atime, st.st_mtime))
+
+    assert watcher.poll() == []
+    assert watcher.restat() == [MediaDelta("added", str(tmp_path / "a.jpg"))]
+    assert watcher.restat() == []
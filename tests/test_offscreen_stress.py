@@ -0,0 +1,116 @@
+"""
+Stress the image pipeline against real Qt on the offscreen platform.
+
+The other viewer tests stub PySide6 in sys.modules, so this one drives a real
+DisplayWindow in a child interpreter.  Decode workers must only produce
+QImages; a QPixmap made off the GUI thread shows up here as warnings, stalls
+or a crash under rapid slide changes.  Paced slide changes must be served by
+frames composed ahead of the timer.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SKIP_CODE = 77
+
+SCRIPT = r"""
+import os, sys, time
+
+try:
+    from PySide6.QtCore import QCoreApplication, qInstallMessageHandler
+    from PySide6.QtGui import QColor, QImage
+    from PySide6.QtWidgets import QApplication
+    from echoview import viewer
+    from echoview.decode_pool import get_decode_pool
+except ImportError as exc:
+    print(f"real PySide6 viewer unavailable: {exc}")
+    sys.exit(%(skip)d)
+
+warnings = []
+qInstallMessageHandler(lambda mode, ctx, msg: warnings.append(msg))
+
+app = QApplication([])
+image_dir = os.environ["IMAGE_DIR"]
+for i in range(%(images)d):
+    img = QImage(1600 + i, 1200, QImage.Format_RGB32)
+    img.fill(QColor.fromHsv((i * 37) %% 360, 200, 200))
+    img.save(os.path.join(image_dir, f"img{i:03}.jpg"), "JPG", 90)
+
+window = viewer.DisplayWindow("Stress", {"mode": "random_image"})
+window.resize(1280, 720)
+window.show()
+app.processEvents()
+window.setup_layout()
+assert len(window.image_list) == %(images)d, len(window.image_list)
+
+for i in range(%(rounds)d):
+    window.next_image()
+    if i %% 5 == 0:
+        app.processEvents()
+deadline = time.time() + 30
+while get_decode_pool()._inflight and time.time() < deadline:
+    app.processEvents()
+    time.sleep(0.01)
+app.processEvents()
+
+assert not window.foreground_label.pixmap().isNull()
+
+# Paced like the slideshow timer: every slide after the first should be
+# composed ahead of time and only need a pixmap swap.
+window.swap_precomposed = 0
+for i in range(%(paced)d):
+    if window.next_frame is not None:
+        window.next_frame[1].result(30)
+    window.next_image()
+    app.processEvents()
+assert window.swap_precomposed == %(paced)d, window.swap_precomposed
+assert not window.foreground_label.pixmap().isNull()
+assert not window.bg_label.pixmap().isNull()
+window.resize(1024, 600)
+app.processEvents()
+window.setup_layout()
+window.updateForegroundScaled()
+assert window.current_pixmap is not None and not window.current_pixmap.isNull()
+bad = [w for w in warnings if "pixmap" in w.lower() or "thread" in w.lower()]
+assert not bad, bad
+print("ok")
+"""
+
+
+def test_rapid_next_image_with_real_qt(tmp_path):
+    home = tmp_path / "home"
+    images = tmp_path / "images"
+    home.mkdir()
+    images.mkdir()
+    (home / "viewerconfig.json").write_text(json.dumps({
+        "displays": {"Stress": {
+            "mode": "random_image", "image_category": "", "image_interval": 60,
+            "shuffle_mode": True, "rotate": 0,
+        }},
+        "gui": {"background_blur_radius": 12, "background_scale_percent": 50},
+        "overlay": {},
+        "preload_count": 3,
+    }))
+    env = dict(
+        os.environ,
+        QT_QPA_PLATFORM="offscreen",
+        VIEWER_HOME=str(home),
+        IMAGE_DIR=str(images),
+        MEDIA_INDEX_PATH=str(home / "media_index.db"),
+        PLAYLIST_STATE_PATH=str(home / "playlist_state.json"),
+        PYTHONPATH=REPO_ROOT,
+    )
+    script = SCRIPT % {"skip": SKIP_CODE, "images": 24, "rounds": 400, "paced": 20}
+    proc = subprocess.run(
+        [sys.executable, "-c", script], env=env, cwd=str(tmp_path),
+        capture_output=True, text=True, timeout=300,
+    )
+    if proc.returncode == SKIP_CODE:
+        pytest.skip(proc.stdout.strip())
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert proc.stdout.strip().endswith("ok")
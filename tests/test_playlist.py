@@ -0,0 +1,56 @@
+import os
+
+from echoview.playlist import Playlist
+
+
+def _paths(root, n=6):
+    return [os.path.join(root, f"Folder{i % 2}", f"img{i}.jpg") for i in range(n)]
+
+
+def test_playlist_behaves_like_a_list():
+    paths = _paths("/mnt/EchoViews")
+    pl = Playlist(paths)
+    assert len(pl) == 6 and pl == paths and list(pl) == paths
+    assert pl[0] == paths[0] and pl[-1] == paths[-1]
+    assert pl.index(paths[3]) == 3
+    assert paths[4] in pl and "/mnt/EchoViews/Folder0/nope.jpg" not in pl
+    assert None not in pl
+
+    pl.insert(1, "/mnt/EchoViews/New/a.jpg")
+    pl[0] = "/mnt/EchoViews/Folder0/renamed.jpg"
+    del pl[2]
+    assert pl == ["/mnt/EchoViews/Folder0/renamed.jpg", "/mnt/EchoViews/New/a.jpg"] + paths[2:]
+
+
+def test_playlist_removals_reclaim_name_bytes():
+    paths = _paths("/srv", 40)
+    pl = Playlist(paths)
+    pl.delete_many(range(0, 40, 2))
+    assert pl == paths[1::2]
+    pl.delete_many(range(15))
+    assert pl == paths[31::2]
+    # Every removal left garbage; compaction keeps the buffer near live size.
+    assert len(pl._names) <= 2 * sum(len(os.path.basename(p)) for p in pl)
+
+
+def test_playlist_keeps_undecodable_names():
+    name = os.fsdecode(b"caf\xe9.jpg")
+    pl = Playlist([os.path.join("/srv", name)])
+    assert pl[0] == os.path.join("/srv", name)
+    assert pl.index(os.path.join("/srv", name)) == 0
+
+
+def test_sorted_position_bisects_the_folder_run():
+    pl = Playlist(["/srv/A/b.jpg", "/srv/A/d.jpg", "/srv/B/a.jpg", "/srv/B/c.jpg", "/srv/B/e.jpg"])
+    assert pl.sorted_position("/srv/A/a.jpg") == 0
+    assert pl.sorted_position("/srv/A/c.jpg") == 1
+    assert pl.sorted_position("/srv/A/z.jpg") == 2
+    assert pl.sorted_position("/srv/B/d.jpg") == 4
+    assert pl.sorted_position("/srv/B/z.jpg") == 5
+    # A listed path sorts right after itself; new folders go at the end.
+    assert pl[pl.sorted_position("/srv/B/c.jpg") - 1] == "/srv/B/c.jpg"
+    assert pl.sorted_position("/srv/C/a.jpg") == 5
+
+    del pl[0]
+    del pl[0]
+    assert pl.sorted_position("/srv/A/b.jpg") == 3
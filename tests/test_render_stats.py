@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from flask import Flask
+
+import echoview.render_stats as render_stats
+import echoview.viewer as viewer
+from echoview.web import routes
+
+
+def test_histogram_buckets_by_upper_bound():
+    h = render_stats.Histogram()
+    for ms in (0.1, 0.25, 3.0, 3.9, 5.0, 100000.0):
+        h.add(ms)
+    assert len(h.counts) == len(render_stats.STAGE_BOUNDS_MS) + 1
+    assert h.counts[0] == 2  # 0.1 and 0.25 ms
+    assert h.counts[render_stats.STAGE_BOUNDS_MS.index(4.0)] == 2
+    assert h.counts[-1] == 1  # slower than the last bound
+    assert h.percentile(50) == 4.0
+    assert h.percentile(100) == 100000.0
+    assert render_stats.Histogram().percentile(50) is None
+
+    d = h.to_dict()
+    assert d["count"] == 6 and d["max_ms"] == 100000.0 and sum(d["buckets"]) == 6
+
+
+def test_interval_summary_starts_anew_but_totals_keep_counting():
+    stats = render_stats.RenderStats("HDMI-1")
+    for _ in range(3):
+        stats.record("decode", 20.0)
+    with stats.timed("blur"):
+        pass
+
+    seconds, interval = stats.take_interval()
+    assert interval["decode"].count == 3 and interval["blur"].count == 1
+    assert seconds >= 0
+    stats.record("decode", 20.0)
+    _, interval = stats.take_interval()
+    assert interval["decode"].count == 1 and interval["blur"].count == 0
+    assert stats.snapshot()["stages"]["decode"]["count"] == 4
+
+
+def test_summary_lines_name_the_display_and_busy_stages(monkeypatch):
+    monkeypatch.setattr(render_stats, "_stats", {})
+    render_stats.get_render_stats("HDMI-1").record("lookup_miss", 40.0)
+    render_stats.get_render_stats("HDMI-2")
+
+    lines = render_stats.summary_lines()
+    assert len(lines) == 1
+    assert "HDMI-1" in lines[0] and "lookup_miss n=1 p50<=64" in lines[0]
+    assert "decode" not in lines[0]
+    assert render_stats.summary_lines() == []
+
+
+def test_published_stats_are_served_by_the_web_api(tmp_path, monkeypatch):
+    path = str(tmp_path / "render_stats.json")
+    monkeypatch.setattr(render_stats, "RENDER_STATS_PATH", path)
+    monkeypatch.setattr(render_stats, "_stats", {})
+    app = Flask(__name__)
+
+    with app.test_request_context("/api/render_stats"):
+        assert routes.api_render_stats().get_json()["displays"] == {}
+
+    render_stats.get_render_stats("HDMI-1").record("swap", 12.0)
+    render_stats.write_render_stats()
+    with open(path) as f:
+        assert json.load(f)["displays"]["HDMI-1"]["stages"]["swap"]["count"] == 1
+    with app.test_request_context("/api/render_stats"):
+        data = routes.api_render_stats().get_json()
+    assert data["bounds_ms"] == pytest.approx(list(render_stats.STAGE_BOUNDS_MS))
+    assert data["displays"]["HDMI-1"]["stages"]["swap"]["p50_ms"] == 16.0
+
+
+def test_swap_latency_is_summarised_in_the_log(slideshow_window, monkeypatch):
+    dw = slideshow_window()
+    logged = []
+    monkeypatch.setattr(viewer, "log_message", logged.append)
+    for _ in range(viewer.SWAP_LOG_EVERY):
+        dw._record_swap(viewer.time.perf_counter(), True)
+    assert len(logged) == 1 and "HDMI-1" in logged[0]
+    assert f"{viewer.SWAP_LOG_EVERY} precomposed" in logged[0]
+    assert dw.swap_times == [] and dw.swap_precomposed == 0
@@ -0,0 +1,235 @@
+import importlib
+import os
+import sys
+import types
+
+import pytest
+from flask import Flask
+
+import echoview.render_stats as render_stats
+
+
+class FakeSize:
+    def __init__(self, w, h):
+        self.w, self.h = w, h
+
+    def width(self):
+        return self.w
+
+    def height(self):
+        return self.h
+
+    def isValid(self):
+        return self.w > 0 and self.h > 0
+
+
+class FakeImage:
+    def __init__(self, w, h):
+        self.w, self.h = w, h
+
+    def isNull(self):
+        return self.w == 0
+
+    def width(self):
+        return self.w
+
+    def height(self):
+        return self.h
+
+    def save(self, path, fmt, quality):
+        with open(path, "w") as f:
+            f.write(f"{fmt} {self.w}x{self.h}")
+        return True
+
+
+class FakeReader:
+    """Reads the size of a fake image from the file: "WxH"."""
+
+    decoded = []
+
+    def __init__(self, path):
+        self.path = path
+        self.scaled = None
+
+    def setAutoDetectImageFormat(self, on):
+        pass
+
+    def autoTransform(self):
+        return False
+
+    def supportsOption(self, option):
+        return False
+
+    def size(self):
+        with open(self.path) as f:
+            w, h = f.read().split()[-1].split("x")
+        return FakeSize(int(w), int(h))
+
+    def setScaledSize(self, size):
+        self.scaled = size
+
+    def read(self):
+        self.decoded.append(self.path)
+        size = self.scaled or self.size()
+        return FakeImage(size.width(), size.height())
+
+
+@pytest.fixture
+def rend(tmp_path, monkeypatch):
+    """echoview.renditions over a temporary IMAGE_DIR with a fake reader."""
+    stubs = {
+        "PySide6.QtCore": ("QRect", "QSize"),
+        "PySide6.QtGui": ("QImage", "QImageIOHandler", "QImageReader", "QPainter", "QTransform"),
+    }
+    for name, attrs in stubs.items():
+        if name not in sys.modules:
+            stub = types.ModuleType(name)
+            for attr in attrs:
+                setattr(stub, attr, type(attr, (), {}))
+            monkeypatch.setitem(sys.modules, name, stub)
+    module = importlib.import_module("echoview.renditions")
+    decode = importlib.import_module("echoview.image_decode")
+    monkeypatch.setattr(module, "QImageReader", FakeReader)
+    monkeypatch.setattr(decode, "QImageReader", FakeReader)
+    monkeypatch.setattr(decode, "QImageIOHandler", types.SimpleNamespace(ClipRect="clip"))
+    monkeypatch.setattr(decode, "QSize", FakeSize)
+    monkeypatch.setattr(module, "IMAGE_DIR", str(tmp_path / "images"))
+    monkeypatch.setattr(module, "RENDITION_DIR", str(tmp_path / "images" / "_renditions"))
+    monkeypatch.setattr(render_stats, "RENDER_STATS_PATH", str(tmp_path / "render_stats.json"))
+    monkeypatch.setattr(render_stats, "_stats", {})
+    (tmp_path / "images").mkdir()
+    FakeReader.decoded = []
+    return module
+
+
+def _image(root, rel, w, h):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"{w}x{h}")
+    return str(path)
+
+
+def test_display_bounds_follow_mode_and_rotation(rend):
+    cfg = {"displays": {
+        "HDMI-1": {"chosen_mode": "1920x1080", "rotate": 0},
+        "HDMI-2": {"chosen_mode": "1920x1080", "rotate": 90},
+        "DSI-1": {"screen_name": "DSI-1: 800x480"},
+        "Same": {"chosen_mode": "1920x1080"},
+        "Unknown": {"screen_name": "Display0"},
+    }}
+    assert rend.display_bounds(cfg) == [(1920, 1080), (1920, 1920), (800, 480)]
+
+
+def test_display_bounds_are_what_the_viewer_decodes_for(rend):
+    cfg = {"displays": {
+        "HDMI-1": {"chosen_mode": "3840x2160", "rotate": 90},
+        "HDMI-2": {"chosen_mode": "1920x1080"},
+    }}
+    # A scaled 4K screen gives a 1920x1080 window, decoded for 1920x1920.
+    render_stats.get_render_stats("HDMI-1").decode_bounds = (1920, 1920)
+    render_stats.get_render_stats("Gone").decode_bounds = (640, 480)
+    render_stats.write_render_stats()
+    assert rend.display_bounds(cfg) == [(1920, 1920), (1920, 1080)]
+    assert rend.display_bounds(cfg, {"HDMI-2": {"decode_bounds": [0, 0]}}) == [
+        (3840, 3840), (1920, 1080)]
+
+
+def test_rendition_is_written_once_and_goes_stale_with_the_original(rend, tmp_path):
+    images = tmp_path / "images"
+    big = _image(images, "Trips/big.jpg", 6000, 4000)
+    small = _image(images, "small.png", 640, 480)
+    _image(images, "anim.gif", 6000, 4000)
+    cfg = {"displays": {"HDMI-1": {"chosen_mode": "1920x1080"}}}
+
+    assert rend.ingest([big, small, str(images / "anim.gif")], cfg) == 1
+    target = images / "_renditions" / "1920x1080" / "Trips" / "big.jpg"
+    assert target.read_text() == "JPG 1920x1280"
+    assert rend.fresh_rendition(big, (1920, 1080)) == str(target)
+    assert rend.fresh_rendition(small, (1920, 1080)) is None
+
+    FakeReader.decoded = []
+    assert rend.ingest([big], cfg) == 0
+    assert FakeReader.decoded == []
+
+    st = os.stat(big)
+    os.utime(big, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert rend.fresh_rendition(big, (1920, 1080)) is None
+    assert rend.ingest([big], cfg) == 1
+
+
+def test_backfill_skips_hidden_folders_and_prunes_orphans(rend, tmp_path, monkeypatch):
+    images = tmp_path / "images"
+    keep = _image(images, "a.jpg", 4000, 3000)
+    _image(images, "_private/b.jpg", 4000, 3000)
+    gone = _image(images, "c.jpg", 4000, 3000)
+    monkeypatch.setattr(rend, "load_config", lambda: {
+        "displays": {"HDMI-1": {"chosen_mode": "800x600"}}})
+
+    assert rend.main(["backfill"]) == 0
+    renditions = images / "_renditions" / "800x600"
+    assert sorted(os.listdir(renditions)) == ["a.jpg", "c.jpg"]
+
+    os.remove(gone)
+    old_size = _image(images, "_renditions/1024x768/a.jpg", 1024, 768)
+    assert rend.main(["backfill"]) == 0
+    assert os.listdir(renditions) == ["a.jpg"]
+    assert not os.path.exists(old_size)
+    assert rend.fresh_rendition(keep, (800, 600))
+
+
+def test_viewer_decodes_a_fresh_rendition_instead_of_the_original(rend, tmp_path, monkeypatch):
+    from echoview import viewer
+
+    original = tmp_path / "images" / "Trips" / "big.jpg"
+    rendition = tmp_path / "images" / "_renditions" / "1920x1080" / "Trips" / "big.jpg"
+    for path in (original, rendition):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"jpeg")
+    monkeypatch.setattr(viewer, "read_scaled_image", lambda path, bounds: types.SimpleNamespace(
+        path=path, isNull=lambda: False, sizeInBytes=lambda: 1))
+    dw = viewer.DisplayWindow.__new__(viewer.DisplayWindow)
+    dw.decode_bounds = (1920, 1080)
+    dw.render_stats = viewer.get_render_stats("Display0")
+
+    # Not written for the current original (mtime differs): ignored.
+    os.utime(rendition, ns=(0, 1_000_000_000))
+    assert dw.load_and_cache_image(str(original))["image"].path == str(original)
+    st = os.stat(original)
+    os.utime(rendition, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert dw.load_and_cache_image(str(original))["image"].path == str(rendition)
+    # Other sizes have no rendition.
+    assert dw.load_and_cache_image(str(original), (800, 800))["image"].path == str(original)
+
+
+def test_file_manager_keeps_renditions_with_their_originals(rend, tmp_path, monkeypatch):
+    from echoview.web import routes
+
+    images = tmp_path / "images"
+    monkeypatch.setattr(routes, "IMAGE_DIR", str(images))
+    (images / "Pets").mkdir()
+    cfg = {"displays": {"HDMI-1": {"chosen_mode": "1920x1080"},
+                        "HDMI-2": {"chosen_mode": "800x600"}}}
+    for rel in ("Trips/a.jpg", "Trips/b.jpg", "Trips/c.jpg"):
+        assert rend.ingest([_image(images, rel, 4000, 3000)], cfg) == 2
+    app = Flask(__name__)
+    app.register_blueprint(routes.main_bp)
+
+    def post(view, **form):
+        with app.test_request_context(method="POST", data=form):
+            view()
+
+    def renditions():
+        return sorted(os.path.relpath(os.path.join(d, f), images / "_renditions")
+                      for d, _, files in os.walk(images / "_renditions") for f in files)
+
+    post(routes.delete_image, path="Trips/a.jpg")
+    post(routes.rename_image, path="Trips/b.jpg", new_name="bee.jpg")
+    post(routes.move_image, path="Trips/c.jpg", dest="Pets")
+    assert renditions() == [os.path.join(size, rel) for size in ("1920x1080", "800x600")
+                            for rel in ("Pets/c.jpg", "Trips/bee.jpg")]
+    assert rend.fresh_rendition(str(images / "Pets" / "c.jpg"), (1920, 1080))
+
+    post(routes.rename_folder, folder="Trips", new_name="Travel")
+    post(routes.delete_folder, folder="Pets")
+    assert renditions() == [os.path.join(size, "Travel", "bee.jpg")
+                            for size in ("1920x1080", "800x600")]
@@ -0,0 +1,26 @@
+import pytest
+
+from echoview.shuffle import ShuffleOrder
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 7, 64, 1000, 4099])
+def test_shuffle_order_is_a_permutation(n):
+    order = ShuffleOrder(n, seed=7)
+    assert len(order) == n
+    assert sorted(order) == list(range(n))
+    assert all(order.index(order[pos]) == pos for pos in range(n))
+
+
+def test_shuffle_order_depends_only_on_length_and_seed():
+    assert list(ShuffleOrder(50, 1)) == list(ShuffleOrder(50, 1))
+    assert list(ShuffleOrder(50, 1)) != list(ShuffleOrder(50, 2))
+    assert list(ShuffleOrder(50, 1)) != list(range(50))
+
+
+def test_shuffle_order_bounds():
+    order = ShuffleOrder(5, 3)
+    assert order[-1] == order[4]
+    with pytest.raises(IndexError):
+        order[5]
+    with pytest.raises(ValueError):
+        order.index(5)
@@ -21,6 +21,14 @@ def test_get_subfolders_ignores_leading_underscore(tmp_path):
         utils.IMAGE_DIR = old_image_dir
 
 
+def test_ignored_path_checks_every_component():
+    assert utils.is_ignored_path("_hidden")
+    assert utils.is_ignored_path("Photos/_hidden/Sub")
+    assert utils.is_ignored_path("_hidden/")
+    assert not utils.is_ignored_path("Photos/Trips")
+    assert not utils.is_ignored_path("")
+
+
 def test_count_files_ignored_folder(tmp_path):
     hidden = tmp_path / "_sys"
     hidden.mkdir()
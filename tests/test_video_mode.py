@@ -1,5 +1,7 @@
 import os, sys, types, random
 
+import pytest
+
 REPO_ROOT = os.path.dirname(os.path.dirname(__file__))
 sys.path.insert(0, REPO_ROOT)
 sys.path.insert(0, os.path.join(REPO_ROOT, "echoview"))
@@ -42,7 +44,7 @@ qtcore.QRectF = object
 qtcore.QUrl = object
 
 qtgui = types.ModuleType("PySide6.QtGui")
-for name in ["QPixmap", "QMovie", "QPainter", "QImage", "QImageReader", "QTransform", "QFont"]:
+for name in ["QPixmap", "QMovie", "QPainter", "QImage", "QImageIOHandler", "QImageReader", "QTransform", "QFont"]:
     setattr(qtgui, name, type(name, (), {}))
 
 qtwidgets = types.ModuleType("PySide6.QtWidgets")
@@ -165,6 +167,7 @@ def test_build_video_list(tmp_path, monkeypatch):
     (folder2 / "c.webm").write_text("vid")
     monkeypatch.setattr(viewer, "IMAGE_DIR", str(tmp_path))
     dw = DisplayWindow.__new__(DisplayWindow)
+    dw.prefetch_futures = {}
     dw.disp_cfg = {"video_category": "Cats", "shuffle_videos": False}
     dw.current_mode = "videos"
     dw.image_list = []
@@ -240,6 +243,8 @@ def test_play_next_video_sequential(monkeypatch):
     dw.image_list = ["a.mp4", "b.mp4"]
     dw.index = 0
     dw.current_video_proc = None
+    dw.playlist_key = None
+    dw.play_order = None
 
     played = []
 
@@ -301,9 +306,16 @@ def test_next_image_starts_from_first(monkeypatch):
     dw.overlay_config = {}
     dw.fallback_image_list = []
     dw.fallback_index = -1
+    dw.playlist_key = None
+    dw.play_order = None
     recorded = []
     dw.show_foreground_image = lambda path, is_spotify=False: recorded.append(path)
     dw.prefetch_next_image = lambda: None
+    dw._precompose_next = lambda: None
+    dw.next_frame = None
+    dw.swap_times = []
+    dw.swap_precomposed = 0
+    dw.render_stats = viewer.get_render_stats("Display0")
     dw.clock_label = types.SimpleNamespace(update=lambda: None)
 
     dw.next_image(force=True)
@@ -327,6 +339,7 @@ def test_ignored_folder_not_loaded(monkeypatch, tmp_path):
 
     monkeypatch.setattr(viewer, "IMAGE_DIR", str(tmp_path))
     dw = DisplayWindow.__new__(DisplayWindow)
+    dw.prefetch_futures = {}
     dw.disp_cfg = {
         "mode": "random_image",
         "image_category": "_ai_temp",
@@ -338,7 +351,6 @@ def test_ignored_folder_not_loaded(monkeypatch, tmp_path):
     dw.current_mode = "random_image"
     dw.image_list = []
     dw.fallback_image_list = []
-    dw.cache_lock = viewer.threading.Lock()
 
     # Hidden folder is ignored, leaving no images
     dw.build_local_image_list()
@@ -374,3 +386,290 @@ def test_maybe_launch_external_browser_honors_web_toggle():
         "stop_video",
         ("launch", "https://example.com/page-with-youtube"),
     ]
+
+
+def _delta_window(tmp_path, monkeypatch, mode, disp_cfg, image_list, index):
+    monkeypatch.setattr(viewer, "IMAGE_DIR", str(tmp_path))
+    dw = DisplayWindow.__new__(DisplayWindow)
+    dw.prefetch_futures = {}
+    dw.disp_cfg = disp_cfg
+    dw.current_mode = mode
+    dw.image_list = viewer.Playlist(image_list)
+    dw.index = index
+    dw.image_cache = viewer.ImageCache()
+    dw.fallback_image_list = []
+    dw.current_video_proc = None
+    dw.play_order = None
+    dw.pending_resume = None
+    dw.next_frame = None
+    dw.shown = []
+    dw.next_image = lambda force=False: dw.shown.append(dw.image_list[max(dw.index, 0)])
+    return dw
+
+
+def test_media_deltas_update_playlist_in_place(tmp_path, monkeypatch):
+    from echoview.media_watch import MediaDelta
+
+    cats = tmp_path / "Cats"
+    a, c, d = (str(cats / n) for n in ("a.jpg", "c.jpg", "d.jpg"))
+    dw = _delta_window(
+        tmp_path, monkeypatch, "random_image",
+        {"image_category": "Cats", "shuffle_mode": False},
+        [a, c, d], 1,
+    )
+
+    # New upload lands in name order; the image on screen stays current.
+    dw.apply_media_deltas([
+        MediaDelta("added", str(cats / "b.jpg")),
+        MediaDelta("added", str(cats / "b.txt")),
+        MediaDelta("added", str(tmp_path / "Dogs" / "x.jpg")),
+    ])
+    assert dw.image_list == [a, str(cats / "b.jpg"), c, d]
+    assert dw.image_list[dw.index] == c
+
+    dw.apply_media_deltas([MediaDelta("moved", d, str(cats / "e.jpg"))])
+    assert dw.image_list == [a, str(cats / "b.jpg"), c, str(cats / "e.jpg")]
+
+    # Removing the image on screen makes the following one come up next.
+    dw.apply_media_deltas([MediaDelta("removed", c)])
+    assert dw.image_list == [a, str(cats / "b.jpg"), str(cats / "e.jpg")]
+    assert dw.image_list[dw.index + 1] == str(cats / "e.jpg")
+
+
+def test_media_deltas_start_empty_video_playlist(tmp_path, monkeypatch):
+    from echoview.media_watch import MediaDelta
+
+    clip = str(tmp_path / "Clips" / "new.mp4")
+    dw = _delta_window(
+        tmp_path, monkeypatch, "videos",
+        {"video_category": "Clips", "shuffle_videos": True},
+        [], 0,
+    )
+    dw.apply_media_deltas([MediaDelta("added", clip)])
+    assert dw.image_list == [clip]
+    assert dw.shown == [clip]
+
+
+def test_recursive_category_streams_into_playlist(tmp_path, monkeypatch):
+    from echoview import media_index
+
+    for rel in ("Trips/2023", "Trips/_hidden", "Trips/2024"):
+        (tmp_path / rel).mkdir(parents=True)
+    for rel in ("Trips/top.jpg", "Trips/2023/a.jpg", "Trips/_hidden/x.jpg", "Trips/2024/b.jpg"):
+        (tmp_path / rel).write_text("x")
+    monkeypatch.setattr(media_index, "IMAGE_DIR", str(tmp_path))
+
+    dw = _delta_window(
+        tmp_path, monkeypatch, "random_image",
+        {"image_category": "Trips", "include_subfolders": True}, [], -1,
+    )
+    dw.ui_tasks = viewer.queue.SimpleQueue()
+    dw.playlist_stream_id = 0
+    dw.playlist_streaming = False
+    threads = []
+    monkeypatch.setattr(viewer.threading, "Thread",
+                        lambda target, daemon: types.SimpleNamespace(start=lambda: threads.append(target)))
+
+    dw.build_local_image_list()
+    assert dw.image_list == [] and dw.playlist_streaming
+    threads.pop()()
+    # The first folder is shown as soon as it arrives, before the rest.
+    dw.ui_tasks.get_nowait()()
+    assert dw.shown == [str(tmp_path / "Trips" / "top.jpg")]
+    dw._run_ui_tasks()
+    assert dw.image_list == [
+        str(tmp_path / "Trips" / p) for p in ("top.jpg", "2023/a.jpg", "2024/b.jpg")
+    ]
+    assert not dw.playlist_streaming
+
+    # The synchronous form (used by the spotify fallback) walks the same tree.
+    dw.build_local_image_list(stream=False)
+    assert dw.image_list == [
+        str(tmp_path / "Trips" / p) for p in ("top.jpg", "2023/a.jpg", "2024/b.jpg")
+    ]
+
+def test_streamed_shuffle_takes_new_folders_in_now_and_then(tmp_path, monkeypatch):
+    dw = _delta_window(
+        tmp_path, monkeypatch, "random_image",
+        {"image_category": "Cats", "shuffle_mode": True, "include_subfolders": True}, [], -1,
+    )
+    dw.playlist_stream_id = 1
+    dw.playlist_streaming = True
+    dw.playlist_reordered_at = 0.0
+    dw.playlist_seed = 7
+    clock = [1000.0]
+    monkeypatch.setattr(viewer.time, "monotonic", lambda: clock[0])
+    folders = [[str(tmp_path / "Cats" / sub / f"{i}.jpg") for i in range(5)]
+               for sub in ("a", "b", "c", "d")]
+
+    dw._append_streamed(1, folders[0])
+    assert len(dw.play_order) == 5 and len(dw.shown) == 1
+    dw.index = 3
+    current = dw._playlist_item(dw.index)
+
+    # Too soon to shuffle again: the new folder plays after the shuffled one.
+    clock[0] += 1
+    dw._append_streamed(1, folders[1])
+    assert len(dw.play_order) == 5
+    assert [dw._playlist_item(i) for i in range(5, 10)] == folders[1]
+    assert dw._playlist_position(folders[1][2]) == 7
+
+    clock[0] += viewer.STREAM_REORDER_INTERVAL_S
+    dw._append_streamed(1, folders[2])
+    assert len(dw.play_order) == 15 and dw._playlist_item(dw.index) == current
+
+    # The end of the walk shuffles in the rest.
+    dw._append_streamed(1, folders[3])
+    dw._finish_stream(1)
+    assert len(dw.play_order) == 20 and dw._playlist_item(dw.index) == current
+    assert sorted(dw._playlist_item(i) for i in range(20)) == sorted(sum(folders, []))
+
+
+class _Inert:
+    """Stands in for the widgets and timers reload_settings() touches."""
+
+    def __getattr__(self, name):
+        return lambda *a, **k: None
+
+
+def _restarted_window(tmp_path, monkeypatch, disp_cfg):
+    """A window in the state DisplayWindow.__init__ leaves it before reload_settings()."""
+    from echoview import media_index
+
+    monkeypatch.setattr(viewer, "IMAGE_DIR", str(tmp_path))
+    monkeypatch.setattr(media_index, "IMAGE_DIR", str(tmp_path))
+    monkeypatch.setattr(viewer, "load_config", lambda: {"displays": {"HDMI-1": dict(disp_cfg)}})
+    monkeypatch.setattr(viewer, "get_background_cache", lambda: _Inert())
+    dw = DisplayWindow.__new__(DisplayWindow)
+    dw.disp_name = "HDMI-1"
+    dw.disp_cfg = {}
+    dw.running = True
+    dw.owns_image_cache = False
+    dw.on_cache_settings = None
+    dw.current_video_proc = None
+    dw.prefetch_futures = {}
+    dw.next_frame = None
+    dw.aspect_probe_id = 0
+    dw.playlist_stream_id = 0
+    dw.playlist_unsaved = None
+    dw.playlist_saved_at = 0.0
+    dw.ui_tasks = viewer.queue.SimpleQueue()
+    dw.swap_times = []
+    dw.swap_precomposed = 0
+    dw.render_stats = viewer.get_render_stats(dw.disp_name)
+    dw.clock_label = dw.web_view = dw.spotify_progress_bar = _Inert()
+    dw.spotify_progress_timer = dw.slideshow_timer = _Inert()
+    for name in ("stop_current_video", "_stop_external_browser", "_stop_hls_playback",
+                 "setup_layout", "clear_foreground_label", "prefetch_next_image",
+                 "_precompose_next"):
+        setattr(dw, name, lambda *a, **k: None)
+    dw.shown = []
+    dw.show_foreground_image = lambda path, is_spotify=False: dw.shown.append(path)
+    return dw
+
+
+@pytest.mark.parametrize("recursive", [False, True])
+def test_shuffled_playlist_resumes_after_restart(tmp_path, monkeypatch, recursive):
+    cats = tmp_path / "Cats"
+    (cats / "Kittens").mkdir(parents=True)
+    for i in range(10):
+        (cats / f"{i:02}.jpg").write_text("x")
+        (cats / "Kittens" / f"k{i:02}.jpg").write_text("x")
+    disp_cfg = {"mode": "random_image", "image_category": "Cats",
+                "shuffle_mode": True, "include_subfolders": recursive}
+    walks = []
+    monkeypatch.setattr(viewer.threading, "Thread",
+                        lambda target, daemon: types.SimpleNamespace(start=lambda: walks.append(target)))
+
+    def start():
+        # What DisplayWindow.__init__ does, with the folder walk run in place.
+        dw = _restarted_window(tmp_path, monkeypatch, disp_cfg)
+        dw.reload_settings()
+        dw.next_image(force=True)
+        assert bool(walks) == recursive
+        while walks:
+            walks.pop()()
+            dw._run_ui_tasks()
+        return dw
+
+    first = start()
+    n = len(first.image_list)
+    assert n == (20 if recursive else 10)
+    order = [first._playlist_item(i) for i in range(n)]
+    assert order != sorted(order) and sorted(order) == sorted(first.image_list)
+    for _ in range(4):
+        first.next_image()
+    # A streamed playlist shows its top folder first; resume from a later one.
+    while recursive and "Kittens" not in first.shown[-1]:
+        first.next_image()
+    saved = first.shown[-1]
+    for prev, cur in zip(first.shown, first.shown[1:]):
+        assert cur == order[(order.index(prev) + 1) % n]
+    # Only the first slide was written; the rest waits for the next save or exit.
+    assert viewer.load_playlist_state("HDMI-1", first.playlist_key)["path"] == first.shown[0]
+    first.flush_playlist_state()
+
+    second = start()
+    assert [second._playlist_item(i) for i in range(n)] == order
+    if recursive:
+        # The top folder was shown while the walk ran, without replacing the
+        # saved position; the slide after it comes next.
+        assert viewer.load_playlist_state("HDMI-1", second.playlist_key)["path"] == saved
+        second.next_image()
+    assert second.shown[-1] == order[(order.index(saved) + 1) % n]
+
+    # A different category does not pick up the saved position.
+    third = _restarted_window(tmp_path, monkeypatch, dict(disp_cfg, image_category="Dogs"))
+    third.reload_settings()
+    assert third.pending_resume is None
+    assert viewer.load_playlist_state("HDMI-1", third.playlist_key) is None
+
+
+def test_shared_cache_follows_the_budget_on_reload(tmp_path, monkeypatch):
+    disp_cfg = {"mode": "random_image", "image_category": "Cats"}
+    (tmp_path / "Cats").mkdir()
+    gui = viewer.EchoViewGUI.__new__(viewer.EchoViewGUI)
+    gui.image_cache = viewer.ImageCache()
+    gui.windows = [_restarted_window(tmp_path, monkeypatch, disp_cfg) for _ in range(2)]
+    cfg = {"displays": {"HDMI-1": disp_cfg}, "cache_budget_mb": 64, "cache_capacity": 10}
+    monkeypatch.setattr(viewer, "load_config", lambda: cfg)
+    # As in EchoViewGUI.__init__: the windows load their settings, then
+    # the shared cache is sized and the hook installed.
+    for w in gui.windows:
+        w.image_cache = gui.image_cache
+        w.reload_settings()
+        w.on_cache_settings = gui._configure_image_cache
+    gui._configure_image_cache()
+    assert gui.image_cache.budget_bytes == 2 * 64 * viewer.MB
+
+    cfg["cache_budget_mb"] = 32
+    gui.windows[0].reload_settings()
+    assert gui.image_cache.budget_bytes == (32 + 64) * viewer.MB
+    gui.windows[1].reload_settings()
+    assert gui.image_cache.budget_bytes == 2 * 32 * viewer.MB
+
+
+def test_media_deltas_keep_shuffled_playlist_in_place(tmp_path, monkeypatch):
+    from echoview.media_watch import MediaDelta
+
+    cats = tmp_path / "Cats"
+    paths = [str(cats / f"{i:02}.jpg") for i in range(10)]
+    dw = _delta_window(
+        tmp_path, monkeypatch, "random_image",
+        {"image_category": "Cats", "shuffle_mode": True}, paths, 3,
+    )
+    dw.playlist_seed = 99
+    dw._reorder_playlist()
+    on_screen = dw._playlist_item(3)
+    assert dw.image_list == paths
+
+    # The list stays in name order and the image on screen stays current.
+    dw.apply_media_deltas([MediaDelta("added", str(cats / "05b.jpg"))])
+    assert dw.image_list == sorted(paths + [str(cats / "05b.jpg")])
+    assert dw._playlist_item(dw.index) == on_screen
+
+    other = dw._playlist_item((dw.index + 1) % len(dw.image_list))
+    dw.apply_media_deltas([MediaDelta("removed", other)])
+    assert other not in dw.image_list
+    assert dw._playlist_item(dw.index) == on_screen
+    assert sorted(dw._playlist_item(i) for i in range(10)) == dw.image_list
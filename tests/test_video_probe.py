@@ -0,0 +1,59 @@
+import json
+import subprocess
+import threading
+
+from echoview import utils, video_probe
+from echoview.video_probe import VideoInfo
+
+
+def _fake_run(payload):
+    def run(cmd, **kwargs):
+        run.calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=json.dumps(payload).encode())
+
+    run.calls = []
+    return run
+
+
+def test_probe_video_reads_everything_in_one_call(monkeypatch):
+    run = _fake_run({
+        "streams": [{"width": 1920, "height": 1080, "codec_name": "h264"}],
+        "format": {"duration": "42.5"},
+    })
+    monkeypatch.setattr(video_probe.subprocess, "run", run)
+
+    assert video_probe.probe_video("clip.mp4") == VideoInfo(1920, 1080, 42.5, "h264")
+    assert len(run.calls) == 1
+
+
+def test_probe_video_handles_missing_stream_and_errors(monkeypatch):
+    monkeypatch.setattr(video_probe.subprocess, "run", _fake_run({"streams": []}))
+    assert video_probe.probe_video("audio.mp4") is None
+
+    def failing(cmd, **kwargs):
+        raise subprocess.TimeoutExpired(cmd, video_probe.PROBE_TIMEOUT)
+
+    monkeypatch.setattr(video_probe.subprocess, "run", failing)
+    assert video_probe.probe_video("stuck.mp4") is None
+
+
+def test_probe_videos_runs_concurrently(monkeypatch):
+    monkeypatch.setattr(video_probe, "ffprobe_available", lambda: True)
+    workers = min(video_probe.PROBE_WORKERS, 2)
+    barrier = threading.Barrier(workers, timeout=5)
+
+    def fake_probe(path):
+        # Only passes if `workers` probes are running at the same time.
+        barrier.wait()
+        return VideoInfo(16, 9)
+
+    monkeypatch.setattr(video_probe, "probe_video", fake_probe)
+    paths = [f"v{i}.mp4" for i in range(workers * 3)]
+    assert video_probe.probe_videos(paths) == {p: VideoInfo(16, 9) for p in paths}
+
+
+def test_probe_videos_without_ffprobe(monkeypatch):
+    monkeypatch.setattr(video_probe, "ffprobe_available", lambda: False)
+    assert video_probe.probe_videos(["a.mp4"]) == {"a.mp4": None}
+    monkeypatch.setattr(utils, "ffprobe_available", lambda: False)
+    assert utils.media_dimensions("a.mp4") == ()
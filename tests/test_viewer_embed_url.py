@@ -58,7 +58,7 @@ qtcore.QRectF = object
 qtcore.QUrl = object
 
 qtgui = types.ModuleType("PySide6.QtGui")
-for name in ["QPixmap", "QMovie", "QPainter", "QImage", "QImageReader", "QTransform", "QFont"]:
+for name in ["QPixmap", "QMovie", "QPainter", "QImage", "QImageIOHandler", "QImageReader", "QTransform", "QFont"]:
     setattr(qtgui, name, type(name, (), {}))
 
 qtwidgets = types.ModuleType("PySide6.QtWidgets")
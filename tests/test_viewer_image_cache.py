@@ -0,0 +1,141 @@
+import threading
+import types
+
+import echoview.viewer as viewer
+from echoview.viewer import DisplayWindow
+
+
+def test_window_resize_does_not_reuse_images_decoded_for_old_size():
+    dw = DisplayWindow.__new__(DisplayWindow)
+    dw.disp_name = "Display0"
+    dw.render_stats = viewer.get_render_stats(dw.disp_name)
+    dw.disp_cfg = {"rotate": 90}
+    dw.cache_budget_mb = 1
+    dw.image_cache = viewer.ImageCache()
+    dw.decode_bounds = (0, 0)
+    decoded = []
+    dw.load_and_cache_image = lambda path, bounds=None: decoded.append(bounds) or {"bytes": 10}
+
+    dw._update_decode_bounds(1920, 1080)
+    assert dw.decode_bounds == (1920, 1920)
+    dw.get_cached_image("a.jpg")
+    dw._update_decode_bounds(1080, 1920)
+    dw.get_cached_image("a.jpg")
+    assert decoded == [(1920, 1920)]
+
+    # Another size gets its own entry; the old one stays for windows that use it.
+    dw._update_decode_bounds(800, 480)
+    dw.get_cached_image("a.jpg")
+    assert decoded == [(1920, 1920), (800, 800)]
+    assert ("a.jpg", (1920, 1920)) in dw.image_cache
+
+
+def test_windows_of_the_same_size_share_one_decode():
+    shared = viewer.ImageCache()
+    decoded = []
+    windows = []
+    for name in ("Display0", "Display1"):
+        dw = DisplayWindow.__new__(DisplayWindow)
+        dw.disp_name = name
+        dw.render_stats = viewer.get_render_stats(name)
+        dw.cache_budget_mb = 128
+        dw.decode_bounds = (1920, 1920)
+        dw.image_cache = shared
+        dw.load_and_cache_image = lambda path, bounds=None: decoded.append(path) or {"bytes": 10}
+        windows.append(dw)
+
+    for dw in windows:
+        dw.get_cached_image("a.jpg")
+    assert decoded == ["a.jpg"]
+    assert shared.counts("Display0") == (0, 1)
+    assert shared.counts("Display1") == (1, 0)
+
+
+def test_get_cached_image_charges_decoded_size(monkeypatch):
+    dw = DisplayWindow.__new__(DisplayWindow)
+    dw.cache_budget_mb = 1
+    dw.decode_bounds = (1920, 1080)
+    dw.image_cache = viewer.ImageCache(viewer.MB, 15)
+    sizes = {"small.jpg": 300_000, "pano.jpg": 5 * viewer.MB}
+    dw.disp_name = "Display0"
+    dw.render_stats = viewer.get_render_stats(dw.disp_name)
+    dw.load_and_cache_image = lambda path, bounds=None: {"type": "static", "bytes": sizes[path]}
+    logged = []
+    monkeypatch.setattr(viewer, "log_message", logged.append)
+
+    assert dw.get_cached_image("small.jpg")["bytes"] == 300_000
+    assert dw.get_cached_image("pano.jpg")["bytes"] == 5 * viewer.MB
+    assert ("small.jpg", (1920, 1080)) in dw.image_cache
+    assert ("pano.jpg", (1920, 1080)) not in dw.image_cache
+    assert dw.image_cache.total_bytes == 300_000
+    assert logged and "pano.jpg" in logged[0]
+
+
+def test_prefetch_queues_upcoming_images_once_and_drops_stale_ones(monkeypatch):
+    pool = viewer.get_decode_pool()
+    requested = []
+
+    class Recorder:
+        def prefetch(self, key, loader):
+            requested.append(key[0])
+            return pool.prefetch(key, lambda: release.wait(5) and {"bytes": 1})
+
+        def cancel(self, key):
+            requested.append(("cancel", key[0]))
+            pool.cancel(key)
+
+    release = threading.Event()
+    monkeypatch.setattr(viewer, "get_decode_pool", lambda: Recorder())
+    dw = DisplayWindow.__new__(DisplayWindow)
+    dw.image_list = ["a.jpg", "b.jpg", "c.jpg", "d.jpg"]
+    dw.play_order = None
+    dw.index = 0
+    dw.preload_count = 2
+    dw.decode_bounds = (1920, 1080)
+    dw.cache_budget_mb = 128
+    dw.image_cache = viewer.ImageCache()
+    dw.prefetch_futures = {}
+
+    dw.prefetch_next_image()
+    dw.prefetch_next_image()  # timer fired again before the decodes finished
+    assert requested == ["b.jpg", "c.jpg"]
+
+    dw.index = 1
+    dw.prefetch_next_image()
+    assert requested[2:] == [("cancel", "b.jpg"), "d.jpg"]
+
+    release.set()
+    for future in list(dw.prefetch_futures.values()):
+        future.result(5)
+    assert ("c.jpg", (1920, 1080)) in dw.image_cache
+    assert ("d.jpg", (1920, 1080)) in dw.image_cache
+
+
+def test_overwritten_image_is_decoded_again(slideshow_window, tmp_path, monkeypatch):
+    from echoview.media_watch import MediaDelta
+
+    cats = tmp_path / "Cats"
+    cats.mkdir()
+    for name in ("a.jpg", "b.jpg"):
+        (cats / name).write_text("old")
+    monkeypatch.setattr(viewer, "IMAGE_DIR", str(tmp_path))
+    monkeypatch.setattr(viewer, "get_background_cache", lambda: types.SimpleNamespace(
+        get=lambda key: None, put=lambda key, image: None))
+    dw = slideshow_window()
+    dw.disp_cfg = {"image_category": "Cats"}
+    dw.image_list = viewer.Playlist([str(cats / "a.jpg"), str(cats / "b.jpg")])
+    dw.fallback_image_list = []
+    dw.load_and_cache_image = lambda path, bounds=None: {
+        "type": "static", "bytes": 1,
+        "image": types.SimpleNamespace(path=open(path).read(), isNull=lambda: False)}
+
+    dw.next_image(force=True)
+    dw.next_frame[1].result(5)  # b.jpg composed from the old file
+    (cats / "b.jpg").write_text("new")
+    dw.apply_media_deltas([MediaDelta("added", str(cats / "b.jpg"))])
+    assert dw.next_frame is None and len(dw.image_list) == 2
+
+    dw._precompose_next()
+    dw.next_frame[1].result(5)
+    dw.next_image()
+    assert dw.foreground_label.pixmap.source == ("fg", "new", 1920, 1080)
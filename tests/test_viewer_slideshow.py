@@ -0,0 +1,49 @@
+import types
+
+
+def test_timer_tick_swaps_in_the_precomposed_frame(slideshow_window):
+    dw = slideshow_window()
+
+    dw.next_image(force=True)  # nothing composed yet: drawn on the spot
+    assert dw.shown == ["a.jpg"] and dw.swap_precomposed == 0
+    assert dw.next_frame[0][0] == "b.jpg"
+    dw.next_frame[1].result(5)
+
+    dw.next_image()
+    assert dw.shown == ["a.jpg"]
+    assert dw.foreground_label.pixmap.source == ("fg", "b.jpg", 1920, 1080)
+    assert dw.bg_label.pixmap.source == ("bg", "b.jpg", 8)
+    assert dw.current_source_image.path == "b.jpg" and dw.current_pixmap is None
+    assert dw.swap_precomposed == 1 and len(dw.swap_times) == 2
+    assert dw.last_swap_ms is not None
+    stages = dw.render_stats.snapshot()["stages"]
+    assert stages["swap"]["count"] == 2
+    assert stages["precompose"]["count"] >= 1
+    assert stages["lookup_miss"]["count"] >= 1
+
+
+def test_precomposed_frame_for_old_geometry_is_not_used(slideshow_window):
+    dw = slideshow_window()
+    dw.next_image(force=True)
+    dw.next_frame[1].result(5)
+
+    dw.foreground_label.w = 1280  # window resized before the tick
+    dw.next_image()
+    assert dw.shown == ["a.jpg", "b.jpg"] and dw.swap_precomposed == 0
+    assert dw.next_frame[0][:2] == ("c.jpg", 1280)
+
+
+def test_redrawn_foreground_goes_to_the_label_as_it_is(slideshow_window):
+    dw = slideshow_window()
+    dw.disp_cfg = {"rotate": 90}
+    dw.fg_scale_percent = 50
+    source = types.SimpleNamespace(width=lambda: 4000, height=lambda: 3000)
+    dw.current_pixmap = source
+    dw.degrade_foreground = lambda pm, bounding: ("degraded", pm, bounding)
+    dw.apply_rotation_if_any = lambda pm: ("rotated", pm)
+
+    dw.updateForegroundScaled()
+    # No window-sized frame is painted and converted: the label centres
+    # the rotated foreground itself.
+    assert dw.foreground_label.pixmap == ("rotated", ("degraded", source, (1440, 1080)))
+    assert dw.render_stats.snapshot()["stages"]["compose"]["count"] == 1